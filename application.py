@@ -10,18 +10,29 @@ Notes:
 - Uses st.session_state to ensure .env is loaded once per Streamlit session.
 """
 
+import io
+import os
 import sys
+import time
+from datetime import datetime, timedelta
 
 import cv2
 import streamlit as st
 from dotenv import load_dotenv
 
-from metervision.constants import DIR_CONFIG_FILE
+from metervision.constants import DIR_CONFIG_FILE, PARAMS_CONFIG_FILE
 from metervision.exception.custom_exception import CustomException
 # Own Module
 from metervision.logger.logs import logging
+from metervision.monitoring.metrics import start_metrics_server
+from metervision.pipeline.bulk import (default_progress_path, read_progress,
+                                       submit_bulk_job)
+from metervision.pipeline.cache import with_prediction_cache
 from metervision.pipeline.predictor import MeterVisionPipeline
-from metervision.utils.file_utils import read_img
+from metervision.pipeline.results import with_results_store
+from metervision.serving.batcher import QueueFullError
+from metervision.serving.executor import InferenceExecutor
+from metervision.utils.file_utils import read_img_thumbnail
 
 # ------------------------------------------------------------------------------------------------------------------
 # Loading Environment Variables
@@ -70,13 +81,54 @@ def load_pipeline() -> MeterVisionPipeline:
 
     Decorating with `st.cache_resource` ensures heavy model loading happens only once
     per app session & worker, avoiding repeated expensive initializations.
+    When `prediction_cache.enabled` is set, re-uploaded images are served from cache.
+    When `results_store.enabled` is set, every reading is recorded in the results store.
     """
 
-    pipeline = MeterVisionPipeline()
+    pipeline = with_prediction_cache(
+        MeterVisionPipeline(),
+        PARAMS_CONFIG_FILE.prediction_cache,
+        DIR_CONFIG_FILE.prediction_cache_db,
+    )
+    pipeline = with_results_store(
+        pipeline, PARAMS_CONFIG_FILE.results_store, DIR_CONFIG_FILE.results_db
+    )
     return pipeline
 
 
-pipeline = load_pipeline()
+@st.cache_resource
+def load_executor() -> InferenceExecutor:
+    """
+    Single owner of the cached pipeline, shared by every user session.
+
+    Sessions never call the models directly: they submit to this executor, which
+    queues the requests and serves them in micro-batches on one worker thread.
+    """
+
+    params = PARAMS_CONFIG_FILE.app_executor
+    return InferenceExecutor(
+        pipeline=load_pipeline(),
+        max_batch_size=params.max_batch_size,
+        max_wait_ms=params.max_wait_ms,
+        max_queue_size=params.max_queue_size,
+    )
+
+
+executor = load_executor()
+
+
+@st.cache_resource
+def load_metrics_server():
+    """Expose GET /metrics on `metrics.app_port` once per app process (0 = disabled)."""
+
+    port = PARAMS_CONFIG_FILE.metrics.app_port
+    if port > 0:
+        logging.info(f"Serving app metrics on port {port}")
+        return start_metrics_server(port)
+    return None
+
+
+load_metrics_server()
 
 
 # ------------------------------------------------------------------------------------------------------------------
@@ -108,9 +160,139 @@ def home_page() -> None:
 # ------------------------------------------------------------------------------------------------------------------
 
 
+@st.fragment(run_every="2s")
+def bulk_job_progress() -> None:
+    """
+    Poll the progress file of the submitted bulk job.
+
+    Runs as a fragment so only this block reruns every few seconds; the job itself
+    lives in a separate process and never blocks the script.
+    """
+
+    job = st.session_state.get("bulk_job")
+    if job is None:
+        return None
+
+    progress = read_progress(default_progress_path(job["output"]))
+    if progress is None:
+        st.info("Bulk job is starting...")
+        return None
+
+    total = progress["total"] or 1
+    st.progress(
+        min(progress["done"] / total, 1.0),
+        text=f"{progress['done']} / {progress['total']} images "
+        f"({progress['failed']} failed) — {progress['status']}",
+    )
+
+    if progress["status"] == "failed":
+        st.error(f"Bulk job failed: {progress['error']}")
+    elif progress["status"] == "completed" and os.path.isfile(job["output"]):
+        with open(job["output"], "rb") as f:
+            st.download_button(
+                label="Download Readings",
+                data=f.read(),
+                file_name=os.path.basename(job["output"]),
+            )
+    elif progress["status"] == "completed":
+        st.success(f"Readings written to {job['output']}")
+    return None
+
+
 def bulk_data_page() -> None:
+    """
+    Bulk Data page UI and flow.
+
+    - Accepts a zip archive of meter images, or the path of a folder on the server.
+    - On 'Start Bulk Job' button press: submits a headless bulk job (separate process)
+      and polls its progress; no inference runs inside the Streamlit script.
+    """
 
     st.title("Bulk Data")
+    uploaded_zip = st.file_uploader(label="Select a Zip of Images", type=["zip"])
+    folder_path = st.text_input(label="...or a Folder Path on the Server")
+    output_format = st.selectbox(label="Output Format", options=["csv", "parquet"])
+
+    if st.button("Start Bulk Job", type="primary"):
+        job_dir = os.path.join(
+            DIR_CONFIG_FILE.bulk_jobs_dir, datetime.now().strftime("%Y%m%d_%H%M%S")
+        )
+        os.makedirs(job_dir, exist_ok=True)
+
+        if uploaded_zip:
+            source = os.path.join(job_dir, "images.zip")
+            with open(source, "wb") as f:
+                f.write(uploaded_zip.getbuffer())
+        elif folder_path and os.path.isdir(folder_path):
+            source = folder_path
+        else:
+            st.warning("Upload a zip archive or enter an existing folder path.")
+            return None
+
+        output = os.path.join(job_dir, f"readings.{output_format}")
+        submit_bulk_job(source=source, output=output, output_format=output_format)
+        st.session_state["bulk_job"] = {"source": source, "output": output}
+        logging.info(f"Bulk job submitted for {source}")
+
+    bulk_job_progress()
+    reading_history()
+    return None
+
+
+def reading_history() -> None:
+    """
+    Reading history from the results store (no inference is re-run).
+
+    - Filters by meter ids (one per line, empty = all meters) and period.
+    - Shows the first rows (or the latest reading per meter) and exports every
+      matching row to CSV.
+    """
+
+    store = getattr(load_pipeline(), "store", None)
+    st.subheader("Reading History")
+    if store is None:
+        st.info("The results store is disabled (results_store.enabled).")
+        return None
+
+    meter_text = st.text_area(label="Meter IDs (one per line, empty for all meters)")
+    today = datetime.now().date()
+    period = st.date_input(label="Period", value=(today - timedelta(days=30), today))
+    latest_only = st.checkbox(label="Latest reading per meter only")
+    if not st.button("Query History") or len(period) != 2:
+        return None
+
+    meter_ids = [line.strip() for line in meter_text.splitlines() if line.strip()] or None
+    since = datetime.combine(period[0], datetime.min.time())
+    until = datetime.combine(period[1] + timedelta(days=1), datetime.min.time())
+
+    start_time = time.perf_counter()
+    if latest_only:
+        rows = store.latest_readings(meter_ids=meter_ids, until=until)
+        rows = [row for row in rows if row["created_at"] >= since.timestamp()]
+        total = len(rows)
+    else:
+        filters = {"meter_ids": meter_ids, "since": since, "until": until}
+        total = store.count(**filters)
+        rows = store.query(**filters, limit=1000)
+    elapsed = round(time.perf_counter() - start_time, 3)
+    logging.info(f"History query: {total} readings (time {elapsed}s)")
+
+    st.caption(f"{total} readings ({elapsed}s), showing {len(rows)}")
+    st.dataframe(rows, use_container_width=True)
+
+    if total and not latest_only:
+        output = os.path.join(
+            DIR_CONFIG_FILE.bulk_jobs_dir,
+            f"history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        )
+        os.makedirs(DIR_CONFIG_FILE.bulk_jobs_dir, exist_ok=True)
+        store.export(output, **filters)
+        with open(output, "rb") as f:
+            st.download_button(
+                label="Download History",
+                data=f.read(),
+                file_name=os.path.basename(output),
+            )
     return None
 
 
@@ -140,16 +322,38 @@ def prediction_page() -> None:
         if st.button("Start Prediction", type="primary"):
             logging.info("Prediction has been Started....")
 
-            # Use spinner to inform the user the app is working
-            with st.spinner("Wait For It...", show_time=True):
+            # large photos are read coarse-to-fine: only the display is decoded at full size
+            # the file name is kept: the results store takes the meter id from it
+            upload = io.BytesIO(uploaded_file.getvalue())
+            upload.name = uploaded_file.name
+            try:
+                future = executor.submit(img_source=upload)
+            except QueueFullError as e:
+                st.warning(str(e))
+                return None
+
+            # Show queue position / progress while the shared executor works
+            timeout_s = PARAMS_CONFIG_FILE.app_executor.timeout_s
+            deadline = time.monotonic() + timeout_s
+            with st.status("Waiting in queue...", expanded=False) as status:
+                while not future.done() and time.monotonic() < deadline:
+                    if future.running():
+                        status.update(label="Reading the meter...")
+                    else:
+                        status.update(
+                            label=f"Waiting in queue ({executor.queue_depth} pending)..."
+                        )
+                    time.sleep(0.1)
 
-                # read_img should return an image array (np.ndarray)
-                original_image = read_img(uploaded_file)
+                if not future.done():
+                    future.cancel()
+                    status.update(label="Prediction timed out", state="error")
+                    st.error(f"No result after {timeout_s}s, please try again.")
+                    return None
+                status.update(label="Prediction finished", state="complete")
 
-                # run the pipeline; returns display_arr and reading_arr (image arrays)
-                display_image, reading_image, readings = pipeline.predict(
-                    image=original_image
-                )
+            display_image, reading_image, readings = future.result()
+            original_image, _ = read_img_thumbnail(uploaded_file, 600)
 
             # Layout: show original image and ROI images in columns
             with st.container(height=400):
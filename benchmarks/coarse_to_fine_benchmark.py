@@ -0,0 +1,115 @@
+"""
+Benchmark: full-resolution decode + detection vs coarse-to-fine `predict_file`.
+
+Synthetic JPEG meter photos at several sizes go through the stub pipeline (see
+`stub_models.py`) in two ways:
+- full   : `read_img` (full decode) + `predict`, as before
+- coarse : `predict_file` (thumbnail draft decode, full-quality display region only)
+
+Each (size, mode) runs in a fresh interpreter so the reported peak RSS is its own.
+The mean absolute difference between the two display crops shows how close the
+coarse-to-fine crop is to the full-resolution one (0 = identical).
+
+Usage (from the repository root):
+    python benchmarks/coarse_to_fine_benchmark.py --repeats 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+SIZES = [(1600, 1200), (3024, 2268), (4032, 3024), (6000, 4000)]
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def child(path: str, mode: str, repeats: int, crop_path: str) -> None:
+    """Time one mode on one file and print a JSON line."""
+    sys.path.insert(0, BENCH_DIR)
+    from latency_suite import peak_rss_mb
+    from stub_models import build_stub_pipeline
+
+    from metervision.utils.file_utils import read_img
+
+    pipeline = build_stub_pipeline()
+    pipeline.predict_batch(images=[np.zeros((480, 640, 3), dtype=np.uint8)])
+
+    baseline_rss = peak_rss_mb()
+    samples = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        if mode == "full":
+            display_image, _, _ = pipeline.predict(image=read_img(path))
+        else:
+            display_image, _, _ = pipeline.predict_file(img_source=path)
+        samples.append(time.perf_counter() - start_time)
+
+    np.save(crop_path, display_image)
+    print(
+        json.dumps(
+            {
+                "median_ms": round(float(np.median(samples)) * 1000, 1),
+                "peak_rss_mb": peak_rss_mb(),
+                "rss_growth_mb": round(peak_rss_mb() - baseline_rss, 1),
+            }
+        )
+    )
+
+
+def run_child(path: str, mode: str, repeats: int, crop_path: str) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child", path, mode, str(repeats), crop_path],
+        text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Coarse-to-fine decode benchmark.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--child", nargs=4, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        path, mode, repeats, crop_path = args.child
+        child(path, mode, int(repeats), crop_path)
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    from stub_models import synthetic_meter_image
+
+    print(
+        f"{'size':<12}{'full ms':>10}{'coarse ms':>11}{'full MB':>10}{'coarse MB':>11}"
+        f"{'crop diff':>11}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height in SIZES:
+            path = os.path.join(tmp, f"{width}x{height}.jpg")
+            img = synthetic_meter_image(width, height)
+            cv2.imwrite(path, cv2.cvtColor(img, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 92])
+            del img
+
+            crops = {mode: os.path.join(tmp, f"{mode}.npy") for mode in ("full", "coarse")}
+            full = run_child(path, "full", args.repeats, crops["full"])
+            coarse = run_child(path, "coarse", args.repeats, crops["coarse"])
+
+            full_crop, coarse_crop = np.load(crops["full"]), np.load(crops["coarse"])
+            diff = (
+                float(np.abs(full_crop.astype(np.int16) - coarse_crop).mean())
+                if full_crop.shape == coarse_crop.shape
+                else float("nan")
+            )
+            print(
+                f"{f'{width}x{height}':<12}{full['median_ms']:>10.1f}{coarse['median_ms']:>11.1f}"
+                f"{full['rss_growth_mb']:>10.1f}{coarse['rss_growth_mb']:>11.1f}{diff:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
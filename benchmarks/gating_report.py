@@ -0,0 +1,95 @@
+"""
+Savings report of the early-exit gates (`metervision.pipeline.gating`).
+
+Runs a folder of uploads (ideally a realistic mix: meters, blurry shots, photos that
+are not meters) through `predict_batch` with the gates off and on, and prints the
+time per image of both runs and, per gate, how many images it checked and rejected.
+
+Usage (from the repository root, so the config paths resolve):
+    python benchmarks/gating_report.py --images path/to/uploads --meter-gate heuristic
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from metervision.pipeline.gating import MeterGate, gate_stats, rejected_gate
+from metervision.pipeline.predictor import MeterVisionPipeline
+from metervision.utils.file_utils import read_img
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def load_images(image_dir: str, limit: int) -> List[np.ndarray]:
+    """Decode up to `limit` images from `image_dir` (sorted by name)."""
+    paths = sorted(
+        p for p in Path(image_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )[:limit]
+    return [read_img(str(p)) for p in paths]
+
+
+def time_run(pipeline: MeterVisionPipeline, images: List[np.ndarray], batch_size: int):
+    start_time = time.perf_counter()
+    readings = []
+    for i in range(0, len(images), batch_size):
+        readings += [r for _, _, r in pipeline.predict_batch(images[i : i + batch_size])]
+    return time.perf_counter() - start_time, readings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", required=True, help="Folder of uploads")
+    parser.add_argument("--limit", type=int, default=128, help="Max images to use")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument(
+        "--meter-gate", choices=["config", "none", "heuristic", "classifier"], default="config"
+    )
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.limit)
+    if not images:
+        raise SystemExit(f"No images found in {args.images}")
+
+    pipeline = MeterVisionPipeline()
+    gating = pipeline.params_config.gating
+    if args.meter_gate != "config":
+        gating.meter_gate = args.meter_gate
+        pipeline.meter_gate = (
+            None
+            if args.meter_gate == "none"
+            else MeterGate(gating, pipeline.dir_config.meter_classifier_model)
+        )
+    meter_gate = pipeline.meter_gate
+    pipeline.predict_batch(images=images[:2])  # warm-up
+
+    gating.enabled, pipeline.meter_gate = False, None
+    ungated_s, _ = time_run(pipeline, images, args.batch_size)
+
+    gating.enabled, pipeline.meter_gate = True, meter_gate
+    before = gate_stats()
+    gated_s, readings = time_run(pipeline, images, args.batch_size)
+    after = gate_stats()
+
+    print(
+        f"{len(images)} images, batch size {args.batch_size}, "
+        f"meter gate {gating.meter_gate}"
+    )
+    print(f"gates off: {ungated_s / len(images) * 1000:.1f} ms/image")
+    print(
+        f"gates on : {gated_s / len(images) * 1000:.1f} ms/image "
+        f"({ungated_s / gated_s:.2f}x)"
+    )
+    print(f"\n{'gate':<8}{'checked':>9}{'rejected':>10}")
+    for gate, counts in after.items():
+        checked = counts["checked"] - before[gate]["checked"]
+        rejected = counts["rejected"] - before[gate]["rejected"]
+        print(f"{gate:<8}{checked:>9}{rejected:>10}")
+    decoded = sum(rejected_gate(reading) is None for reading in readings)
+    print(f"\nOCR decodes: {decoded} of {len(images)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+How closely does latency follow the budget of `predict_within(image, budget_ms)`?
+
+Runs the same images through `predict` (baseline) and then through `predict_within`
+with each budget in `--budgets`, and prints per budget:
+- p50 / p95 / p99 latency and p99 / budget;
+- the share of requests that overran the budget;
+- how often each degradation was applied (display:small_input, reading:skip,
+  ocr:short, ...).
+
+Stage cost estimates are shared across requests (as in a server), so the first
+`--warmup` requests of every budget are not counted while the estimates settle.
+
+Usage (from the repository root):
+    python benchmarks/latency_budget_harness.py --stub --budgets 50 100 200
+    python benchmarks/latency_budget_harness.py --images path/to/meter_images --budgets 150 300
+"""
+
+import argparse
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from metervision.utils.file_utils import read_img
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def load_images(args) -> List[np.ndarray]:
+    if args.stub:
+        from stub_models import synthetic_meter_image
+
+        sizes = [(640, 480), (1280, 960), (1920, 1440)]
+        return [
+            synthetic_meter_image(*sizes[i % len(sizes)], seed=i) for i in range(args.limit)
+        ]
+    paths = sorted(
+        p for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )[: args.limit]
+    return [read_img(str(p)) for p in paths]
+
+
+def load_pipeline(args):
+    if args.stub:
+        from stub_models import build_stub_pipeline
+
+        return build_stub_pipeline()
+
+    from metervision.pipeline.predictor import MeterVisionPipeline
+
+    return MeterVisionPipeline()
+
+
+def summarize(latencies: List[float], budget_ms: float = 0.0) -> Dict[str, float]:
+    values = np.asarray(latencies) * 1000
+    p99 = float(np.percentile(values, 99))
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": p99,
+        "p99_ratio": p99 / budget_ms if budget_ms else 0.0,
+        "overrun": float((values > budget_ms).mean() * 100) if budget_ms else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency budget p99 harness.")
+    parser.add_argument("--images", default=None, help="Folder of meter images")
+    parser.add_argument("--stub", action="store_true", help="Offline stub models")
+    parser.add_argument("--limit", type=int, default=32, help="Distinct images")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per budget")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--budgets", type=float, nargs="+", default=[50, 100, 200, 400])
+    args = parser.parse_args()
+    if not args.stub and not args.images:
+        parser.error("--images is required without --stub")
+
+    images = load_images(args)
+    if not images:
+        raise SystemExit(f"No images found in {args.images}")
+    pipeline = load_pipeline(args)
+
+    baseline = []
+    for i in range(args.warmup + args.requests):
+        start_time = time.perf_counter()
+        pipeline.predict(image=images[i % len(images)])
+        if i >= args.warmup:
+            baseline.append(time.perf_counter() - start_time)
+    row = summarize(baseline)
+    print(f"{len(images)} images, {args.requests} requests per row")
+    print(
+        f"\n{'budget ms':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'p99/budget':>11} "
+        f"{'overrun %':>10}  degradations (% of requests)"
+    )
+    print(f"{'none':>9} {row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f}")
+
+    for budget_ms in args.budgets:
+        latencies: List[float] = []
+        degradations: Counter = Counter()
+        for i in range(args.warmup + args.requests):
+            start_time = time.perf_counter()
+            *_, report = pipeline.predict_within(images[i % len(images)], budget_ms)
+            if i >= args.warmup:
+                latencies.append(time.perf_counter() - start_time)
+                degradations.update(report["degradations"])
+
+        row = summarize(latencies, budget_ms)
+        applied = ", ".join(
+            f"{name} {count / args.requests * 100:.0f}"
+            for name, count in sorted(degradations.items())
+        )
+        print(
+            f"{budget_ms:>9.0f} {row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f} "
+            f"{row['p99_ratio']:>11.2f} {row['overrun']:>10.1f}  {applied or '-'}"
+        )
+
+    print(f"\nlearned stage costs (ms): {pipeline.stage_costs.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
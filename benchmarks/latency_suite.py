@@ -0,0 +1,211 @@
+"""
+Repeatable per-stage latency benchmark for the MeterVision pipeline.
+
+Runs fully offline on CPU: synthetic meter images at several resolutions go through
+`MeterVisionPipeline` built around stub models (see `stub_models.py`), or around the
+real models with `--real-models`. Reports:
+
+- per-stage latency (decode, display, reading, ocr) and end-to-end p50/p95/p99,
+- `predict_batch` throughput for each batch size x torch thread count,
+- peak resident memory,
+
+and saves everything as JSON. `--compare old.json` prints the p50 change per stage
+and exits with status 1 when a stage regressed beyond `--tolerance`.
+
+Usage (from the repository root):
+    python benchmarks/latency_suite.py --output bench.json
+    python benchmarks/latency_suite.py --output new.json --compare bench.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+import psutil
+import torch
+
+from stub_models import build_stub_pipeline, synthetic_meter_image
+
+from metervision.utils.file_utils import read_img
+
+RESOLUTIONS = [(640, 480), (1280, 960), (1920, 1440), (4032, 3024)]
+STAGES = ["decode", "display", "reading", "ocr", "end_to_end"]
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (falls back to current RSS)."""
+    info = psutil.Process().memory_info()
+    peak = getattr(info, "peak_wset", None)  # Windows
+    if peak is None:
+        try:
+            import resource
+
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak *= 1 if sys.platform == "darwin" else 1024
+        except ImportError:
+            peak = info.rss
+    return round(peak / 2**20, 1)
+
+
+def encode_jpeg(img: np.ndarray) -> bytes:
+    ok, buffer = cv2.imencode(".jpg", cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+    return buffer.tobytes()
+
+
+def time_stages(pipeline, payloads: List[bytes]) -> Dict[str, Dict[str, float]]:
+    """Time every stage separately, per image, then summarize."""
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    for payload in payloads:
+        t0 = time.perf_counter()
+        image = read_img(io.BytesIO(payload))
+        t1 = time.perf_counter()
+        display_image = pipeline.display_detector.extract_display_roi(img=image)
+        t2 = time.perf_counter()
+        reading_image = pipeline.reading_detector.extract_reading_roi(img=display_image)
+        t3 = time.perf_counter()
+        pipeline.trocr_recognizer.recognize_reading(image=reading_image)
+        t4 = time.perf_counter()
+
+        samples["decode"].append(t1 - t0)
+        samples["display"].append(t2 - t1)
+        samples["reading"].append(t3 - t2)
+        samples["ocr"].append(t4 - t3)
+        samples["end_to_end"].append(t4 - t0)
+    return {stage: percentiles(values) for stage, values in samples.items()}
+
+
+def time_throughput(
+    pipeline, images: List[np.ndarray], batch_sizes: List[int], threads: List[int]
+) -> List[Dict[str, Any]]:
+    rows = []
+    for num_threads in threads:
+        torch.set_num_threads(num_threads)
+        cv2.setNumThreads(num_threads)
+        for batch_size in batch_sizes:
+            start_time = time.perf_counter()
+            for i in range(0, len(images), batch_size):
+                pipeline.predict_batch(images=images[i : i + batch_size])
+            elapsed = time.perf_counter() - start_time
+            rows.append(
+                {
+                    "threads": num_threads,
+                    "batch_size": batch_size,
+                    "images_per_s": round(len(images) / elapsed, 2),
+                }
+            )
+    return rows
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline_path: str, tolerance: float) -> bool:
+    """Print p50 deltas per resolution/stage; return True if any stage regressed."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressed = False
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('commit')}):")
+    for resolution, stages in current["stages"].items():
+        for stage, stats in stages.items():
+            old = baseline["stages"].get(resolution, {}).get(stage)
+            if not old:
+                continue
+            delta = (stats["p50_ms"] - old["p50_ms"]) / max(old["p50_ms"], 1e-9)
+            flag = "  REGRESSION" if delta > tolerance else ""
+            regressed |= bool(flag)
+            print(f"  {resolution:<10}{stage:<12}{old['p50_ms']:>9.2f} -> {stats['p50_ms']:>9.2f} ms ({delta:+.1%}){flag}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-stage latency benchmark.")
+    parser.add_argument("--images", type=int, default=20, help="Images per resolution")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--real-models", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.real_models:
+        from metervision.pipeline.predictor import MeterVisionPipeline
+
+        pipeline = MeterVisionPipeline()
+    else:
+        pipeline = build_stub_pipeline()
+
+    # warm-up: allocator and kernel initialization are not part of the numbers
+    warm = synthetic_meter_image(640, 480)
+    pipeline.predict_batch(images=[warm, warm])
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "models": "real" if args.real_models else "stub",
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "cpu_count": os.cpu_count(),
+            "images_per_resolution": args.images,
+        },
+        "stages": {},
+        "throughput": {},
+    }
+
+    for width, height in RESOLUTIONS:
+        resolution = f"{width}x{height}"
+        images = [
+            synthetic_meter_image(width, height, reading=f"{seed:07d}", seed=seed)
+            for seed in range(args.images)
+        ]
+        payloads = [encode_jpeg(img) for img in images]
+
+        results["stages"][resolution] = time_stages(pipeline, payloads)
+        results["throughput"][resolution] = time_throughput(
+            pipeline, images, args.batch_sizes, args.threads
+        )
+
+        e2e = results["stages"][resolution]["end_to_end"]
+        print(f"{resolution:<10} end-to-end p50 {e2e['p50_ms']:.2f} ms, p99 {e2e['p99_ms']:.2f} ms")
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    print(f"peak RSS {results['peak_rss_mb']} MB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
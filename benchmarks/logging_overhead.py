@@ -0,0 +1,111 @@
+"""
+Micro-benchmark: per-request logging overhead, synchronous vs background writer.
+
+Emits the ~10 INFO lines a single prediction used to log (decode, display / reading
+detection, ROI extraction, OCR) and reports the time the *calling* thread spends
+logging per request, for:
+- sync    : the previous setup, root logger with a FileHandler + StreamHandler
+- queued  : `configure_logging` (QueueHandler + background writer), no sampling
+- sampled : `configure_logging` with this module as a hot-path module
+
+Console output goes to os.devnull and files to a temporary folder, so the numbers
+are the logging cost, not the terminal's.
+
+Usage:
+    python benchmarks/logging_overhead.py --requests 5000
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from metervision.logger.logs import (DEFAULT_SETTINGS, configure_logging,
+                                     logging_format, stop_logging)
+
+MODULE = os.path.splitext(os.path.basename(__file__))[0]
+
+
+def log_one_request(i: int) -> None:
+    """The INFO lines one prediction produced before sampling."""
+    logging.info("Image Converted into Numpy Array")
+    logging.info("Finding Display Bounding Box")
+    logging.info(f"Display Bounding Box Found Successfully (time {0.012 + i % 7 / 1000}s)")
+    logging.info("Trying to Extract Display ROI")
+    logging.info("Display ROI Extraction Completed Successfully")
+    logging.info("Finding Reading Bounding Box")
+    logging.info(f"Reading Bounding Box Found Successfully (time {0.009 + i % 5 / 1000}s)")
+    logging.info("Trying to Extract Reading ROI")
+    logging.info("Reading ROI Extraction Completed Successfully")
+    logging.info(f"Reading Extracted Successfully (time {0.05 + i % 3 / 1000}s)")
+
+
+def configure_sync(log_dir: str, console) -> None:
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    formatter = logging.Formatter(logging_format)
+    for handler in (
+        logging.FileHandler(os.path.join(log_dir, "sync.log")),
+        logging.StreamHandler(console),
+    ):
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+
+
+def configure_queued(log_dir: str, console, sampled: bool) -> None:
+    settings = dict(DEFAULT_SETTINGS, console=False, retention_days=0)
+    if sampled:
+        settings["hot_path_modules"] = [MODULE]
+    console_handler = logging.StreamHandler(console)
+    file_handler = logging.FileHandler(os.path.join(log_dir, "queued.log"))
+    configure_logging(settings, log_dir, handlers=[file_handler, console_handler])
+
+
+def run(requests: int) -> float:
+    """Caller-thread seconds per request."""
+    start_time = time.perf_counter()
+    for i in range(requests):
+        log_one_request(i)
+    return (time.perf_counter() - start_time) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-request logging overhead.")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as console:
+        results = {}
+        for name in ("sync", "queued", "sampled"):
+            if name == "sync":
+                configure_sync(log_dir, console)
+            else:
+                configure_queued(log_dir, console, sampled=name == "sampled")
+            run(min(200, args.requests))  # warm-up
+            per_request = run(args.requests)
+
+            drain_start = time.perf_counter()
+            stop_logging()  # waits for the background writer to empty the queue
+            drain = time.perf_counter() - drain_start
+            results[name] = (per_request, drain)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+
+    baseline = results["sync"][0]
+    print(f"{'setup':<8} {'us/request':>11} {'speedup':>8} {'drain (s)':>10}")
+    for name, (per_request, drain) in results.items():
+        print(
+            f"{name:<8} {per_request * 1e6:>11.1f} {baseline / per_request:>7.1f}x "
+            f"{drain:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Parity and latency comparison between TrOCR backends.
+
+Reading crops are produced once with the regular detectors, then recognized by the
+eager PyTorch backend and by every other requested backend. The script reports the
+share of readings that decode identically, and p50/p95 OCR latency per backend.
+It exits with status 1 when parity drops below `--min-parity`, so it can gate an
+ONNX export before it is deployed.
+
+Usage (from the repository root, after `python -m metervision.models.export_onnx`):
+    python benchmarks/ocr_backend_parity.py --images path/to/meter_images --backends onnx
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from metervision.constants import DIR_CONFIG_FILE, PARAMS_CONFIG_FILE
+from metervision.models.ocr_model import TrOCRRecognizer
+from metervision.models.roi_display import DisplayDetector
+from metervision.models.roi_reading import ReadingDetector
+from metervision.utils.file_utils import read_img
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def reading_crops(image_dir: str, limit: int) -> List[np.ndarray]:
+    """Run the two detectors once and return the reading crop of every image."""
+    display_detector = DisplayDetector(
+        model_path=DIR_CONFIG_FILE.display_roi_model,
+        params=PARAMS_CONFIG_FILE.display_roi_resized,
+    )
+    reading_detector = ReadingDetector(
+        model_path=DIR_CONFIG_FILE.reading_roi_model,
+        params=PARAMS_CONFIG_FILE.reading_roi_resized,
+    )
+
+    paths = sorted(
+        p for p in Path(image_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )[:limit]
+    images = [read_img(str(p)) for p in paths]
+    displays = display_detector.extract_display_roi_batch(images=images)
+    return reading_detector.extract_reading_roi_batch(images=displays)
+
+
+def run_backend(backend: str, crops: List[np.ndarray]) -> Dict[str, object]:
+    recognizer = TrOCRRecognizer(
+        model_source=DIR_CONFIG_FILE.trocr_model,
+        backend=backend,
+        onnx_source=DIR_CONFIG_FILE.trocr_onnx_model,
+    )
+    recognizer.recognize_reading(image=crops[0])  # warm-up
+
+    readings, latencies = [], []
+    for crop in crops:
+        start_time = time.perf_counter()
+        readings.append(recognizer.recognize_reading(image=crop))
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+    return {
+        "readings": readings,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare TrOCR backends.")
+    parser.add_argument("--images", required=True, help="Folder of meter images")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--backends", nargs="+", default=["onnx"])
+    parser.add_argument("--min-parity", type=float, default=0.99)
+    args = parser.parse_args()
+
+    crops = reading_crops(args.images, args.limit)
+    if not crops:
+        raise SystemExit(f"No images found in {args.images}")
+
+    reference = run_backend("torch", crops)
+    print(f"{len(crops)} reading crops")
+    print(f"{'backend':<10}{'parity':>8}{'p50 ms':>10}{'p95 ms':>10}{'speed-up':>10}")
+    print(f"{'torch':<10}{1.0:>8.3f}{reference['p50']:>10.1f}{reference['p95']:>10.1f}{1.0:>10.2f}")
+
+    failed = False
+    for backend in args.backends:
+        result = run_backend(backend, crops)
+        matches = sum(
+            a == b for a, b in zip(reference["readings"], result["readings"])
+        )
+        parity = matches / len(crops)
+        speed_up = reference["p50"] / max(result["p50"], 1e-9)
+        print(
+            f"{backend:<10}{parity:>8.3f}{result['p50']:>10.1f}"
+            f"{result['p95']:>10.1f}{speed_up:>10.2f}"
+        )
+
+        for i, (a, b) in enumerate(zip(reference["readings"], result["readings"])):
+            if a != b:
+                print(f"  mismatch #{i}: torch={a!r} {backend}={b!r}")
+        failed |= parity < args.min_parity
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Parity and speed check: `TrOCRPixelPreprocessor` vs `TrOCRProcessor` preprocessing.
+
+Builds reading crops (synthetic digit crops at `reading_roi_resized`, a few odd
+sizes, and optionally crops resized from a folder of images), runs both the
+processor and the vectorized fast path, and reports:
+- max / mean absolute difference of `pixel_values` and the share of values that
+  differ by more than one 8-bit level;
+- preprocessing time per batch for a few batch sizes.
+
+Exits with status 1 when the max difference exceeds `--atol`, so it can gate a
+processor or transformers upgrade.
+
+Usage:
+    python benchmarks/ocr_preprocessing_parity.py --stub
+    python benchmarks/ocr_preprocessing_parity.py --model "custom models/ocr_model" --images path/to/crops
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+from metervision.constants import DIR_CONFIG_FILE, PARAMS_CONFIG_FILE
+from metervision.models.ocr_preprocessing import TrOCRPixelPreprocessor
+from metervision.utils.file_utils import read_img
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+BATCH_SIZES = (1, 8, 32)
+
+
+def synthetic_crop(rng: np.random.Generator, width: int, height: int) -> np.ndarray:
+    """A noisy LCD-like crop with a random digit string."""
+    background = rng.integers(140, 220)
+    crop = np.full((height, width, 3), background, dtype=np.uint8)
+    crop[:] = np.clip(
+        crop + np.linspace(-25, 25, width)[None, :, None], 0, 255
+    ).astype(np.uint8)
+    digits = "".join(str(d) for d in rng.integers(0, 10, rng.integers(4, 9)))
+    cv2.putText(
+        crop,
+        digits,
+        (int(width * 0.05), int(height * 0.75)),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        height / 45,
+        (20, 20, 20),
+        max(1, height // 30),
+        cv2.LINE_AA,
+    )
+    noise = rng.normal(0, 6, crop.shape)
+    return np.clip(crop + noise, 0, 255).astype(np.uint8)
+
+
+def build_crops(args) -> List[np.ndarray]:
+    rng = np.random.default_rng(0)
+    params = PARAMS_CONFIG_FILE.reading_roi_resized
+    size = (params.resized_width, params.resized_height)
+    crops = [synthetic_crop(rng, *size) for _ in range(args.crops)]
+    crops += [synthetic_crop(rng, w, h) for w, h in ((384, 384), (123, 57), (1024, 300))]
+
+    if args.images:
+        paths = sorted(
+            p for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+        )[: args.crops]
+        crops += [
+            cv2.resize(read_img(str(p)), size, interpolation=cv2.INTER_CUBIC) for p in paths
+        ]
+    return crops
+
+
+def load_processor(args):
+    if args.stub:
+        from stub_models import StubTrOCRProcessor
+
+        return StubTrOCRProcessor()
+
+    from transformers import TrOCRProcessor
+
+    return TrOCRProcessor.from_pretrained(args.model)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR preprocessing parity check.")
+    parser.add_argument("--model", default=DIR_CONFIG_FILE.trocr_model)
+    parser.add_argument("--stub", action="store_true", help="Use the offline stub processor")
+    parser.add_argument("--images", default=None, help="Optional folder of images/crops")
+    parser.add_argument("--crops", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument(
+        "--atol", type=float, default=0.02, help="Max |diff| (1 level = 2/255 at std 0.5)"
+    )
+    args = parser.parse_args()
+
+    processor = load_processor(args)
+    preprocessor = TrOCRPixelPreprocessor(processor)
+    if not preprocessor.enabled:
+        print("Fast path not applicable to this processor config (fallback to processor).")
+        return
+    crops = build_crops(args)
+
+    reference = processor(images=crops, return_tensors="pt").pixel_values
+    fast = preprocessor(crops)
+    diff = (reference - fast).abs()
+    level = float(preprocessor.scale.max()) + 1e-6  # one 8-bit level, normalized
+    max_diff = float(diff.max())
+
+    print(f"crops: {len(crops)}, pixel_values: {tuple(fast.shape)}")
+    print(f"max |diff|   : {max_diff:.5f}")
+    print(f"mean |diff|  : {float(diff.mean()):.6f}")
+    print(f"> 1 level    : {float((diff > level).float().mean()) * 100:.4f}%")
+
+    print(f"\n{'batch':>5} {'processor ms':>13} {'fast ms':>9} {'speedup':>8}")
+    typical = crops[: args.crops] or crops
+    for batch_size in BATCH_SIZES:
+        batch = (typical * batch_size)[:batch_size]
+        slow_s = timeit.timeit(
+            lambda: processor(images=batch, return_tensors="pt"), number=args.repeats
+        )
+        fast_s = timeit.timeit(lambda: preprocessor(batch), number=args.repeats)
+        print(
+            f"{batch_size:>5} {slow_s / args.repeats * 1000:>13.2f} "
+            f"{fast_s / args.repeats * 1000:>9.2f} {slow_s / fast_s:>7.1f}x"
+        )
+
+    if max_diff > args.atol:
+        print(f"\nParity FAILED: max |diff| {max_diff:.5f} > {args.atol}")
+        sys.exit(1)
+    print("\nParity OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Throughput benchmark: `MeterVisionPipeline.predict` vs `predict_batch`.
+
+Runs the same set of meter images through the one-image-at-a-time path and through
+the batched path for every requested batch size, and prints images/second and the
+speed-up over the sequential baseline.
+
+Usage (from the repository root, so the config paths resolve):
+    python benchmarks/predict_batch_benchmark.py --images path/to/meter_images --batch-sizes 1 2 4 8 16
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from metervision.pipeline.predictor import MeterVisionPipeline
+from metervision.utils.file_utils import read_img
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def load_images(image_dir: str, limit: int) -> List[np.ndarray]:
+    """Decode up to `limit` images from `image_dir` (sorted by name)."""
+    paths = sorted(
+        p for p in Path(image_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )[:limit]
+    return [read_img(str(p)) for p in paths]
+
+
+def time_sequential(pipeline: MeterVisionPipeline, images: List[np.ndarray]) -> float:
+    start_time = time.perf_counter()
+    for image in images:
+        pipeline.predict(image=image)
+    return time.perf_counter() - start_time
+
+
+def time_batched(
+    pipeline: MeterVisionPipeline, images: List[np.ndarray], batch_size: int
+) -> float:
+    start_time = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        pipeline.predict_batch(images=images[i : i + batch_size])
+    return time.perf_counter() - start_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", required=True, help="Folder of meter images")
+    parser.add_argument("--limit", type=int, default=64, help="Max images to use")
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32]
+    )
+    parser.add_argument("--repeats", type=int, default=3, help="Best-of-N timing")
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.limit)
+    if not images:
+        raise SystemExit(f"No images found in {args.images}")
+
+    pipeline = MeterVisionPipeline()
+
+    # Warm-up so allocator / kernel initialization is not charged to the first row
+    pipeline.predict_batch(images=images[:2])
+
+    baseline = min(time_sequential(pipeline, images) for _ in range(args.repeats))
+    baseline_ips = len(images) / baseline
+
+    print(f"{len(images)} images, best of {args.repeats}")
+    print(f"{'mode':<12}{'batch':>6}{'img/s':>10}{'speed-up':>10}")
+    print(f"{'predict':<12}{1:>6}{baseline_ips:>10.2f}{1.0:>10.2f}")
+
+    for batch_size in args.batch_sizes:
+        elapsed = min(
+            time_batched(pipeline, images, batch_size) for _ in range(args.repeats)
+        )
+        ips = len(images) / elapsed
+        print(
+            f"{'batch':<12}{batch_size:>6}{ips:>10.2f}{ips / baseline_ips:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
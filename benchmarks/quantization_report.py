@@ -0,0 +1,105 @@
+"""
+fp32 vs INT8 report: exact-match reading accuracy, latency and resident memory.
+
+The labeled folder must contain the meter images and a `labels.csv` file with the
+columns `image,reading` (image = file name relative to the folder). Each precision
+runs in its own fresh process so resident memory is not shared between them.
+
+Usage (from the repository root, after `python -m metervision.models.quantization`):
+    python benchmarks/quantization_report.py --labeled path/to/labeled_folder --json report.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+import psutil
+
+
+def load_labels(labeled_dir: str) -> List[Dict[str, str]]:
+    with open(os.path.join(labeled_dir, "labels.csv"), newline="", encoding="utf-8") as f:
+        return [
+            {"image": row["image"], "reading": row["reading"].strip()}
+            for row in csv.DictReader(f)
+        ]
+
+
+def normalize(reading: str) -> str:
+    return "".join(str(reading).split())
+
+
+def evaluate(precision: str, labeled_dir: str, limit: int) -> Dict[str, float]:
+    """Load the pipeline at `precision` and score it (runs in a child process)."""
+    from metervision.pipeline.predictor import MeterVisionPipeline
+    from metervision.utils.file_utils import read_img
+
+    process = psutil.Process()
+    labels = load_labels(labeled_dir)[:limit]
+
+    start_time = time.perf_counter()
+    pipeline = MeterVisionPipeline(quantization=precision)
+    load_seconds = time.perf_counter() - start_time
+    rss_loaded = process.memory_info().rss
+
+    images = [read_img(os.path.join(labeled_dir, row["image"])) for row in labels]
+    pipeline.predict(image=images[0])  # warm-up
+
+    latencies, correct, peak_rss = [], 0, rss_loaded
+    for image, row in zip(images, labels):
+        start_time = time.perf_counter()
+        _, _, reading = pipeline.predict(image=image)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+        correct += normalize(reading) == normalize(row["reading"])
+        peak_rss = max(peak_rss, process.memory_info().rss)
+
+    return {
+        "precision": precision,
+        "images": len(labels),
+        "exact_match": correct / len(labels),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "load_s": load_seconds,
+        "rss_loaded_mb": rss_loaded / 2**20,
+        "rss_peak_mb": peak_rss / 2**20,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare fp32 and INT8 models.")
+    parser.add_argument("--labeled", required=True, help="Folder with labels.csv")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "int8"])
+    parser.add_argument("--json", default=None, help="Also write the report here")
+    args = parser.parse_args()
+
+    report = []
+    for precision in args.precisions:
+        # fresh process per precision -> clean RSS numbers
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            report.append(
+                executor.submit(evaluate, precision, args.labeled, args.limit).result()
+            )
+
+    columns = ["precision", "exact_match", "p50_ms", "p95_ms", "rss_loaded_mb", "rss_peak_mb"]
+    print("".join(f"{c:>14}" for c in columns))
+    for row in report:
+        print(
+            "".join(
+                f"{row[c]:>14.3f}" if isinstance(row[c], float) else f"{row[c]:>14}"
+                for c in columns
+            )
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-process unique vs shared memory with private vs memory-mapped model weights.
+
+Starts N processes that each build `MeterVisionPipeline` (with the real models),
+waits until all of them are loaded, and prints every process' RSS, USS (unique),
+PSS (proportional share) and shared memory, first with the regular loaders and then
+with the mmap'd safetensors weights (converted first if needed).
+
+Summed PSS is the real memory cost of the N replicas; with shared weights it should
+grow by roughly the non-weight memory per extra process instead of a full copy.
+
+Usage (from the repository root, Linux for PSS/shared):
+    python benchmarks/shared_weights_memory.py --processes 4
+"""
+
+import argparse
+import multiprocessing as mp
+from typing import Dict, List
+
+from metervision.models.shared_weights import convert_model_weights, memory_report
+
+
+def replica(shared: bool, barrier, results, done) -> None:
+    from metervision.pipeline.predictor import MeterVisionPipeline
+
+    pipeline = MeterVisionPipeline(shared_weights=shared, warmup=True)
+    barrier.wait()  # measure only once every process holds its models
+    results.put(memory_report())
+    done.wait()
+    del pipeline
+
+
+def measure(processes: int, shared: bool) -> List[Dict]:
+    context = mp.get_context("spawn")
+    barrier = context.Barrier(processes)
+    done = context.Event()
+    results = context.Queue()
+    workers = [
+        context.Process(target=replica, args=(shared, barrier, results, done))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    reports = [results.get() for _ in workers]
+    done.set()
+    for worker in workers:
+        worker.join()
+    return reports
+
+
+def print_reports(label: str, reports: List[Dict]) -> None:
+    print(f"\n{label}")
+    print(f"{'pid':>8}{'rss MB':>10}{'uss MB':>10}{'pss MB':>10}{'shared MB':>11}")
+    for r in reports:
+        cells = [r.get(k) or 0.0 for k in ("rss_mb", "uss_mb", "pss_mb", "shared_mb")]
+        print(f"{r['pid']:>8}" + "".join(f"{c:>10.1f}" for c in cells[:3]) + f"{cells[3]:>11.1f}")
+    total_pss = sum(r.get("pss_mb") or 0.0 for r in reports)
+    total_uss = sum(r.get("uss_mb") or 0.0 for r in reports)
+    print(f"{'total':>8}{'':>10}{total_uss:>10.1f}{total_pss:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared-weights memory report.")
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    convert_model_weights()
+    print_reports("private weights (torch.load / from_pretrained)", measure(args.processes, False))
+    print_reports("shared weights (mmap'd safetensors)", measure(args.processes, True))
+
+
+if __name__ == "__main__":
+    main()
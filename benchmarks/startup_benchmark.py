@@ -0,0 +1,73 @@
+"""
+Cold-start benchmark: import time of the pipeline module and model loading time.
+
+Each measurement runs in a fresh interpreter so nothing is already imported or cached
+in-process. Reports:
+- `import metervision.pipeline.predictor` (should no longer pull torch / ultralytics),
+- `MeterVisionPipeline()` with sequential vs parallel model loading, broken down into
+  import, per-model load, warm-up and total (`startup_timings`).
+
+Needs the real model weights. Usage (from the repository root):
+    python benchmarks/startup_benchmark.py --runs 3
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import metervision.pipeline.predictor
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("torch", "transformers", "ultralytics") if m in sys.modules]
+print(json.dumps({"import": elapsed, "heavy_modules": heavy}))
+"""
+
+LOAD_SNIPPET = """
+import json, time
+start = time.perf_counter()
+from metervision.pipeline.predictor import MeterVisionPipeline
+pipeline = MeterVisionPipeline(parallel_load={parallel}, warmup={warmup})
+timings = dict(pipeline.startup_timings)
+timings["process_total"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def run_snippet(snippet: str) -> Dict:
+    output = subprocess.check_output([sys.executable, "-c", snippet], text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(label: str, runs: List[Dict]) -> None:
+    keys = [k for k in runs[0] if isinstance(runs[0][k], float)]
+    cells = ", ".join(f"{k} {np.median([r[k] for r in runs]):.3f}s" for k in keys)
+    print(f"{label:<22}{cells}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pipeline cold-start benchmark.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per mode")
+    parser.add_argument("--no-warmup", action="store_true")
+    args = parser.parse_args()
+
+    imports = [run_snippet(IMPORT_SNIPPET) for _ in range(args.runs)]
+    summarize("module import", imports)
+    print(f"{'':<22}heavy modules imported: {imports[0]['heavy_modules'] or 'none'}")
+
+    warmup = not args.no_warmup
+    for parallel in (False, True):
+        runs = [
+            run_snippet(LOAD_SNIPPET.format(parallel=parallel, warmup=warmup))
+            for _ in range(args.runs)
+        ]
+        summarize("parallel load" if parallel else "sequential load", runs)
+
+
+if __name__ == "__main__":
+    main()
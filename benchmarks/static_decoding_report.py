@@ -0,0 +1,124 @@
+"""
+Latency report: eager `model.generate` vs static-KV-cache (compiled) greedy decoding.
+
+Both paths decode the same pixel batches with the same generate settings. The
+report gives, per batch size:
+- per-reading latency (p50 / p95 of batch time / batch size),
+- per-token latency (batch time / decode steps),
+- whether the two paths produced identical token ids.
+
+Startup cost (compile + verification in `StaticCacheGenerator.warmup`) is reported
+separately, since it is paid once per process.
+
+Usage:
+    python benchmarks/static_decoding_report.py --stub
+    python benchmarks/static_decoding_report.py --model "custom models/ocr_model" --no-compile
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+import torch
+
+from metervision.constants import DIR_CONFIG_FILE, PARAMS_CONFIG_FILE
+from metervision.models.static_generation import StaticCacheGenerator
+
+
+def load_model(args):
+    """(model, generate kwargs) of the real TrOCR model or of the offline stub."""
+    if args.stub:
+        from stub_models import READING_TOKENS, stub_trocr_model
+
+        kwargs = {
+            "max_new_tokens": READING_TOKENS,
+            "min_new_tokens": READING_TOKENS,
+            "num_beams": 1,
+            "do_sample": False,
+        }
+        return stub_trocr_model(), kwargs
+
+    from transformers import VisionEncoderDecoderModel
+
+    model = VisionEncoderDecoderModel.from_pretrained(args.model).eval()
+    kwargs = {"max_new_tokens": args.max_new_tokens, "num_beams": 1, "do_sample": False}
+    return model, kwargs
+
+
+def time_path(fn, pixel_values: torch.Tensor, repeats: int) -> Dict[str, object]:
+    fn(pixel_values)  # warm-up (and compile for this batch size)
+    latencies: List[float] = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        ids = fn(pixel_values)
+        latencies.append(time.perf_counter() - start_time)
+    return {"ids": ids, "latencies": np.array(latencies), "steps": ids.shape[1] - 1}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Static KV-cache decoding latency report.")
+    parser.add_argument("--model", default=DIR_CONFIG_FILE.trocr_model)
+    parser.add_argument("--stub", action="store_true", help="Use the offline stub model")
+    parser.add_argument(
+        "--max-new-tokens", type=int, default=PARAMS_CONFIG_FILE.static_decoding.max_new_tokens
+    )
+    parser.add_argument("--no-compile", action="store_true")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument(
+        "--threads", type=int, default=PARAMS_CONFIG_FILE.trocr_model.cpu_num_threads
+    )
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model, kwargs = load_model(args)
+
+    start_time = time.perf_counter()
+    generator = StaticCacheGenerator(model, args.max_new_tokens, compile=not args.no_compile)
+    ready = generator.warmup(kwargs, args.batch_sizes)
+    startup = time.perf_counter() - start_time
+    print(
+        f"static decoding: ready={ready}, compiled={generator.compiled}, "
+        f"startup {startup:.2f}s"
+    )
+    if not ready:
+        return
+
+    size = model.config.encoder.image_size
+    rng = torch.Generator().manual_seed(1)
+
+    print(
+        f"\n{'batch':>5} {'path':<7} {'reading p50 ms':>15} {'reading p95 ms':>15} "
+        f"{'token ms':>9} {'speedup':>8} {'same ids':>9}"
+    )
+    for batch_size in args.batch_sizes:
+        pixel_values = torch.rand((batch_size, 3, size, size), generator=rng) * 2 - 1
+
+        def eager(pv):
+            with torch.inference_mode():
+                return model.generate(pv, **kwargs)
+
+        results = {
+            "eager": time_path(eager, pixel_values, args.repeats),
+            "static": time_path(
+                lambda pv: generator.generate(pv, kwargs), pixel_values, args.repeats
+            ),
+        }
+        same = torch.equal(results["eager"]["ids"], results["static"]["ids"])
+        eager_p50 = np.percentile(results["eager"]["latencies"], 50)
+
+        for name, result in results.items():
+            latencies = result["latencies"]
+            p50, p95 = np.percentile(latencies, 50), np.percentile(latencies, 95)
+            per_token = p50 / max(1, result["steps"])
+            print(
+                f"{batch_size:>5} {name:<7} {p50 / batch_size * 1000:>15.2f} "
+                f"{p95 / batch_size * 1000:>15.2f} {per_token * 1000:>9.3f} "
+                f"{eager_p50 / p50:>7.2f}x {str(same):>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
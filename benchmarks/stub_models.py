@@ -0,0 +1,230 @@
+"""
+Offline stand-ins for the MeterVision models, for benchmarking without weights or GPU.
+
+- `StubYOLO`: a tiny randomly initialized conv net run on the letterboxed 640x640
+  input (so pre-processing and a forward pass are really paid for), returning
+  Ultralytics-shaped results with a fixed box taken from the synthetic layout.
+- A tiny randomly initialized `VisionEncoderDecoderModel` (ViT encoder + TrOCR
+  decoder) built from configs, decoding a fixed number of tokens per reading.
+- `synthetic_meter_image`: a noisy photo-like image with a dark display and digits.
+
+`build_stub_pipeline()` assembles a real `MeterVisionPipeline` (real pre/post
+processing, crops and batching code) around these stubs, without touching disk.
+"""
+
+from types import SimpleNamespace
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from metervision.constants import PARAMS_CONFIG_FILE
+from metervision.models.ocr_backends import TorchOCRBackend
+from metervision.models.ocr_model import TrOCRRecognizer
+from metervision.models.roi_display import DisplayDetector
+from metervision.models.roi_reading import ReadingDetector
+from metervision.pipeline.predictor import MeterVisionPipeline
+
+# Relative (x1, y1, x2, y2) of the display in a synthetic photo, and of the reading
+# inside the display crop
+DISPLAY_BOX = (0.25, 0.35, 0.75, 0.6)
+READING_BOX = (0.1, 0.2, 0.9, 0.8)
+READING_TOKENS = 8
+
+
+def synthetic_meter_image(
+    width: int, height: int, reading: str = "0123456", seed: int = 0
+) -> np.ndarray:
+    """RGB uint8 image with a display rectangle (DISPLAY_BOX) showing `reading`."""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(90, 170, (height, width, 3), dtype=np.uint8)
+
+    x1, y1, x2, y2 = (
+        int(DISPLAY_BOX[0] * width),
+        int(DISPLAY_BOX[1] * height),
+        int(DISPLAY_BOX[2] * width),
+        int(DISPLAY_BOX[3] * height),
+    )
+    cv2.rectangle(img, (x1, y1), (x2, y2), (30, 40, 30), thickness=-1)
+    scale = (y2 - y1) / 50
+    cv2.putText(
+        img,
+        reading,
+        (x1 + (x2 - x1) // 10, y2 - (y2 - y1) // 3),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        scale,
+        (200, 230, 200),
+        thickness=max(1, int(scale * 2)),
+    )
+    return img
+
+
+class StubBoxes(SimpleNamespace):
+    """`result.boxes` stand-in; iterating yields one single-box `StubBoxes` per box."""
+
+    def __iter__(self):
+        for i in range(len(self.conf)):
+            yield StubBoxes(conf=self.conf[i : i + 1], xyxy=self.xyxy[i : i + 1])
+
+
+class StubYOLO:
+    """
+    Callable mimicking `ultralytics.YOLO(...)(images)` for "obb" or "detect" tasks.
+
+    Parameters
+    ----------
+    task : str
+        "obb" returns `result.obb.xyxyxyxy`, "detect" returns `result.boxes.xyxy`.
+    box : Tuple[float, float, float, float]
+        Relative (x1, y1, x2, y2) box reported for every image.
+    imgsz : int
+        Letterbox size of the forward pass.
+    """
+
+    def __init__(self, task: str, box: Tuple[float, float, float, float], imgsz: int = 640):
+        torch.manual_seed(0)
+        self.task = task
+        self.box = box
+        self.imgsz = imgsz
+        self.net = torch.nn.Sequential(
+            torch.nn.Conv2d(3, 16, 3, stride=2, padding=1),
+            torch.nn.SiLU(),
+            torch.nn.Conv2d(16, 32, 3, stride=2, padding=1),
+            torch.nn.SiLU(),
+            torch.nn.Conv2d(32, 64, 3, stride=2, padding=1),
+            torch.nn.SiLU(),
+            torch.nn.AdaptiveAvgPool2d(1),
+        ).eval()
+
+    def _letterbox(self, img: np.ndarray, imgsz: int) -> np.ndarray:
+        h, w = img.shape[:2]
+        ratio = imgsz / max(h, w)
+        resized = cv2.resize(img, (int(w * ratio), int(h * ratio)))
+        canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+        canvas[: resized.shape[0], : resized.shape[1]] = resized
+        return canvas
+
+    def _result(self, img: np.ndarray) -> SimpleNamespace:
+        h, w = img.shape[:2]
+        x1, y1, x2, y2 = self.box[0] * w, self.box[1] * h, self.box[2] * w, self.box[3] * h
+        conf = torch.tensor([0.9])
+        if self.task == "obb":
+            corners = torch.tensor([[[x1, y1], [x2, y1], [x2, y2], [x1, y2]]])
+            return SimpleNamespace(obb=SimpleNamespace(conf=conf, xyxyxyxy=corners))
+        xyxy = torch.tensor([[x1, y1, x2, y2]])
+        return SimpleNamespace(boxes=StubBoxes(conf=conf, xyxy=xyxy))
+
+    def __call__(self, images, **kwargs) -> List[SimpleNamespace]:
+        images = images if isinstance(images, list) else [images]
+        imgsz = kwargs.get("imgsz") or self.imgsz
+        batch = np.stack([self._letterbox(img, imgsz) for img in images])
+        tensor = torch.from_numpy(batch).permute(0, 3, 1, 2).float() / 255.0
+        with torch.inference_mode():
+            self.net(tensor)
+        return [self._result(img) for img in images]
+
+
+class StubDigitTokenizer:
+    """Maps token ids to digits; ids 0-2 are start/pad/eos."""
+
+    eos_token_id = 2
+
+    def batch_decode(self, sequences, skip_special_tokens: bool = True) -> List[str]:
+        return [
+            "".join(str((int(t) - 3) % 10) for t in seq if int(t) > 2)
+            for seq in sequences
+        ]
+
+
+class StubTrOCRProcessor:
+    """ViT image processor (96x96) + `StubDigitTokenizer`, shaped like TrOCRProcessor."""
+
+    def __init__(self, image_size: int = 96):
+        from transformers import ViTImageProcessor
+
+        self.image_processor = ViTImageProcessor(
+            size={"height": image_size, "width": image_size}
+        )
+        self.tokenizer = StubDigitTokenizer()
+
+    def __call__(self, images, return_tensors: str = "pt"):
+        return self.image_processor(images=images, return_tensors=return_tensors)
+
+    def batch_decode(self, sequences, skip_special_tokens: bool = True) -> List[str]:
+        return self.tokenizer.batch_decode(sequences, skip_special_tokens)
+
+
+def stub_trocr_model(image_size: int = 96):
+    """Tiny random ViT encoder + TrOCR decoder (a few hundred k parameters)."""
+    from transformers import (TrOCRConfig, ViTConfig, VisionEncoderDecoderConfig,
+                              VisionEncoderDecoderModel)
+
+    torch.manual_seed(0)
+    encoder = ViTConfig(
+        image_size=image_size,
+        patch_size=16,
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+    )
+    decoder = TrOCRConfig(
+        vocab_size=16,
+        d_model=64,
+        decoder_layers=2,
+        decoder_attention_heads=2,
+        decoder_ffn_dim=128,
+        max_position_embeddings=64,
+        pad_token_id=1,
+        bos_token_id=0,
+        eos_token_id=2,
+    )
+    config = VisionEncoderDecoderConfig.from_encoder_decoder_configs(encoder, decoder)
+    config.decoder_start_token_id = 0
+    config.pad_token_id = 1
+    config.eos_token_id = 2
+    return VisionEncoderDecoderModel(config=config).eval()
+
+
+def build_stub_pipeline() -> MeterVisionPipeline:
+    """A `MeterVisionPipeline` whose three models are the offline stubs above."""
+    display_detector = DisplayDetector(
+        model_path=None,
+        params=PARAMS_CONFIG_FILE.display_roi_resized,
+        model=StubYOLO("obb", DISPLAY_BOX),
+    )
+    reading_detector = ReadingDetector(
+        model_path=None,
+        params=PARAMS_CONFIG_FILE.reading_roi_resized,
+        model=StubYOLO("detect", READING_BOX),
+    )
+
+    # fixed-length decoding: random weights rarely emit EOS on their own
+    generate_kwargs = {
+        "max_new_tokens": READING_TOKENS,
+        "min_new_tokens": READING_TOKENS,
+        "num_beams": 1,
+        "do_sample": False,
+    }
+    backend = TorchOCRBackend(
+        model_source=None,
+        device=torch.device("cpu"),
+        generate_kwargs=generate_kwargs,
+        model=stub_trocr_model(),
+    )
+    recognizer = TrOCRRecognizer(
+        model_source="stub",
+        generate_kwargs=generate_kwargs,
+        processor=StubTrOCRProcessor(),
+        ocr_backend=backend,
+    )
+
+    return MeterVisionPipeline.from_models(
+        display_detector,
+        reading_detector,
+        recognizer,
+        quantization="fp32",
+        shared_weights=False,
+        warmup=False,
+    )
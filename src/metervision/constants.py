@@ -1,4 +1,8 @@
+import os
+
 from metervision.utils.file_utils import read_yaml
 
-DIR_CONFIG_FILE = read_yaml(r"src\metervision\config\directory_config.yaml")
-PARAMS_CONFIG_FILE = read_yaml(r"src\metervision\config\parameter_config.yaml")
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+
+DIR_CONFIG_FILE = read_yaml(os.path.join(CONFIG_DIR, "directory_config.yaml"))
+PARAMS_CONFIG_FILE = read_yaml(os.path.join(CONFIG_DIR, "parameter_config.yaml"))
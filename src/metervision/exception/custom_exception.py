@@ -4,7 +4,7 @@ from metervision.logger.logs import logging
 
 
 def cutome_error_message(error: str, error_details: sys):
-    _, _, exc_tb = error_details.exc_info()
+    _, exc_value, exc_tb = error_details.exc_info()
 
     file_name = exc_tb.tb_frame.f_code.co_filename
     line_number = exc_tb.tb_lineno
@@ -16,7 +16,9 @@ def cutome_error_message(error: str, error_details: sys):
         )
     )
 
-    logging.error(error_message)
+    # re-wrapping a CustomException: it was already logged where it was raised
+    if not isinstance(exc_value, CustomException):
+        logging.error(error_message)
     return error_message
 
 
@@ -1,16 +1,318 @@
+"""
+Logging setup for MeterVision: a background writer so requests never wait on disk.
+
+Every module logs through the root logger (`from metervision.logger.logs import
+logging`). Records are put on an in-memory queue by a `QueueHandler`; a
+`QueueListener` thread formats them and writes them to the console and to the
+daily log file.
+
+Features:
+- Date-rotating files: logs/<mm_dd_yyyy>/<mm_dd_yyyy>.log, switched at midnight
+  without renaming, so several processes (bulk workers, replicas) can share it.
+- Retention is opt-in and never runs on import: `metervision-prune-logs` (or
+  `prune_old_logs`) removes folders older than `retention_days` (0 keeps everything).
+- Forked children (e.g. bulk `ProcessPoolExecutor` workers) get a fresh queue and
+  writer thread: the parent's writer thread does not survive `fork`.
+- Per-module levels (`module_levels`, keyed by module name, e.g. roi_display: WARNING)
+  on top of the global `level`.
+- Hot-path sampling: INFO/DEBUG records from `hot_path_modules` are rate-limited per
+  call site to one every `hot_path_interval_s` seconds; the next emitted line tells
+  how many were suppressed. Warnings and errors are never sampled.
+
+Settings come from the `logging` section of parameter_config.yaml (read directly:
+the config loader itself logs through this module).
+"""
+
+import argparse
+import atexit
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
 
 logging_format = "[%(asctime)s]: %(levelname)s: %(module)s : %(message)s"
-LOG_FILE = f"{datetime.now().strftime("%m_%d_%Y")}"
-log_path = os.path.join(os.getcwd(), "logs", LOG_FILE)
+LOG_DATE_FORMAT = "%m_%d_%Y"
+LOG_DIR = os.path.join(os.getcwd(), "logs")
+LOG_FILE = f"{datetime.now().strftime(LOG_DATE_FORMAT)}"
+log_path = os.path.join(LOG_DIR, LOG_FILE)
 os.makedirs(log_path, exist_ok=True)
 
 LOG_FILE_PATH = os.path.join(log_path, f"{LOG_FILE}.log")
 
-logging.basicConfig(
-    format=logging_format,
-    level=logging.INFO,
-    handlers=[logging.StreamHandler(), logging.FileHandler(filename=LOG_FILE_PATH)],
+PARAMS_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "config",
+    "parameter_config.yaml",
 )
+
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "level": "INFO",
+    "module_levels": {},
+    "console": True,
+    "retention_days": 0,
+    "hot_path_modules": [],
+    "hot_path_interval_s": 10.0,
+    "queue_size": 10000,
+}
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Handlers & filters
+# ------------------------------------------------------------------------------------------------------------------
+
+
+class DailyFileHandler(logging.FileHandler):
+    """Append to logs/<date>/<date>.log, moving to a new file when the date changes."""
+
+    def __init__(self, log_dir: str, encoding: str = "utf-8"):
+        self.log_dir = log_dir
+        self.current_date = datetime.now().strftime(LOG_DATE_FORMAT)
+        super().__init__(self._path_for(self.current_date), encoding=encoding, delay=True)
+
+    def _path_for(self, date: str) -> str:
+        folder = os.path.join(self.log_dir, date)
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f"{date}.log")
+
+    def emit(self, record: logging.LogRecord) -> None:
+        date = datetime.fromtimestamp(record.created).strftime(LOG_DATE_FORMAT)
+        if date != self.current_date:
+            self.acquire()
+            try:
+                self.close()
+                self.current_date = date
+                self.baseFilename = self._path_for(date)
+            finally:
+                self.release()
+        super().emit(record)
+
+
+def prune_old_logs(log_dir: str, retention_days: int) -> None:
+    """Delete dated log folders older than `retention_days` (0 keeps everything)."""
+    if retention_days <= 0 or not os.path.isdir(log_dir):
+        return
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    for name in os.listdir(log_dir):
+        try:
+            folder_date = datetime.strptime(name, LOG_DATE_FORMAT)
+        except ValueError:
+            continue
+        if folder_date < cutoff:
+            shutil.rmtree(os.path.join(log_dir, name), ignore_errors=True)
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Drop records below their module's level (`module_levels`), else below `level`."""
+
+    def __init__(self, level: int, module_levels: Dict[str, int]):
+        super().__init__()
+        self.level = level
+        self.module_levels = module_levels
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.module_levels.get(record.module, self.level)
+
+
+class HotPathSampler(logging.Filter):
+    """
+    Rate-limit INFO/DEBUG records of hot-path modules per call site.
+
+    At most one record per (file, line) goes through every `interval_s` seconds;
+    the number of records suppressed since is appended to it.
+    """
+
+    def __init__(self, modules: Iterable[str], interval_s: float):
+        super().__init__()
+        self.modules = frozenset(modules)
+        self.interval_s = interval_s
+        self._sites: Dict[Tuple[str, int], list] = {}  # site -> [last emit time, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or record.module not in self.modules:
+            return True
+
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            state = self._sites.setdefault(site, [float("-inf"), 0])
+            if record.created - state[0] < self.interval_s:
+                state[1] += 1
+                return False
+            suppressed, state[0], state[1] = state[1], record.created, 0
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} [{suppressed} similar suppressed]"
+            record.args = None
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    In-process queue handler: formatting is left to the writer thread, and records
+    are dropped (and counted) when the queue is full instead of blocking.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # only bind the arguments now (they may change later); the stock handler also
+        # formats the whole line (timestamp, traceback) here, on the caller's thread
+        if record.args:
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BackgroundWriter(logging.handlers.QueueListener):
+    """Queue listener whose stop waits for room in a full queue (flushing everything)."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Configuration
+# ------------------------------------------------------------------------------------------------------------------
+
+_listener: Optional[BackgroundWriter] = None
+_configuration: Dict[str, Any] = {}
+
+
+def load_settings(config_path: str = PARAMS_CONFIG_PATH) -> Dict[str, Any]:
+    """The `logging` section of parameter_config.yaml merged over the defaults."""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            settings.update((yaml.safe_load(f) or {}).get("logging") or {})
+    except OSError:
+        pass
+    return settings
+
+
+def _level_number(name: Any, fallback: int, invalid: List[str]) -> int:
+    """Numeric level of a name like "warning"; `fallback` (noted in `invalid`) if unknown."""
+    level = logging.getLevelName(str(name).upper())
+    if isinstance(level, int):
+        return level
+    invalid.append(str(name))
+    return fallback
+
+
+def stop_logging() -> None:
+    """Flush the queue and stop the background writer (registered with atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def configure_logging(
+    settings: Optional[Dict[str, Any]] = None,
+    log_dir: str = LOG_DIR,
+    handlers: Optional[Iterable[logging.Handler]] = None,
+) -> BackgroundWriter:
+    """
+    (Re)configure the root logger with a queue handler and a background writer.
+
+    Parameters
+    ----------
+    settings : Optional[Dict[str, Any]]
+        Logging settings; defaults to `load_settings()`.
+    log_dir : str
+        Root of the dated log folders.
+    handlers : Optional[Iterable[Handler]]
+        Output handlers of the writer thread; defaults to console + daily file.
+
+    Returns
+    -------
+    BackgroundWriter
+        The started background writer.
+    """
+    global _listener
+    stop_logging()
+
+    settings = {**DEFAULT_SETTINGS, **(settings or load_settings())}
+    # a typo in the config must not break `import metervision`: unknown names fall
+    # back (to INFO, or to the global level for modules) and are reported below
+    invalid: List[str] = []
+    level = _level_number(settings["level"], logging.INFO, invalid)
+    module_levels = {
+        module: _level_number(value, level, invalid)
+        for module, value in (settings["module_levels"] or {}).items()
+    }
+
+    _configuration.update(settings=settings, log_dir=log_dir)
+    if handlers is None:
+        handlers = [DailyFileHandler(log_dir)]
+        if settings["console"]:
+            handlers.append(logging.StreamHandler())
+    handlers = list(handlers)
+    formatter = logging.Formatter(logging_format)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # records are only created for the lowest level anyone asked for
+    root = logging.getLogger()
+    root.setLevel(min([level, *module_levels.values()]))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(int(settings["queue_size"])))
+    queue_handler.addFilter(ModuleLevelFilter(level, module_levels))
+    queue_handler.addFilter(
+        HotPathSampler(settings["hot_path_modules"] or [], float(settings["hot_path_interval_s"]))
+    )
+    root.addHandler(queue_handler)
+
+    _listener = BackgroundWriter(queue_handler.queue, *handlers)
+    _listener.start()
+    if invalid:
+        logging.getLogger(__name__).warning(
+            f"Unknown logging level(s) {invalid} in the config; using the fallback level"
+        )
+    return _listener
+
+
+def _restart_after_fork() -> None:
+    """In a forked child: the writer thread was not copied, so start a new one."""
+    global _listener
+    if _listener is None:
+        return
+    handlers = _listener.handlers
+    _listener = None  # the copied listener has no thread to stop
+    configure_logging(_configuration["settings"], _configuration["log_dir"], handlers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete old dated log folders.")
+    parser.add_argument("--log-dir", default=LOG_DIR)
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=None,
+        help="Keep this many days (default: logging.retention_days)",
+    )
+    args = parser.parse_args()
+    days = args.days if args.days is not None else int(load_settings()["retention_days"])
+    if days <= 0:
+        raise SystemExit("Nothing to prune: retention is 0 days (keep everything)")
+    prune_old_logs(args.log_dir, days)
+
+
+configure_logging()
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,180 @@
+"""
+Reading-specific decoding for TrOCR.
+
+A meter reading is a short string of digits with at most one decimal point, so the
+generic decoding (`max_length=128`, full vocabulary) wastes decode steps and can emit
+characters that need cleaning afterwards. This module builds, once per tokenizer:
+
+- an allow-list of tokens made only of digits (and optionally "." / ","), plus EOS,
+- the number of digits carried by each allowed token,
+
+and a `ReadingLogitsProcessor` that masks every other token at each step, allows a
+single decimal separator, and forces EOS as soon as the expected digit count is
+reached (early termination). Combined with `max_new_tokens` this bounds the number
+of decoder steps per reading.
+
+Profiles are configured per meter type under `reading_decoding` in
+parameter_config.yaml; mode "free" keeps the original unrestricted decoding.
+"""
+
+import sys
+from typing import Any, Dict, Optional
+
+import torch
+from transformers import LogitsProcessor, LogitsProcessorList
+
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+
+DECIMAL_SEPARATORS = ".,"
+
+
+class ReadingVocabulary:
+    """
+    Token masks of a tokenizer restricted to digits / decimal separators.
+
+    Parameters
+    ----------
+    tokenizer : PreTrainedTokenizer
+        The TrOCR processor's tokenizer.
+    allow_decimal : bool
+        Whether tokens containing "." or "," are allowed.
+    """
+
+    def __init__(self, tokenizer, allow_decimal: bool = True):
+        try:
+            vocab_size = len(tokenizer)
+            self.eos_token_id = tokenizer.eos_token_id
+            self.allowed = torch.zeros(vocab_size, dtype=torch.bool)
+            self.digit_counts = torch.zeros(vocab_size, dtype=torch.long)
+            self.has_decimal = torch.zeros(vocab_size, dtype=torch.bool)
+
+            for token, token_id in tokenizer.get_vocab().items():
+                if token_id >= vocab_size:
+                    continue
+                text = tokenizer.convert_tokens_to_string([token]).strip()
+                if not text:
+                    continue
+                if all(ch.isdigit() for ch in text) or (
+                    allow_decimal
+                    and all(ch.isdigit() or ch in DECIMAL_SEPARATORS for ch in text)
+                    and sum(ch in DECIMAL_SEPARATORS for ch in text) == 1
+                ):
+                    self.allowed[token_id] = True
+                    self.digit_counts[token_id] = sum(ch.isdigit() for ch in text)
+                    self.has_decimal[token_id] = any(
+                        ch in DECIMAL_SEPARATORS for ch in text
+                    )
+
+            self.allowed[self.eos_token_id] = True
+            logging.info(
+                f"Reading vocabulary built: {int(self.allowed.sum())} allowed tokens"
+            )
+        except Exception as exc:
+            raise CustomException(str(exc), sys)
+
+
+class ReadingLogitsProcessor(LogitsProcessor):
+    """
+    Restricts generation to digit tokens and stops once `expected_digits` is reached.
+
+    Parameters
+    ----------
+    vocabulary : ReadingVocabulary
+        Precomputed token masks.
+    expected_digits : int
+        Digit count after which EOS is forced; 0 disables the early stop.
+    """
+
+    def __init__(self, vocabulary: ReadingVocabulary, expected_digits: int = 0):
+        self.vocabulary = vocabulary
+        self.expected_digits = expected_digits
+        self._masks: Dict[Any, Any] = {}
+
+    def _masks_for(self, scores: torch.Tensor):
+        """Masks padded to the model vocab size and moved to the scores' device (cached)."""
+        key = (scores.shape[-1], scores.device)
+        if key not in self._masks:
+            size = scores.shape[-1]
+            masks = []
+            for tensor in (
+                self.vocabulary.allowed,
+                self.vocabulary.digit_counts,
+                self.vocabulary.has_decimal,
+            ):
+                padded = torch.zeros(size, dtype=tensor.dtype)
+                length = min(size, tensor.shape[0])
+                padded[:length] = tensor[:length]
+                masks.append(padded.to(scores.device))
+            self._masks[key] = masks
+        return self._masks[key]
+
+    def __call__(
+        self, input_ids: torch.LongTensor, scores: torch.FloatTensor
+    ) -> torch.FloatTensor:
+        allowed, digit_counts, has_decimal = self._masks_for(scores)
+        generated = input_ids[:, 1:]  # drop the decoder start token
+
+        mask = allowed.unsqueeze(0).expand(scores.shape[0], -1).clone()
+
+        # only one decimal separator per reading
+        decimal_used = has_decimal[generated].any(dim=-1)
+        mask[decimal_used] &= ~has_decimal
+
+        if self.expected_digits > 0:
+            remaining = self.expected_digits - digit_counts[generated].sum(dim=-1)
+            # never overshoot the expected digit count with a multi-digit token
+            mask &= digit_counts.unsqueeze(0) <= remaining.unsqueeze(1)
+            done = remaining <= 0
+            mask[done] = False
+            mask[done, self.vocabulary.eos_token_id] = True
+
+        return scores.masked_fill(~mask, float("-inf"))
+
+
+def build_decoding_kwargs(
+    profile: Dict[str, Any],
+    base_kwargs: Dict[str, Any],
+    tokenizer,
+    vocabulary_cache: Optional[Dict[bool, ReadingVocabulary]] = None,
+) -> Dict[str, Any]:
+    """
+    Turn a `reading_decoding` profile into `generate` keyword arguments.
+
+    Parameters
+    ----------
+    profile : Dict[str, Any]
+        Keys: mode ("free" | "digits"), max_reading_length, expected_digits,
+        allow_decimal.
+    base_kwargs : Dict[str, Any]
+        The recognizer's default generate kwargs.
+    tokenizer : PreTrainedTokenizer
+        Tokenizer used to build the digit vocabulary.
+    vocabulary_cache : Optional[Dict[bool, ReadingVocabulary]]
+        Reused across profiles so the vocabulary scan happens once per setting.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Generate kwargs for this profile.
+    """
+    if profile.get("mode", "free") != "digits":
+        return dict(base_kwargs)
+
+    allow_decimal = bool(profile.get("allow_decimal", True))
+    if vocabulary_cache is None:
+        vocabulary_cache = {}
+    if allow_decimal not in vocabulary_cache:
+        vocabulary_cache[allow_decimal] = ReadingVocabulary(tokenizer, allow_decimal)
+
+    kwargs = {k: v for k, v in base_kwargs.items() if k != "max_length"}
+    kwargs["max_new_tokens"] = int(profile.get("max_reading_length", 12))
+    kwargs["logits_processor"] = LogitsProcessorList(
+        [
+            ReadingLogitsProcessor(
+                vocabulary_cache[allow_decimal],
+                expected_digits=int(profile.get("expected_digits", 0)),
+            )
+        ]
+    )
+    return kwargs
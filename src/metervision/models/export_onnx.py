@@ -0,0 +1,81 @@
+"""
+Export the TrOCR model to ONNX for the "onnx" OCR backend.
+
+Produces, in the output folder, an encoder graph plus decoder graphs with
+past-key-values (so each decode step only processes the newest token), together with
+the processor/tokenizer files needed to load the folder on its own.
+
+CLI:
+    python -m metervision.models.export_onnx
+    python -m metervision.models.export_onnx --model-dir "custom models/ocr_model" --output "custom models/ocr_model_onnx"
+"""
+
+import argparse
+import sys
+import time
+
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+
+
+def export_trocr_onnx(model_dir: str, output_dir: str, opset: int = 17) -> str:
+    """
+    Export `model_dir` (a VisionEncoderDecoder TrOCR checkpoint) to `output_dir`.
+
+    Parameters
+    ----------
+    model_dir : str
+        PyTorch TrOCR model folder (the `trocr_model` directory).
+    output_dir : str
+        Destination folder for the ONNX artifacts.
+    opset : int
+        ONNX opset version.
+
+    Returns
+    -------
+    str
+        The output folder.
+    """
+    try:
+        from optimum.exporters.onnx import main_export
+        from transformers import TrOCRProcessor
+    except ImportError as exc:
+        raise CustomException(
+            f"ONNX export requires `pip install optimum[onnxruntime]`: {exc}", sys
+        )
+
+    try:
+        start_time = time.perf_counter()
+        logging.info(f"Exporting TrOCR model from '{model_dir}' to ONNX")
+
+        main_export(
+            model_name_or_path=model_dir,
+            output=output_dir,
+            task="image-to-text-with-past",
+            opset=opset,
+            device="cpu",
+        )
+        # keep the folder self-contained for TrOCRRecognizer / ORT loading
+        TrOCRProcessor.from_pretrained(model_dir).save_pretrained(output_dir)
+
+        elapsed = round(time.perf_counter() - start_time, 3)
+        logging.info(f"ONNX export completed in '{output_dir}' (time {elapsed}s)")
+        return output_dir
+    except Exception as exc:
+        raise CustomException(str(exc), sys)
+
+
+def main() -> None:
+    from metervision.constants import DIR_CONFIG_FILE
+
+    parser = argparse.ArgumentParser(description="Export TrOCR to ONNX.")
+    parser.add_argument("--model-dir", default=DIR_CONFIG_FILE.trocr_model)
+    parser.add_argument("--output", default=DIR_CONFIG_FILE.trocr_onnx_model)
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    export_trocr_onnx(args.model_dir, args.output, args.opset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Pluggable generation backends for `TrOCRRecognizer`.
+
+A backend turns preprocessed `pixel_values` into generated token ids; the recognizer
+keeps ownership of the processor (preprocessing + decoding to text), so every backend
+returns exactly the same kind of output and readings stay comparable.
+
+Backends:
+- "torch"    : HuggingFace `VisionEncoderDecoderModel` in eager PyTorch (default).
+- "torch_static" : the same model, greedy-decoded with a static KV cache and a
+               compiled decoder step (`static_generation`); falls back to
+               `generate` for settings it does not reproduce.
+- "onnx"     : ONNX Runtime encoder + decoder-with-past artifacts produced by
+               `metervision.models.export_onnx` (requires `optimum[onnxruntime]`).
+- "openvino" : OpenVINO runtime via `optimum-intel`, converted from the PyTorch
+               model directory on load, or loaded as-is from an already converted
+               folder (requires `optimum[openvino]`).
+"""
+
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional
+
+import torch
+
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+from metervision.models.shared_weights import is_shared_trocr, load_shared_trocr
+
+OCR_BACKENDS = ("torch", "torch_static", "onnx", "openvino")
+
+
+class OCRBackend(ABC):
+    """
+    Interface of a TrOCR generation backend.
+
+    Parameters
+    ----------
+    generate_kwargs : Dict[str, Any]
+        Keyword arguments forwarded to `generate(...)`.
+    """
+
+    name = "base"
+
+    def __init__(self, generate_kwargs: Dict[str, Any]):
+        self.generate_kwargs = generate_kwargs
+
+    @abstractmethod
+    def generate(
+        self,
+        pixel_values: torch.Tensor,
+        generate_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> torch.Tensor:
+        """
+        Return generated token ids of shape (batch, sequence).
+
+        `generate_kwargs` overrides the backend defaults for this call (e.g. the
+        reading-decoding profile of a meter type).
+        """
+
+    def check_profiles(self, profiles: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Hook run once the recognizer has built the generate kwargs of every meter
+        type; backends with their own decoding path verify them here.
+        """
+
+
+class TorchOCRBackend(OCRBackend):
+    """
+    Eager PyTorch backend (the original `TrOCRRecognizer` behaviour).
+
+    Parameters
+    ----------
+    model_source : str
+        Pretrained model directory or HuggingFace model id, or a folder converted by
+        `metervision.models.shared_weights` (weights are then memory-mapped).
+    device : torch.device
+        Device the model and inputs are moved to.
+    quantization : str
+        "fp32" (default) or "int8" for dynamic INT8 linear layers (CPU only).
+    model : Optional[torch.nn.Module]
+        Already built model (e.g. an offline stub); `model_source` is then not read.
+    """
+
+    name = "torch"
+
+    def __init__(
+        self,
+        model_source: str,
+        device: torch.device,
+        generate_kwargs: Dict[str, Any],
+        quantization: str = "fp32",
+        model: Optional[torch.nn.Module] = None,
+    ):
+        from transformers import VisionEncoderDecoderModel
+
+        super().__init__(generate_kwargs)
+        self.device = device
+        if model is not None:
+            self.model = model
+        elif is_shared_trocr(model_source):
+            # mmap'd weights shared with other processes (see models.shared_weights)
+            self.model = load_shared_trocr(model_source)
+        else:
+            self.model = VisionEncoderDecoderModel.from_pretrained(model_source)
+        self.model.to(self.device)
+        self.model.eval()
+
+        if quantization == "int8":
+            if self.device.type != "cpu":
+                logging.warning("INT8 OCR quantization is CPU-only; keeping fp32.")
+            else:
+                from metervision.models.quantization import quantize_trocr_dynamic
+
+                if is_shared_trocr(model_source):
+                    logging.warning(
+                        "INT8 quantization copies the memory-mapped TrOCR weights; "
+                        "their pages are no longer shared between processes."
+                    )
+                self.model = quantize_trocr_dynamic(self.model)
+
+    def generate(
+        self,
+        pixel_values: torch.Tensor,
+        generate_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> torch.Tensor:
+        kwargs = generate_kwargs or self.generate_kwargs
+        pixel_values = pixel_values.to(self.device)
+        with torch.inference_mode():
+
+            if self.device.type == "cuda":
+                try:
+                    from torch.amp import autocast
+
+                    with autocast():
+                        return self.model.generate(pixel_values, **kwargs)
+                except Exception:
+
+                    return self.model.generate(pixel_values, **kwargs)
+            else:
+                return self.model.generate(pixel_values, **kwargs)
+
+
+class StaticCacheOCRBackend(TorchOCRBackend):
+    """
+    PyTorch backend decoding with `StaticCacheGenerator` (compiled once at startup).
+
+    Parameters
+    ----------
+    max_new_tokens : int
+        Static cache size (longest reading decoded on the fast path).
+    compile : bool
+        Compile the decoder step with `torch.compile`.
+    warmup_batch_sizes : Iterable[int]
+        Batch sizes compiled and checked against `generate` at startup (the meter-type
+        profiles are checked at the first one).
+    """
+
+    name = "torch_static"
+
+    def __init__(
+        self,
+        model_source: str,
+        device: torch.device,
+        generate_kwargs: Dict[str, Any],
+        quantization: str = "fp32",
+        max_new_tokens: int = 32,
+        compile: bool = True,
+        warmup_batch_sizes: Iterable[int] = (1,),
+    ):
+        from metervision.models.static_generation import StaticCacheGenerator
+
+        super().__init__(model_source, device, generate_kwargs, quantization)
+        self.warmup_batch_sizes = list(warmup_batch_sizes)
+        self.generator = StaticCacheGenerator(self.model, max_new_tokens, compile)
+        self.generator.warmup(generate_kwargs, self.warmup_batch_sizes)
+
+    def check_profiles(self, profiles: Dict[str, Dict[str, Any]]) -> None:
+        batch_size = self.warmup_batch_sizes[0] if self.warmup_batch_sizes else 1
+        for name, kwargs in profiles.items():
+            if not self.generator.check_profile(name, kwargs, batch_size):
+                return
+
+    def generate(
+        self,
+        pixel_values: torch.Tensor,
+        generate_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> torch.Tensor:
+        kwargs = generate_kwargs or self.generate_kwargs
+        if self.generator.enabled and self.generator.supports(kwargs):
+            return self.generator.generate(pixel_values.to(self.device), kwargs)
+        return super().generate(pixel_values, kwargs)
+
+
+class OnnxOCRBackend(OCRBackend):
+    """
+    ONNX Runtime backend: encoder runs once, decoder steps reuse past key/values.
+
+    Parameters
+    ----------
+    onnx_source : str
+        Folder produced by `metervision.models.export_onnx`.
+    num_threads : int
+        ONNX Runtime intra-op threads (0 lets ORT decide).
+    """
+
+    name = "onnx"
+
+    def __init__(
+        self, onnx_source: str, generate_kwargs: Dict[str, Any], num_threads: int = 0
+    ):
+        try:
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForVision2Seq
+        except ImportError as exc:
+            raise ImportError(
+                "The 'onnx' OCR backend requires `pip install optimum[onnxruntime]`"
+            ) from exc
+
+        super().__init__(generate_kwargs)
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = num_threads
+        session_options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+
+        self.model = ORTModelForVision2Seq.from_pretrained(
+            onnx_source,
+            use_cache=True,
+            provider="CPUExecutionProvider",
+            session_options=session_options,
+        )
+
+    def generate(
+        self,
+        pixel_values: torch.Tensor,
+        generate_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> torch.Tensor:
+        kwargs = generate_kwargs or self.generate_kwargs
+        with torch.inference_mode():
+            return self.model.generate(pixel_values, **kwargs)
+
+
+class OpenVINOOCRBackend(OCRBackend):
+    """
+    OpenVINO backend (CPU), converted from the PyTorch model directory on load.
+
+    Parameters
+    ----------
+    model_source : str
+        Pretrained PyTorch model directory (or an already converted OpenVINO folder).
+    """
+
+    name = "openvino"
+
+    def __init__(self, model_source: str, generate_kwargs: Dict[str, Any]):
+        try:
+            from optimum.intel import OVModelForVision2Seq
+        except ImportError as exc:
+            raise ImportError(
+                "The 'openvino' OCR backend requires `pip install optimum[openvino]`"
+            ) from exc
+
+        super().__init__(generate_kwargs)
+        # a converted folder holds the OpenVINO IR (encoder/decoder .xml files of a
+        # seq2seq model); a PyTorch directory is exported on load
+        converted = os.path.isfile(os.path.join(model_source, "openvino_encoder_model.xml"))
+        self.model = OVModelForVision2Seq.from_pretrained(
+            model_source, export=not converted, device="CPU"
+        )
+
+    def generate(
+        self,
+        pixel_values: torch.Tensor,
+        generate_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> torch.Tensor:
+        kwargs = generate_kwargs or self.generate_kwargs
+        with torch.inference_mode():
+            return self.model.generate(pixel_values, **kwargs)
+
+
+def create_ocr_backend(
+    backend: str,
+    model_source: str,
+    device: torch.device,
+    generate_kwargs: Dict[str, Any],
+    onnx_source: Optional[str] = None,
+    num_threads: int = 0,
+    quantization: str = "fp32",
+    static_decoding: Optional[Dict[str, Any]] = None,
+) -> OCRBackend:
+    """
+    Build the generation backend named `backend`.
+
+    Parameters
+    ----------
+    backend : str
+        One of `OCR_BACKENDS`.
+    model_source : str
+        PyTorch model directory / id (torch and openvino backends).
+    device : torch.device
+        Device for the torch backend; ONNX/OpenVINO always run on CPU.
+    generate_kwargs : Dict[str, Any]
+        Generation settings shared by all backends.
+    onnx_source : str
+        Exported ONNX folder (onnx backend).
+    num_threads : int
+        Intra-op threads for the ONNX Runtime session.
+    quantization : str
+        "fp32" or "int8"; INT8 is applied by the torch backends only.
+    static_decoding : Optional[Dict[str, Any]]
+        `max_new_tokens`, `compile` and `warmup_batch_sizes` of the torch_static backend.
+
+    Returns
+    -------
+    OCRBackend
+    """
+    try:
+        if backend == "torch":
+            ocr_backend = TorchOCRBackend(
+                model_source, device, generate_kwargs, quantization
+            )
+        elif backend == "torch_static":
+            options = dict(static_decoding or {})
+            ocr_backend = StaticCacheOCRBackend(
+                model_source,
+                device,
+                generate_kwargs,
+                quantization,
+                max_new_tokens=options.get("max_new_tokens", 32),
+                compile=options.get("compile", True),
+                warmup_batch_sizes=options.get("warmup_batch_sizes", (1,)),
+            )
+        elif backend == "onnx":
+            if not onnx_source:
+                raise ValueError("The 'onnx' OCR backend needs an exported model folder")
+            ocr_backend = OnnxOCRBackend(onnx_source, generate_kwargs, num_threads)
+        elif backend == "openvino":
+            ocr_backend = OpenVINOOCRBackend(model_source, generate_kwargs)
+        else:
+            raise ValueError(
+                f"Unknown OCR backend '{backend}', expected one of {OCR_BACKENDS}"
+            )
+
+        if quantization == "int8" and backend not in ("torch", "torch_static"):
+            logging.warning(f"INT8 quantization is not applied to the '{backend}' backend.")
+
+        logging.info(f"OCR backend '{backend}' loaded successfully.")
+        return ocr_backend
+    except Exception as exc:
+        raise CustomException(str(exc), sys)
@@ -1,8 +1,9 @@
 """
 TrOCR recognizer wrapper for MeterVision.
 
-This module loads a TrOCR processor + VisionEncoderDecoderModel from a directory
-or model id and exposes a simple `TrOCRRecognizer` class for text recognition.
+This module loads a TrOCR processor + a generation backend (see `ocr_backends`)
+from a directory or model id and exposes a simple `TrOCRRecognizer` class for text
+recognition.
 
 Features:
 - Automatically uses GPU if available, otherwise CPU.
@@ -11,17 +12,26 @@ Features:
 - Exposes `generate_kwargs` to tune generation for speed/quality tradeoffs
   (e.g., num_beams=1 for greedy decoding which is faster).
 - Optionally limits PyTorch thread usage on CPU to improve single-request latency.
+- Pluggable backends: eager PyTorch (default), ONNX Runtime or OpenVINO.
+- Optional digit-constrained, length-bounded decoding per meter type (see `decoding`).
+- Vectorized crop preprocessing straight to `pixel_values`, without the processor's
+  per-image PIL path (see `ocr_preprocessing`).
+- Per-call short greedy decoding (`max_new_tokens`) for requests running out of
+  their latency budget (see `pipeline.budget`).
 """
 
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 import torch
-from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+from transformers import TrOCRProcessor
 
 from metervision.exception.custom_exception import CustomException
 from metervision.logger.logs import logging
+from metervision.models.decoding import build_decoding_kwargs
+from metervision.models.ocr_backends import OCRBackend, create_ocr_backend
+from metervision.models.ocr_preprocessing import TrOCRPixelPreprocessor
 
 
 class TrOCRRecognizer:
@@ -38,12 +48,49 @@ class TrOCRRecognizer:
     cpu_num_threads : Optional[int]
         If device is CPU, optionally set the number of PyTorch intra-op threads to
         limit parallelism (can improve latency for single-image inference).
+    backend : str
+        Generation backend: "torch" (default), "torch_static", "onnx" or "openvino".
+    onnx_source : Optional[str]
+        Folder exported by `metervision.models.export_onnx` (required for "onnx").
+    quantization : str
+        "fp32" (default) or "int8" (dynamic INT8 linear layers, torch backend on CPU).
+    decoding_profiles : Optional[Dict[str, Dict[str, Any]]]
+        Reading-decoding profile per meter type (`reading_decoding.meter_types`).
+    default_meter_type : Optional[str]
+        Profile used when no meter type is given; None keeps `generate_kwargs`.
+    fast_preprocessing : bool
+        Build `pixel_values` with `TrOCRPixelPreprocessor` instead of the processor.
+    static_decoding : Optional[Dict[str, Any]]
+        Options of the "torch_static" backend (`static_decoding` in the config).
+    processor : Optional[TrOCRProcessor]
+        Already loaded processor (e.g. an offline stub) instead of `model_source`'s.
+    ocr_backend : Optional[OCRBackend]
+        Already built backend; `backend`, `onnx_source`, `quantization` and
+        `static_decoding` are then ignored, and its device is used.
     """
 
     def __init__(
-        self, model_source: str, generate_kwargs: Optional[Dict[str, Any]] = None
+        self,
+        model_source: str,
+        generate_kwargs: Optional[Dict[str, Any]] = None,
+        cpu_num_threads: Optional[int] = None,
+        backend: str = "torch",
+        onnx_source: Optional[str] = None,
+        quantization: str = "fp32",
+        decoding_profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+        default_meter_type: Optional[str] = None,
+        fast_preprocessing: bool = True,
+        static_decoding: Optional[Dict[str, Any]] = None,
+        processor: Optional[TrOCRProcessor] = None,
+        ocr_backend: Optional[OCRBackend] = None,
     ):
         self.model_source = model_source
+        self.backend_name = backend
+        self.decoding_profiles = decoding_profiles or {}
+        self.default_meter_type = default_meter_type
+        self._decoding_kwargs_cache: Dict[str, Dict[str, Any]] = {}
+        self._vocabulary_cache: Dict[bool, Any] = {}
+        self._short_kwargs_cache: Dict[Any, Dict[str, Any]] = {}
         self.generate_kwargs = generate_kwargs or {
             # Greedy decoding (fast) — increase num_beams for quality at cost of speed
             "max_length": 128,
@@ -62,20 +109,46 @@ class TrOCRRecognizer:
                 logging.info(
                     "GPU not available — falling back to CPU for OCR inference."
                 )
+                if cpu_num_threads:
+                    # process-wide: stops several processes from oversubscribing the cores
+                    torch.set_num_threads(int(cpu_num_threads))
+                    logging.info(f"PyTorch intra-op threads set to {cpu_num_threads}")
 
             # Use from_pretrained for compatibility with both local folders and HF hub ids
-            self.processor = TrOCRProcessor.from_pretrained(model_source)
-            self.model = VisionEncoderDecoderModel.from_pretrained(model_source)
+            self.processor = processor or TrOCRProcessor.from_pretrained(model_source)
+            self.preprocessor = (
+                TrOCRPixelPreprocessor(self.processor) if fast_preprocessing else None
+            )
 
-            # Move model to device (if torch available)
-            if self.device is not None:
-                self.model.to(self.device)
+            # The backend owns the model (moved to self.device for torch)
+            if ocr_backend is not None:
+                self.backend = ocr_backend
+                self.backend_name = ocr_backend.name
+                self.device = getattr(ocr_backend, "device", self.device)
+            else:
+                self.backend = create_ocr_backend(
+                    backend=backend,
+                    model_source=model_source,
+                    device=self.device,
+                    generate_kwargs=self.generate_kwargs,
+                    onnx_source=onnx_source,
+                    num_threads=int(cpu_num_threads or 0),
+                    quantization=quantization,
+                    static_decoding=static_decoding,
+                )
+            self.model = self.backend.model
+            # per-meter kwargs need the tokenizer, so they are checked after loading
+            self.backend.check_profiles(
+                {name: self.decoding_kwargs(name) for name in self.decoding_profiles}
+            )
 
             logging.info("TrOCR processor and model loaded successfully.")
         except Exception as exc:
             raise CustomException(str(exc), sys)
 
-    def recognize_reading(self, image: np.ndarray) -> str:
+    def recognize_reading(
+        self, image: np.ndarray, meter_type: Optional[str] = None
+    ) -> str:
         """
         Recognize Reading from a single image.
 
@@ -83,6 +156,8 @@ class TrOCRRecognizer:
         ----------
         image : np.ndarray
             Input Image
+        meter_type : Optional[str]
+            Decoding profile to use; defaults to `default_meter_type`.
 
         Returns
         -------
@@ -91,34 +166,124 @@ class TrOCRRecognizer:
         """
         try:
             # Preprocess images -> pixel_values (tensor)
-            inputs = self.processor(images=image, return_tensors="pt")
-            pixel_values = inputs.pixel_values.to(self.device)
+            pixel_values = self._pixel_values([image])
 
-            with torch.inference_mode():
+            generated_ids = self._generate(pixel_values, meter_type)
+
+            # Decode predicted ids to text
+            generated_reading = self._decode(generated_ids, meter_type)[0]
+            return generated_reading
+
+        except Exception as exc:
+            raise CustomException(f"OCR recognition failed: {exc}", sys)
 
-                if self.device.type == "cuda":
-                    try:
-                        from torch.amp import autocast
+    def recognize_readings(
+        self,
+        images: List[np.ndarray],
+        meter_type: Optional[str] = None,
+        max_new_tokens: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Recognize Readings from many images with a single `generate` call.
 
-                        with autocast():
-                            generated_ids = self.model.generate(
-                                pixel_values, **self.generate_kwargs
-                            )
-                    except Exception:
+        Every crop is resized to the encoder input size, so the batch stacks into
+        one tensor; `generate` pads finished sequences until the
+        longest one ends.
 
-                        generated_ids = self.model.generate(
-                            pixel_values, **self.generate_kwargs
-                        )
-                else:
-                    generated_ids = self.model.generate(
-                        pixel_values, **self.generate_kwargs
-                    )
+        Parameters
+        ----------
+        images : List[np.ndarray]
+            Input Images
+        meter_type : Optional[str]
+            Decoding profile to use; defaults to `default_meter_type`.
+        max_new_tokens : Optional[int]
+            Decode greedily and stop after this many tokens (cheaper, may truncate).
 
-            # Decode predicted ids to text
-            generated_reading = self.processor.batch_decode(
-                generated_ids, skip_special_tokens=True
-            )[0]
-            return generated_reading
+        Returns
+        -------
+        List[str]
+            Recognized text per image, in input order.
+        """
+        try:
+            if not images:
+                return []
+
+            pixel_values = self._pixel_values(list(images))
+
+            generated_ids = self._generate(pixel_values, meter_type, max_new_tokens)
+
+            return self._decode(generated_ids, meter_type)
 
         except Exception as exc:
             raise CustomException(f"OCR recognition failed: {exc}", sys)
+
+    def _pixel_values(self, images: List[np.ndarray]) -> torch.Tensor:
+        """Resized, normalized (N, 3, H, W) encoder input for the crops."""
+        if self.preprocessor is not None:
+            return self.preprocessor(images)
+        return self.processor(images=images, return_tensors="pt").pixel_values
+
+    def _profile(self, meter_type: Optional[str]) -> Optional[Dict[str, Any]]:
+        meter_type = meter_type or self.default_meter_type
+        if meter_type is None:
+            return None
+        if meter_type not in self.decoding_profiles:
+            raise ValueError(f"Unknown meter type '{meter_type}' for reading decoding")
+        return self.decoding_profiles[meter_type]
+
+    def decoding_kwargs(self, meter_type: Optional[str] = None) -> Dict[str, Any]:
+        """Generate kwargs of a meter type's decoding profile (built once, cached)."""
+        profile = self._profile(meter_type)
+        if profile is None:
+            return self.generate_kwargs
+
+        key = meter_type or self.default_meter_type
+        if key not in self._decoding_kwargs_cache:
+            self._decoding_kwargs_cache[key] = build_decoding_kwargs(
+                profile,
+                self.generate_kwargs,
+                self.processor.tokenizer,
+                self._vocabulary_cache,
+            )
+        return self._decoding_kwargs_cache[key]
+
+    def short_decoding_kwargs(
+        self, meter_type: Optional[str], max_new_tokens: int
+    ) -> Dict[str, Any]:
+        """Greedy, length-capped variant of `decoding_kwargs` (built once, cached)."""
+        key = (meter_type or self.default_meter_type, int(max_new_tokens))
+        if key not in self._short_kwargs_cache:
+            kwargs = dict(self.decoding_kwargs(meter_type))
+            kwargs.pop("max_length", None)
+            kwargs.pop("early_stopping", None)
+            # a profile may already bound the reading length more tightly
+            max_new_tokens = min(int(max_new_tokens), kwargs.get("max_new_tokens", 1 << 30))
+            kwargs.update(num_beams=1, do_sample=False, max_new_tokens=max_new_tokens)
+            if "min_new_tokens" in kwargs:
+                kwargs["min_new_tokens"] = min(kwargs["min_new_tokens"], max_new_tokens)
+            self._short_kwargs_cache[key] = kwargs
+        return self._short_kwargs_cache[key]
+
+    def _generate(
+        self,
+        pixel_values: torch.Tensor,
+        meter_type: Optional[str] = None,
+        max_new_tokens: Optional[int] = None,
+    ) -> torch.Tensor:
+        """Run generation on a (batched) pixel tensor with the configured backend."""
+        if max_new_tokens:
+            kwargs = self.short_decoding_kwargs(meter_type, max_new_tokens)
+        else:
+            kwargs = self.decoding_kwargs(meter_type)
+        return self.backend.generate(pixel_values, kwargs)
+
+    def _decode(
+        self, generated_ids: torch.Tensor, meter_type: Optional[str] = None
+    ) -> List[str]:
+        readings = self.processor.batch_decode(generated_ids, skip_special_tokens=True)
+
+        # digit-only profiles may still produce space-prefixed tokens ("12 345")
+        profile = self._profile(meter_type)
+        if profile is not None and profile.get("mode") == "digits":
+            readings = ["".join(reading.split()) for reading in readings]
+        return readings
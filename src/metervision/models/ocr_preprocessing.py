@@ -0,0 +1,133 @@
+"""
+Vectorized TrOCR image preprocessing (numpy -> pixel_values without PIL).
+
+`TrOCRProcessor(images=...)` converts every crop to a PIL image, resizes it to the
+ViT input size, then rescales and normalizes it, one image at a time in Python.
+`TrOCRPixelPreprocessor` reads the same settings (size, resample filter, rescale
+factor, mean, std) from the processor's image processor once, and then:
+
+Features:
+- stacks the reading crops (all `reading_roi_resized`) into one uint8 tensor;
+- resizes the whole batch with `torch.nn.functional.interpolate` using antialiased
+  bilinear / bicubic filtering, which follows PIL's resampling, and rounds to
+  8-bit values like PIL does;
+- rescales and normalizes in place with a single fused multiply-add per channel
+  into the output float tensor.
+
+Inputs it cannot reproduce exactly (grayscale/RGBA crops, other resample filters)
+fall back to the processor. `benchmarks/ocr_preprocessing_parity.py` checks that
+`pixel_values` match the processor's output.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+# PIL resample ids -> interpolate modes reproduced here
+_RESAMPLE_MODES = {2: "bilinear", 3: "bicubic"}
+
+
+def _target_size(size) -> Optional[Tuple[int, int]]:
+    """(height, width) of an image processor `size` setting, if it is a fixed size."""
+    if isinstance(size, int):
+        return size, size
+    size = dict(size)
+    if "height" in size and "width" in size:
+        return int(size["height"]), int(size["width"])
+    return None
+
+
+class TrOCRPixelPreprocessor:
+    """
+    Batched numpy -> `pixel_values` preprocessing equivalent to a TrOCR processor.
+
+    Parameters
+    ----------
+    processor : TrOCRProcessor
+        Processor whose image-processor settings are reproduced; also used as the
+        fallback for inputs the fast path does not handle.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        image_processor = processor.image_processor
+
+        self.do_resize = bool(getattr(image_processor, "do_resize", True))
+        self.size = _target_size(image_processor.size)
+        resample = getattr(image_processor, "resample", 2)
+        self.mode = _RESAMPLE_MODES.get(int(resample) if resample is not None else 2)
+
+        # rescale + normalize fused: x * scale + shift, per channel
+        rescale = (
+            float(image_processor.rescale_factor)
+            if getattr(image_processor, "do_rescale", True)
+            else 1.0
+        )
+        if getattr(image_processor, "do_normalize", True):
+            mean = torch.tensor(image_processor.image_mean, dtype=torch.float32)
+            std = torch.tensor(image_processor.image_std, dtype=torch.float32)
+        else:
+            mean, std = torch.zeros(3), torch.ones(3)
+        self.scale = (rescale / std).view(1, 3, 1, 1)
+        self.shift = (-mean / std).view(1, 3, 1, 1)
+
+        # the fast path needs a fixed output size and a filter we can reproduce
+        self.enabled = self.size is not None and self.mode is not None
+
+    def supports(self, image: np.ndarray) -> bool:
+        return (
+            self.enabled
+            and isinstance(image, np.ndarray)
+            and image.dtype == np.uint8
+            and image.ndim == 3
+            and image.shape[2] == 3
+        )
+
+    def __call__(self, images: Union[np.ndarray, Sequence[np.ndarray]]) -> torch.Tensor:
+        """
+        Preprocess one image or a list of images into a (N, 3, H, W) float tensor.
+
+        Parameters
+        ----------
+        images : ndarray or Sequence[ndarray]
+            RGB uint8 crop(s) of shape (h, w, 3).
+
+        Returns
+        -------
+        torch.Tensor
+            `pixel_values`, as `processor(images=..., return_tensors="pt")` returns.
+        """
+        if isinstance(images, np.ndarray) and images.ndim == 3:
+            images = [images]
+        images = list(images)
+        shapes = {image.shape for image in images if isinstance(image, np.ndarray)}
+        if not all(self.supports(image) for image in images) or (
+            not self.do_resize and len(shapes) > 1
+        ):
+            return self.processor(images=images, return_tensors="pt").pixel_values
+
+        height, width = self.size if self.do_resize else images[0].shape[:2]
+        pixel_values = torch.empty((len(images), 3, height, width), dtype=torch.float32)
+
+        # crops of one shape (the usual case) are resized as a single batch
+        groups: Dict[Tuple[int, ...], List[int]] = {}
+        for i, image in enumerate(images):
+            groups.setdefault(image.shape, []).append(i)
+        for indices in groups.values():
+            batch = torch.from_numpy(np.stack([images[i] for i in indices]))
+            pixel_values[indices] = self._resize(batch, height, width)
+
+        return pixel_values.mul_(self.scale).add_(self.shift)
+
+    def _resize(self, batch: torch.Tensor, height: int, width: int) -> torch.Tensor:
+        """uint8 (N, h, w, 3) -> float (N, 3, height, width), rounded to 8-bit levels."""
+        pixels = batch.permute(0, 3, 1, 2).float()
+        if pixels.shape[-2:] == (height, width):
+            return pixels
+        resized = F.interpolate(
+            pixels, size=(height, width), mode=self.mode, align_corners=False, antialias=True
+        )
+        return resized.round_().clamp_(0, 255)
+
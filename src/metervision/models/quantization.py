@@ -0,0 +1,158 @@
+"""
+INT8 quantization helpers for the MeterVision models.
+
+- TrOCR: dynamic INT8 quantization of every `nn.Linear` in the encoder (ViT) and the
+  decoder, applied in memory right after loading (no calibration data needed).
+- YOLO detectors: one-off export of the display/reading weights to INT8 files that
+  `ultralytics.YOLO` loads directly:
+    * "onnx"     : ONNX export + ONNX Runtime dynamic weight quantization (default,
+                   no calibration data).
+    * "openvino" : Ultralytics static INT8 export, calibrated on a dataset YAML.
+
+The precision used at runtime is chosen with `quantization.mode` in
+parameter_config.yaml ("fp32" or "int8"); `quantization.detector_format` selects which
+INT8 export is loaded. Ultralytics picks the backend from the path, so the two formats
+have their own directory_config keys: `*_roi_model_int8` (.onnx files) and
+`*_roi_model_int8_openvino` (`*_openvino_model` folders).
+
+CLI (export the INT8 detector weights):
+    python -m metervision.models.quantization
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from typing import Optional
+
+import torch
+
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+
+QUANTIZATION_MODES = ("fp32", "int8")
+
+
+def quantize_trocr_dynamic(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Dynamically quantize the linear layers of a TrOCR model to INT8 (CPU only).
+
+    Parameters
+    ----------
+    model : torch.nn.Module
+        Loaded `VisionEncoderDecoderModel` in eval mode.
+
+    Returns
+    -------
+    torch.nn.Module
+        Quantized model; weights are stored as int8, activations quantized on the fly.
+    """
+    try:
+        start_time = time.perf_counter()
+        quantized = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        elapsed = round(time.perf_counter() - start_time, 3)
+        logging.info(f"TrOCR linear layers quantized to INT8 (time {elapsed}s)")
+        return quantized
+    except Exception as exc:
+        raise CustomException(str(exc), sys)
+
+
+def export_int8_detector(
+    model_path: str,
+    task: str,
+    output_path: str,
+    export_format: str = "onnx",
+    data: Optional[str] = None,
+    imgsz: int = 640,
+) -> str:
+    """
+    Export YOLO weights to an INT8 model file/folder loadable by `ultralytics.YOLO`.
+
+    Parameters
+    ----------
+    model_path : str
+        fp32 `.pt` weights.
+    task : str
+        "obb" (display model) or "detect" (reading model).
+    output_path : str
+        Destination `.onnx` file ("onnx") or folder whose name ends with
+        `_openvino_model` ("openvino").
+    export_format : str
+        "onnx" (dynamic weight quantization) or "openvino" (static, needs `data`).
+    data : Optional[str]
+        Dataset YAML used for calibration by the "openvino" format.
+    imgsz : int
+        Export input size.
+
+    Returns
+    -------
+    str
+        Path of the INT8 model.
+    """
+    try:
+        from ultralytics import YOLO
+
+        start_time = time.perf_counter()
+        model = YOLO(model=model_path, task=task)
+
+        if export_format == "onnx":
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            fp32_path = model.export(format="onnx", imgsz=imgsz, dynamic=True)
+            quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QUInt8)
+        elif export_format == "openvino":
+            if not data:
+                raise ValueError("OpenVINO INT8 export needs a calibration dataset YAML")
+            if not output_path.rstrip("/\\").endswith("_openvino_model"):
+                raise ValueError("OpenVINO output folders must end with '_openvino_model'")
+            exported = model.export(format="openvino", int8=True, data=data, imgsz=imgsz)
+            if os.path.abspath(exported) != os.path.abspath(output_path):
+                shutil.rmtree(output_path, ignore_errors=True)
+                shutil.move(exported, output_path)
+        else:
+            raise ValueError(f"Unsupported INT8 export format '{export_format}'")
+
+        elapsed = round(time.perf_counter() - start_time, 3)
+        logging.info(f"INT8 detector exported to '{output_path}' (time {elapsed}s)")
+        return output_path
+    except Exception as exc:
+        raise CustomException(str(exc), sys)
+
+
+def main() -> None:
+    from metervision.constants import DIR_CONFIG_FILE, PARAMS_CONFIG_FILE
+
+    parser = argparse.ArgumentParser(description="Export INT8 YOLO detectors.")
+    parser.add_argument(
+        "--format",
+        choices=["onnx", "openvino"],
+        default=PARAMS_CONFIG_FILE.quantization.detector_format,
+    )
+    parser.add_argument("--data", default=None, help="Calibration YAML (openvino)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args()
+    suffix = "_openvino" if args.format == "openvino" else ""
+
+    export_int8_detector(
+        model_path=DIR_CONFIG_FILE.display_roi_model,
+        task="obb",
+        output_path=DIR_CONFIG_FILE[f"display_roi_model_int8{suffix}"],
+        export_format=args.format,
+        data=args.data,
+        imgsz=args.imgsz,
+    )
+    export_int8_detector(
+        model_path=DIR_CONFIG_FILE.reading_roi_model,
+        task="detect",
+        output_path=DIR_CONFIG_FILE[f"reading_roi_model_int8{suffix}"],
+        export_format=args.format,
+        data=args.data,
+        imgsz=args.imgsz,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,17 @@ polygon and to extract a resized display image using postprocessing utilities.
 
 import sys
 import time
+from typing import List, Optional, Tuple
 
 import numpy as np
 from ultralytics import YOLO
 
 from metervision.exception.custom_exception import CustomException
 from metervision.logger.logs import logging
-from metervision.utils.roi_postprocessing import extract_roi
+from metervision.monitoring.metrics import DETECTION_MISSES
+from metervision.models.shared_weights import is_shared_yolo, load_shared_yolo
+from metervision.utils.roi_postprocessing import (best_box_index, extract_roi,
+                                                 extract_roi_batch, polygon_nms)
 
 
 class DisplayDetector:
@@ -27,16 +31,25 @@ class DisplayDetector:
         Path to the YOLO model weights / file to load.
     params : object
         Parameter object (from config) containing keys like display_roi_resized.width/height.
+    model : Optional[object]
+        Already loaded model (e.g. an offline stub); `model_path` is then not read.
     """
 
-    def __init__(self, model_path, params):
+    def __init__(self, model_path, params, model=None):
         self.params = params
+        if model is not None:
+            self.model = model
+            return
         try:
             start_time = time.perf_counter()
             logging.info("Trying to Load the Model")
 
             # Use YOLO with 'obb' task for oriented bounding boxes
-            self.model = YOLO(model=model_path, task="obb", verbose=True)
+            if is_shared_yolo(model_path):
+                # mmap'd weights shared with other processes (see models.shared_weights)
+                self.model = load_shared_yolo(model_path, task="obb")
+            else:
+                self.model = YOLO(model=model_path, task="obb", verbose=True)
 
             elapsed = round(time.perf_counter() - start_time, 3)
             logging.info(f"Display ROI Model Loaded Successfully (time {elapsed}s)")
@@ -76,6 +89,7 @@ class DisplayDetector:
                     polygon = polygon_obb.reshape((-1, 1, 2)).astype(np.int32)
                 else:
                     logging.warning("Display is not Detected")
+                    DETECTION_MISSES.inc(stage="display")
                     polygon = None
 
             return polygon
@@ -101,9 +115,178 @@ class DisplayDetector:
         target_w = self.params.resized_width
         target_h = self.params.resized_height
 
-        polygon = self.detect_display(image=img.copy())
-        if polygon.any():
+        # the detector does not modify its input, so no defensive copy is needed
+        polygon = self.detect_display(image=img)
+        if polygon is not None and polygon.any():
             display_image = extract_roi(img, polygon, (target_w, target_h), "Display")
             return display_image
         else:
             return img
+
+    def detect_display_batch(
+        self,
+        images: List[np.ndarray],
+        min_conf: float = 0.0,
+        imgsz: Optional[int] = None,
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Run the detector once over a list of images.
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            Input image arrays.
+        min_conf : float
+            A best box below this confidence counts as not detected (early-exit gate).
+        imgsz : Optional[int]
+            Detector input size for this call (smaller is faster); model default if None.
+
+        Returns
+        -------
+        polygons: List[Optional[np.ndarray]]
+            One polygon (int32) per image, or None where no display was detected.
+        """
+
+        try:
+            if not images:
+                return []
+
+            start_time = time.perf_counter()
+            logging.info(f"Finding Display Bounding Boxes (batch of {len(images)})")
+            results = self.model(images, **({"imgsz": imgsz} if imgsz else {}))
+            elapsed = round(time.perf_counter() - start_time, 3)
+            logging.info(f"Display Bounding Boxes Found Successfully (time {elapsed}s)")
+
+            polygons = []
+            for result in results:
+                obb = result.obb
+                idx_max_conf = best_box_index(obb.conf if obb is not None else None)
+                if idx_max_conf is None:
+                    logging.warning("Display is not Detected")
+                    DETECTION_MISSES.inc(stage="display")
+                    polygons.append(None)
+                    continue
+                if min_conf and float(obb.conf[idx_max_conf]) < min_conf:
+                    logging.info(f"Display confidence below {min_conf}")
+                    polygons.append(None)
+                    continue
+
+                polygon_obb = obb.xyxyxyxy[idx_max_conf].cpu().numpy()
+                polygons.append(polygon_obb.reshape((-1, 1, 2)).astype(np.int32))
+
+            return polygons
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    def extract_display_roi_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Batched counterpart of `extract_display_roi`.
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            Input image arrays.
+
+        Returns
+        -------
+        display_images: List[ndarray]
+            Resized display ROI per image; the original image where no display was found.
+        """
+        polygons = self.detect_display_batch(images=images)
+        return self.crop_display_batch(images, polygons)
+
+    def crop_display_batch(
+        self, images: List[np.ndarray], polygons: List[Optional[np.ndarray]]
+    ) -> List[np.ndarray]:
+        """
+        Warp and resize the detected display ROIs (output of `detect_display_batch`).
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            The images the polygons were detected on.
+        polygons : List[Optional[np.ndarray]]
+            One polygon per image, or None where nothing was detected.
+
+        Returns
+        -------
+        display_images: List[ndarray]
+            Resized display ROI per image; the input image where the polygon is None.
+        """
+        target_w = self.params.resized_width
+        target_h = self.params.resized_height
+
+        # one warp per detected box, all written into a single (N, h, w, C) array
+        found = [
+            i for i, polygon in enumerate(polygons) if polygon is not None and polygon.any()
+        ]
+        display_images = list(images)
+        if found:
+            rois = extract_roi_batch(
+                [images[i] for i in found],
+                [polygons[i] for i in found],
+                (target_w, target_h),
+                "Display",
+            )
+            for i, roi in zip(found, rois):
+                display_images[i] = roi
+        return display_images
+
+    def detect_displays(
+        self,
+        image: np.ndarray,
+        conf_threshold: float = 0.25,
+        iou_threshold: float = 0.5,
+        max_displays: int = 0,
+    ) -> Tuple[List[np.ndarray], List[float]]:
+        """
+        Run the detector once and return every display above a confidence threshold.
+
+        The thresholds are passed to the detector (so its own rotated NMS already
+        uses them), and a class-agnostic polygon NMS is applied on top so that the
+        same display is never returned twice under different classes.
+
+        Parameters
+        ----------
+        image : ndarray
+            Input image array.
+        conf_threshold : float
+            Minimum box confidence.
+        iou_threshold : float
+            Boxes overlapping a more confident one by more than this IoU are dropped.
+        max_displays : int
+            Keep at most this many displays (0 = no limit).
+
+        Returns
+        -------
+        Tuple[List[np.ndarray], List[float]]
+            Polygons (int32, suitable for extract_roi) and their confidences, highest
+            confidence first. Both lists are empty when no display was detected.
+        """
+
+        try:
+            start_time = time.perf_counter()
+            logging.info("Finding all Display Bounding Boxes")
+            results = self.model(image, conf=conf_threshold, iou=iou_threshold)
+            elapsed = round(time.perf_counter() - start_time, 3)
+
+            obb = results[0].obb if results else None
+            if obb is None or len(obb.conf) == 0:
+                logging.warning("Display is not Detected")
+                DETECTION_MISSES.inc(stage="display")
+                return [], []
+
+            confidences = obb.conf.cpu().numpy()
+            corners = obb.xyxyxyxy.cpu().numpy()
+            keep = [
+                i
+                for i in polygon_nms(corners, confidences, iou_threshold, max_displays)
+                if confidences[i] >= conf_threshold
+            ]
+            logging.info(
+                f"{len(keep)} Display Bounding Boxes Found Successfully (time {elapsed}s)"
+            )
+            polygons = [corners[i].reshape((-1, 1, 2)).astype(np.int32) for i in keep]
+            return polygons, [round(float(confidences[i]), 4) for i in keep]
+        except Exception as e:
+            raise CustomException(str(e), sys)
@@ -8,13 +8,17 @@ resizes the reading ROI for downstream OCR/recognition.
 
 import sys
 import time
+from typing import List, Optional
 
 import numpy as np
 from ultralytics import YOLO
 
 from metervision.exception.custom_exception import CustomException
 from metervision.logger.logs import logging
-from metervision.utils.roi_postprocessing import extract_roi
+from metervision.monitoring.metrics import DETECTION_MISSES
+from metervision.models.shared_weights import is_shared_yolo, load_shared_yolo
+from metervision.utils.roi_postprocessing import (best_box_index, extract_roi,
+                                                 extract_roi_batch)
 
 
 class ReadingDetector:
@@ -27,16 +31,25 @@ class ReadingDetector:
         Path to the YOLO model weights / file to load.
     params : object
         Parameter object (from config) containing keys like reading_roi_resized.width/height.
+    model : Optional[object]
+        Already loaded model (e.g. an offline stub); `model_path` is then not read.
     """
 
-    def __init__(self, model_path, params):
+    def __init__(self, model_path, params, model=None):
         self.params = params
+        if model is not None:
+            self.model = model
+            return
         try:
             start_time = time.perf_counter()
             logging.info("Trying to Load the Model")
 
             # Use simple detect task for axis-aligned bounding boxes for readings
-            self.model = YOLO(model=model_path, task="detect", verbose=True)
+            if is_shared_yolo(model_path):
+                # mmap'd weights shared with other processes (see models.shared_weights)
+                self.model = load_shared_yolo(model_path, task="detect")
+            else:
+                self.model = YOLO(model=model_path, task="detect", verbose=True)
 
             elapsed = round(time.perf_counter() - start_time, 3)
             logging.info(f"Reading ROI Model Loaded Successfully (time {elapsed}s)")
@@ -75,6 +88,7 @@ class ReadingDetector:
                     polygon = polygon_box.reshape((-1, 1, 2)).astype(np.int32)
                 else:
                     logging.warning("Display is not Detected")
+                    DETECTION_MISSES.inc(stage="reading")
                     polygon = None
 
             return polygon
@@ -99,9 +113,120 @@ class ReadingDetector:
         target_w = self.params.resized_width
         target_h = self.params.resized_height
 
-        polygon = self.detect_reading(image=img.copy())
-        if polygon.any():
+        # the detector does not modify its input, so no defensive copy is needed
+        polygon = self.detect_reading(image=img)
+        if polygon is not None and polygon.any():
             reading_image = extract_roi(img, polygon, (target_w, target_h), "Reading")
             return reading_image
         else:
             return img
+
+    def detect_reading_batch(
+        self,
+        images: List[np.ndarray],
+        min_conf: float = 0.0,
+        imgsz: Optional[int] = None,
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Run detection once over a list of images.
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            Input image arrays (typically display ROIs).
+        min_conf : float
+            A best box below this confidence counts as not detected (early-exit gate).
+        imgsz : Optional[int]
+            Detector input size for this call (smaller is faster); model default if None.
+
+        Returns
+        -------
+        polygons: List[Optional[np.ndarray]]
+            One box (int32) per image, or None where no reading was detected.
+        """
+
+        try:
+            if not images:
+                return []
+
+            start_time = time.perf_counter()
+            logging.info(f"Finding Reading Bounding Boxes (batch of {len(images)})")
+            results = self.model(images, **({"imgsz": imgsz} if imgsz else {}))
+            elapsed = round(time.perf_counter() - start_time, 3)
+            logging.info(f"Reading Bounding Boxes Found Successfully (time {elapsed}s)")
+
+            polygons = []
+            for result in results:
+                boxes = result.boxes
+                idx_max_conf = best_box_index(boxes.conf if boxes is not None else None)
+                if idx_max_conf is None:
+                    logging.warning("Reading is not Detected")
+                    DETECTION_MISSES.inc(stage="reading")
+                    polygons.append(None)
+                    continue
+                if min_conf and float(boxes.conf[idx_max_conf]) < min_conf:
+                    logging.info(f"Reading confidence below {min_conf}")
+                    polygons.append(None)
+                    continue
+
+                polygon_box = boxes.xyxy[idx_max_conf].cpu().numpy()
+                polygons.append(polygon_box.reshape((-1, 1, 2)).astype(np.int32))
+
+            return polygons
+        except Exception as exc:
+            raise CustomException(str(exc), sys)
+
+    def extract_reading_roi_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Batched counterpart of `extract_reading_roi`.
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            Input image arrays (typically display ROIs).
+
+        Returns
+        -------
+        reading_images: List[ndarray]
+            Resized reading ROI per image; the input image where no reading was found.
+        """
+
+        polygons = self.detect_reading_batch(images=images)
+        return self.crop_reading_batch(images, polygons)
+
+    def crop_reading_batch(
+        self, images: List[np.ndarray], polygons: List[Optional[np.ndarray]]
+    ) -> List[np.ndarray]:
+        """
+        Warp and resize the detected reading ROIs (output of `detect_reading_batch`).
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            The images the polygons were detected on.
+        polygons : List[Optional[np.ndarray]]
+            One polygon per image, or None where nothing was detected.
+
+        Returns
+        -------
+        reading_images: List[ndarray]
+            Resized reading ROI per image; the input image where the polygon is None.
+        """
+        target_w = self.params.resized_width
+        target_h = self.params.resized_height
+
+        # one warp per detected box, all written into a single (N, h, w, C) array
+        found = [
+            i for i, polygon in enumerate(polygons) if polygon is not None and polygon.any()
+        ]
+        reading_images = list(images)
+        if found:
+            rois = extract_roi_batch(
+                [images[i] for i in found],
+                [polygons[i] for i in found],
+                (target_w, target_h),
+                "Reading",
+            )
+            for i, roi in zip(found, rois):
+                reading_images[i] = roi
+        return reading_images
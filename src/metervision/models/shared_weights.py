@@ -0,0 +1,296 @@
+"""
+Memory-mapped model weights shared between processes.
+
+`torch.load` / `from_pretrained` copy every weight into private memory, so N worker
+processes hold N copies of the TrOCR and YOLO weights. This module converts the
+artifacts under `custom models/` once into safetensors files and loads them back
+with `mmap`: the parameters are views of the mapped file, so every process on the
+host reads the same physical (page-cache) pages.
+
+Features:
+- `convert_model_weights` writes, under `shared_weights_dir`:
+  display_roi_model.safetensors / reading_roi_model.safetensors (+ .yaml architecture)
+  and ocr_model/ (config, processor files, model.safetensors).
+- YOLO weights are stored already fused (conv + batch-norm), because fusing at load
+  time would create new private tensors.
+- Mappings are copy-on-write (`ACCESS_COPY`): pages stay shared as long as nobody
+  writes to them, which inference never does.
+- `memory_report` returns the unique (USS), proportional (PSS) and shared memory of
+  a process, to compare private vs mapped loading.
+
+CLI:
+    python -m metervision.models.shared_weights
+"""
+
+import argparse
+import contextlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+import yaml
+
+from metervision.constants import DIR_CONFIG_FILE
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+
+SHARED_MARKER = "shared_weights.json"
+SAFETENSORS_NAME = "model.safetensors"
+
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# safetensors I/O
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def save_state_dict(module: torch.nn.Module, path: str, metadata: Dict[str, str]) -> None:
+    """Save a module's state dict as safetensors, storing tied tensors only once."""
+    from safetensors.torch import save_file
+
+    tensors, seen = {}, set()
+    for name, tensor in module.state_dict().items():
+        key = (tensor.data_ptr(), tuple(tensor.shape), tensor.dtype)
+        if tensor.numel() and key in seen:
+            continue
+        seen.add(key)
+        tensors[name] = tensor.detach().cpu().contiguous()
+    save_file(tensors, path, metadata=metadata)
+
+
+def mmap_safetensors(path: str) -> Tuple[Dict[str, torch.Tensor], Dict[str, str]]:
+    """
+    Map a safetensors file and return (tensors, metadata) without copying the data.
+
+    Every tensor is a view of one copy-on-write mapping of the file; the mapping
+    lives as long as any of the tensors does.
+    """
+    with open(path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    metadata = header.pop("__metadata__", {}) or {}
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        dtype = _DTYPES[info["dtype"]]
+        shape = info["shape"]
+        start, end = info["data_offsets"]
+        count = (end - start) // torch.empty(0, dtype=dtype).element_size()
+        if count == 0:
+            tensors[name] = torch.empty(shape, dtype=dtype)
+            continue
+        tensors[name] = torch.frombuffer(
+            mapped, dtype=dtype, count=count, offset=data_start + start
+        ).view(shape)
+    return tensors, metadata
+
+
+def _assign_weights(
+    module: torch.nn.Module, tensors: Dict[str, torch.Tensor], strict: bool = True
+) -> Any:
+    """Make the module's parameters/buffers *be* the mapped tensors (no copy)."""
+    result = module.load_state_dict(tensors, strict=strict, assign=True)
+    if result.unexpected_keys:
+        raise ValueError(f"Unexpected weights: {result.unexpected_keys[:5]}")
+    return result
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# TrOCR
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def is_shared_trocr(model_source: str) -> bool:
+    return os.path.isfile(os.path.join(model_source, SHARED_MARKER))
+
+
+def convert_trocr(model_source: str, output_dir: str) -> str:
+    """Write config, processor and mmap-able fp32 weights of a TrOCR model."""
+    from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = VisionEncoderDecoderModel.from_pretrained(model_source).float().eval()
+    model.config.save_pretrained(output_dir)
+    if model.generation_config is not None:
+        model.generation_config.save_pretrained(output_dir)
+    TrOCRProcessor.from_pretrained(model_source).save_pretrained(output_dir)
+
+    save_state_dict(model, os.path.join(output_dir, SAFETENSORS_NAME), {"format": "pt"})
+    with open(os.path.join(output_dir, SHARED_MARKER), "w", encoding="utf-8") as f:
+        json.dump({"source": str(model_source), "kind": "trocr"}, f)
+    return output_dir
+
+
+def load_shared_trocr(model_dir: str):
+    """Build the TrOCR model from its config and assign the mapped weights."""
+    from transformers import (GenerationConfig, VisionEncoderDecoderConfig,
+                              VisionEncoderDecoderModel)
+
+    try:
+        from transformers.modeling_utils import no_init_weights
+    except ImportError:
+        no_init_weights = contextlib.nullcontext
+
+    config = VisionEncoderDecoderConfig.from_pretrained(model_dir)
+    # weights are replaced right away, so skip their random initialization
+    with no_init_weights():
+        model = VisionEncoderDecoderModel(config)
+
+    tensors, _ = mmap_safetensors(os.path.join(model_dir, SAFETENSORS_NAME))
+    result = _assign_weights(model, tensors, strict=False)
+    model.tie_weights()  # tied weights were stored once
+    mapped = {tensor.data_ptr() for tensor in tensors.values()}
+    state = model.state_dict()
+    untied = [key for key in result.missing_keys if state[key].data_ptr() not in mapped]
+    if untied:
+        raise ValueError(f"Missing weights: {untied[:5]}")
+
+    with contextlib.suppress(Exception):
+        model.generation_config = GenerationConfig.from_pretrained(model_dir)
+    return model.eval()
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# YOLO
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def is_shared_yolo(model_path: str) -> bool:
+    return str(model_path).endswith(".safetensors")
+
+
+def convert_yolo(model_path: str, task: str, output_path: str) -> str:
+    """Write the fused fp32 weights (.safetensors) and architecture (.yaml) of a YOLO model."""
+    from ultralytics import YOLO
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    yolo = YOLO(model=model_path, task=task)
+    net = yolo.model.float().fuse(verbose=False).eval()
+
+    with open(os.path.splitext(output_path)[0] + ".yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(net.yaml, f)
+    metadata = {
+        "task": task,
+        "names": json.dumps({int(k): v for k, v in net.names.items()}),
+        "imgsz": str(yolo.overrides.get("imgsz", 640)),
+    }
+    save_state_dict(net, output_path, metadata)
+    return output_path
+
+
+def load_shared_yolo(model_path: str, task: str):
+    """Build the YOLO model from its .yaml, fuse it, and assign the mapped weights."""
+    from ultralytics import YOLO
+
+    tensors, metadata = mmap_safetensors(model_path)
+    yolo = YOLO(model=os.path.splitext(model_path)[0] + ".yaml", task=task, verbose=False)
+    net = yolo.model.fuse(verbose=False)
+    _assign_weights(net, tensors)
+    net.names = {int(k): v for k, v in json.loads(metadata["names"]).items()}
+    yolo.overrides["imgsz"] = int(metadata.get("imgsz", 640))
+    net.eval()
+    return yolo
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Conversion & reporting
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def shared_model_paths(shared_dir: str) -> Dict[str, str]:
+    """Locations of the converted artifacts inside `shared_dir`."""
+    return {
+        "display_roi_model": os.path.join(shared_dir, "display_roi_model.safetensors"),
+        "reading_roi_model": os.path.join(shared_dir, "reading_roi_model.safetensors"),
+        "trocr_model": os.path.join(shared_dir, "ocr_model"),
+    }
+
+
+def convert_model_weights(
+    shared_dir: Optional[str] = None, overwrite: bool = False
+) -> Dict[str, str]:
+    """
+    Convert the configured display, reading and TrOCR models to mmap-able files.
+
+    Parameters
+    ----------
+    shared_dir : Optional[str]
+        Output folder; defaults to `shared_weights_dir` from the directory config.
+    overwrite : bool
+        Re-convert artifacts that already exist.
+
+    Returns
+    -------
+    Dict[str, str]
+        Converted artifact path per model key.
+    """
+    try:
+        shared_dir = shared_dir or DIR_CONFIG_FILE.shared_weights_dir
+        paths = shared_model_paths(shared_dir)
+
+        if overwrite or not os.path.exists(paths["display_roi_model"]):
+            convert_yolo(DIR_CONFIG_FILE.display_roi_model, "obb", paths["display_roi_model"])
+        if overwrite or not os.path.exists(paths["reading_roi_model"]):
+            convert_yolo(DIR_CONFIG_FILE.reading_roi_model, "detect", paths["reading_roi_model"])
+        if overwrite or not is_shared_trocr(paths["trocr_model"]):
+            if os.path.isdir(paths["trocr_model"]):
+                shutil.rmtree(paths["trocr_model"])
+            convert_trocr(DIR_CONFIG_FILE.trocr_model, paths["trocr_model"])
+
+        logging.info(f"Shared (mmap) weights ready in {shared_dir}")
+        return paths
+    except Exception as e:
+        raise CustomException(str(e), sys)
+
+
+def memory_report(pid: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Unique vs shared memory of a process, in MB.
+
+    `uss` is memory only this process holds; `pss` charges each shared page to
+    its sharers proportionally (so it sums correctly across processes); `shared`
+    is resident memory backed by shared pages. PSS/shared are Linux-only.
+    """
+    import psutil
+
+    info = psutil.Process(pid).memory_full_info()
+    report = {"pid": pid or os.getpid()}
+    for field in ("rss", "uss", "pss", "shared"):
+        value = getattr(info, field, None)
+        report[f"{field}_mb"] = round(value / 2**20, 1) if value is not None else None
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert the model weights to shared, memory-mappable safetensors."
+    )
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    for name, path in convert_model_weights(args.output_dir, args.overwrite).items():
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
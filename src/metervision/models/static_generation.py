@@ -0,0 +1,416 @@
+"""
+Greedy TrOCR decoding with a static KV cache and a compiled decoder step.
+
+`model.generate` runs the decoder eagerly and grows the self-attention cache by
+concatenation at every token, so for short readings most of the time goes to Python
+and dispatcher overhead. `StaticCacheGenerator` decodes the same greedy sequence with:
+
+Features:
+- one encoder pass per batch, with the cross-attention keys/values of every decoder
+  layer projected once and reused by all decode steps;
+- a self-attention KV cache preallocated to `max_new_tokens` (per batch-size
+  bucket) and written in place, so every step has the same shapes;
+- a single-token decoder step built from the model's own layers, compiled with
+  `torch.compile` (batch sizes are padded to powers of two to bound recompiles);
+- the generation settings the readings use: max length, min new tokens and
+  `logits_processor` (the digit-constrained reading decoding). Anything else
+  (beam search, sampling, n-gram blocking, ...) is reported as unsupported and the
+  caller falls back to `model.generate`.
+
+`warmup` compiles the step and checks that it decodes exactly the ids of
+`model.generate`, and `check_profile` does the same for each reading-decoding profile
+(its `logits_processor` included); on any mismatch or compile error the generator
+disables itself. Readings longer than the cache are cut, which is logged once.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import torch
+
+from metervision.logger.logs import logging
+
+# generation settings that must keep their neutral value for the static path
+_NEUTRAL_SETTINGS = {
+    "num_beams": (None, 1),
+    "do_sample": (None, False),
+    "num_beam_groups": (None, 1),
+    "penalty_alpha": (None,),
+    "no_repeat_ngram_size": (None, 0),
+    "encoder_no_repeat_ngram_size": (None, 0),
+    "repetition_penalty": (None, 1.0),
+    "encoder_repetition_penalty": (None, 1.0),
+    "bad_words_ids": (None,),
+    "force_words_ids": (None,),
+    "forced_bos_token_id": (None,),
+    "forced_eos_token_id": (None,),
+    "suppress_tokens": (None,),
+    "begin_suppress_tokens": (None,),
+    "sequence_bias": (None,),
+    "exponential_decay_length_penalty": (None,),
+    "constraints": (None,),
+    "prefix_allowed_tokens_fn": (None,),
+    "stopping_criteria": (None,),
+    "num_return_sequences": (None, 1),
+    "return_dict_in_generate": (None, False),
+    "output_scores": (None, False),
+    "assistant_model": (None,),
+}
+
+
+def _bucket(batch_size: int) -> int:
+    """Next power of two: the compiled step only sees a few batch shapes."""
+    return 1 << max(0, batch_size - 1).bit_length()
+
+
+class StaticCacheGenerator:
+    """
+    Static-KV-cache greedy decoder for a TrOCR `VisionEncoderDecoderModel`.
+
+    Parameters
+    ----------
+    model : VisionEncoderDecoderModel
+        Loaded TrOCR model (eval mode); its modules are used as they are.
+    max_new_tokens : int
+        Size of the self-attention cache, i.e. the longest reading decoded.
+    compile : bool
+        Compile the decoder step with `torch.compile` (eager static step otherwise).
+    """
+
+    def __init__(self, model, max_new_tokens: int = 32, compile: bool = True):
+        self.model = model
+        self.device = next(model.parameters()).device
+        decoder_lm = model.decoder
+        self.decoder = decoder_lm.model.decoder  # TrOCRForCausalLM -> wrapper -> TrOCRDecoder
+        self.output_projection = decoder_lm.output_projection
+        self.layers = list(self.decoder.layers)
+        self.enc_to_dec_proj = getattr(model, "enc_to_dec_proj", None)
+
+        attention = self.layers[0].self_attn
+        config = model.config.decoder
+        self.num_heads = getattr(attention, "num_heads", config.decoder_attention_heads)
+        self.head_dim = getattr(attention, "head_dim", config.hidden_size // self.num_heads)
+
+        # newer versions scale inside the embedding module
+        embed_tokens = self.decoder.embed_tokens
+        self.embed_scale = 1.0
+        if not hasattr(embed_tokens, "embed_scale"):
+            self.embed_scale = getattr(self.decoder, "embed_scale", 1.0)
+
+        max_positions = getattr(config, "max_position_embeddings", max_new_tokens + 1)
+        self.max_new_tokens = min(max_new_tokens, max_positions - 1)
+        self.cache_length = self.max_new_tokens + 1
+        self.positions = self._position_table(self.cache_length)
+        self.cache_positions = torch.arange(self.cache_length, device=self.device)
+        self.step_positions = [
+            torch.tensor(step, device=self.device) for step in range(self.cache_length)
+        ]
+        self._caches: Dict[int, Tuple[torch.Tensor, torch.Tensor]] = {}
+        self._lock = threading.Lock()  # the caches serve one batch at a time
+
+        self.compiled = False
+        self._cap_warned = False
+        self._step_fn = self._step
+        if compile and hasattr(torch, "compile"):
+            self._step_fn = torch.compile(self._step, dynamic=False)
+            self.compiled = True
+        self.enabled = True
+
+    # --------------------------------------------------------------------------------------------------------------
+    # Setup
+    # --------------------------------------------------------------------------------------------------------------
+
+    @torch.inference_mode()
+    def _position_table(self, length: int) -> torch.Tensor:
+        """Position embedding of every decode step, (length, hidden), computed once."""
+        config = self.model.config
+        token = config.decoder_start_token_id
+        if token is None or token == config.decoder.pad_token_id:
+            token = config.decoder.bos_token_id
+        dummy = torch.full((1, length), int(token), dtype=torch.long, device=self.device)
+        table = self.decoder.embed_positions(dummy)
+        return table.reshape(-1, length, table.shape[-1])[0].contiguous()
+
+    def _settings(self, generate_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        settings = self.model.generation_config.to_dict()
+        settings.update(generate_kwargs)
+        return settings
+
+    def supports(self, generate_kwargs: Dict[str, Any]) -> bool:
+        """Whether these generate kwargs describe plain greedy decoding we reproduce."""
+        settings = self._settings(generate_kwargs)
+        for key, neutral in _NEUTRAL_SETTINGS.items():
+            if settings.get(key) not in neutral:
+                return False
+        return True
+
+    def _cache(self, batch_size: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        if batch_size not in self._caches:
+            shape = (
+                len(self.layers),
+                batch_size,
+                self.num_heads,
+                self.cache_length,
+                self.head_dim,
+            )
+            # embeddings are never quantized, unlike the (dynamic INT8) linear layers
+            dtype = self.decoder.embed_tokens.weight.dtype
+            self._caches[batch_size] = (
+                torch.zeros(shape, dtype=dtype, device=self.device),
+                torch.zeros(shape, dtype=dtype, device=self.device),
+            )
+        return self._caches[batch_size]
+
+    # --------------------------------------------------------------------------------------------------------------
+    # Decoding
+    # --------------------------------------------------------------------------------------------------------------
+
+    def _heads(self, x: torch.Tensor) -> torch.Tensor:
+        """(B, T, H * Dh) -> (B, H, T, Dh)"""
+        return x.view(x.shape[0], -1, self.num_heads, self.head_dim).transpose(1, 2)
+
+    def _attend(
+        self,
+        query: torch.Tensor,
+        keys: torch.Tensor,
+        values: torch.Tensor,
+        mask: Optional[torch.Tensor],
+    ) -> torch.Tensor:
+        scores = query @ keys.transpose(-1, -2)
+        if mask is not None:
+            scores = scores + mask
+        context = torch.softmax(scores, dim=-1) @ values
+        return context.transpose(1, 2).reshape(query.shape[0], 1, -1)
+
+    def _step(
+        self,
+        tokens: torch.Tensor,
+        position: torch.Tensor,
+        self_keys: torch.Tensor,
+        self_values: torch.Tensor,
+        cross_keys: torch.Tensor,
+        cross_values: torch.Tensor,
+    ) -> torch.Tensor:
+        """One decoder token for the whole batch; writes its keys/values at `position`."""
+        hidden = self.decoder.embed_tokens(tokens)[:, None, :] * self.embed_scale
+        hidden = hidden + self.positions.index_select(0, position.view(1))[None]
+        if getattr(self.decoder, "layernorm_embedding", None) is not None:
+            hidden = self.decoder.layernorm_embedding(hidden)
+
+        # cache slots after `position` are not written yet
+        mask = torch.zeros(self.cache_length, dtype=hidden.dtype, device=hidden.device)
+        mask = mask.masked_fill(self.cache_positions > position, float("-inf"))
+
+        for i, layer in enumerate(self.layers):
+            attention = layer.self_attn
+            query = self._heads(attention.q_proj(hidden) * attention.scaling)
+            self_keys[i].index_copy_(2, position.view(1), self._heads(attention.k_proj(hidden)))
+            self_values[i].index_copy_(2, position.view(1), self._heads(attention.v_proj(hidden)))
+            context = self._attend(query, self_keys[i], self_values[i], mask)
+            hidden = layer.self_attn_layer_norm(hidden + attention.out_proj(context))
+
+            attention = layer.encoder_attn
+            query = self._heads(attention.q_proj(hidden) * attention.scaling)
+            context = self._attend(query, cross_keys[i], cross_values[i], None)
+            hidden = layer.encoder_attn_layer_norm(hidden + attention.out_proj(context))
+
+            feed_forward = layer.fc2(layer.activation_fn(layer.fc1(hidden)))
+            hidden = layer.final_layer_norm(hidden + feed_forward)
+
+        if getattr(self.decoder, "layer_norm", None) is not None:
+            hidden = self.decoder.layer_norm(hidden)
+        return self.output_projection(hidden)[:, 0, :]
+
+    def _encode(self, pixel_values: torch.Tensor, batch_size: int):
+        """Encoder pass + cross-attention keys/values of every layer, (L, B, H, S, Dh)."""
+        encoded = self.model.encoder(pixel_values=pixel_values).last_hidden_state
+        if self.enc_to_dec_proj is not None:
+            encoded = self.enc_to_dec_proj(encoded)
+        if batch_size > encoded.shape[0]:
+            padding = encoded.new_zeros((batch_size - encoded.shape[0],) + encoded.shape[1:])
+            encoded = torch.cat([encoded, padding])
+
+        keys = [self._heads(layer.encoder_attn.k_proj(encoded)) for layer in self.layers]
+        values = [self._heads(layer.encoder_attn.v_proj(encoded)) for layer in self.layers]
+        return torch.stack(keys), torch.stack(values)
+
+    @staticmethod
+    def _requested_new_tokens(settings: Dict[str, Any]) -> int:
+        if settings.get("max_new_tokens") is not None:
+            return int(settings["max_new_tokens"])
+        return int(settings.get("max_length") or 20) - 1
+
+    def _max_new_tokens(self, settings: Dict[str, Any]) -> int:
+        """Requested new tokens, capped at the cache size."""
+        return min(self._requested_new_tokens(settings), self.max_new_tokens)
+
+    def _token_ids(self, settings: Dict[str, Any]) -> Tuple[int, List[int], int]:
+        config = self.model.config
+        start = settings.get("decoder_start_token_id")
+        if start is None:
+            start = config.decoder_start_token_id
+        eos = settings.get("eos_token_id")
+        if eos is None:
+            eos = config.eos_token_id
+            if eos is None:
+                eos = config.decoder.eos_token_id
+        eos = [eos] if isinstance(eos, int) else list(eos or [])
+        pad = settings.get("pad_token_id")
+        if pad is None:
+            pad = config.pad_token_id if config.pad_token_id is not None else eos[0]
+        return int(start), eos, int(pad)
+
+    def generate(
+        self, pixel_values: torch.Tensor, generate_kwargs: Dict[str, Any]
+    ) -> torch.Tensor:
+        """
+        Greedy-decode a batch, like `model.generate(pixel_values, **generate_kwargs)`.
+
+        Parameters
+        ----------
+        pixel_values : torch.Tensor
+            (N, 3, H, W) encoder input, already on the model's device.
+        generate_kwargs : Dict[str, Any]
+            Settings accepted by `supports`.
+
+        Returns
+        -------
+        torch.Tensor
+            (N, sequence) token ids starting with the decoder start token; sequences
+            that finished early are padded, as `generate` does.
+        """
+        settings = self._settings(generate_kwargs)
+        max_new_tokens = self._max_new_tokens(settings)
+        min_new_tokens = int(settings.get("min_new_tokens") or 0)
+        min_new_tokens = max(min_new_tokens, int(settings.get("min_length") or 0) - 1)
+        logits_processor = settings.get("logits_processor")
+        start, eos, pad = self._token_ids(settings)
+
+        batch_size = pixel_values.shape[0]
+        padded_size = _bucket(batch_size) if self.compiled else batch_size
+        eos_ids = torch.tensor(eos, device=self.device)
+
+        with self._lock, torch.inference_mode():
+            cross_keys, cross_values = self._encode(pixel_values, padded_size)
+            self_keys, self_values = self._cache(padded_size)
+
+            tokens = torch.full((padded_size,), start, dtype=torch.long, device=self.device)
+            generated = [tokens[:batch_size].clone()]
+            finished = torch.zeros(batch_size, dtype=torch.bool, device=self.device)
+
+            for step in range(max_new_tokens):
+                logits = self._step_fn(
+                    tokens,
+                    self.step_positions[step],
+                    self_keys,
+                    self_values,
+                    cross_keys,
+                    cross_values,
+                )[:batch_size].float()
+
+                if step < min_new_tokens:
+                    logits[:, eos_ids] = float("-inf")
+                if logits_processor is not None:
+                    logits = logits_processor(torch.stack(generated, dim=1), logits)
+
+                next_tokens = logits.argmax(dim=-1)
+                next_tokens = torch.where(finished, torch.full_like(next_tokens, pad), next_tokens)
+                generated.append(next_tokens)
+                finished |= torch.isin(next_tokens, eos_ids)
+                if bool(finished.all()):
+                    break
+
+                tokens = tokens.clone()
+                tokens[:batch_size] = next_tokens
+
+        return torch.stack(generated, dim=1)
+
+    # --------------------------------------------------------------------------------------------------------------
+    # Warm-up
+    # --------------------------------------------------------------------------------------------------------------
+
+    def warmup(
+        self, generate_kwargs: Dict[str, Any], batch_sizes: Iterable[int] = (1,)
+    ) -> bool:
+        """
+        Compile the step for `batch_sizes` and check it against `model.generate`.
+
+        Disables the generator (so callers fall back to `generate`) when the kwargs
+        are unsupported, compilation fails, or the decoded ids differ.
+        """
+        if not self.supports(generate_kwargs):
+            logging.warning("Static decoding: generate settings not supported; using generate")
+            self.enabled = False
+            return False
+        if not self._check(generate_kwargs, list(batch_sizes), "default settings"):
+            return False
+
+        logging.info(
+            f"Static decoding ready (cache {self.max_new_tokens} tokens, "
+            f"compiled={self.compiled}, batch sizes {list(batch_sizes)})"
+        )
+        return True
+
+    def check_profile(
+        self, name: str, generate_kwargs: Dict[str, Any], batch_size: int = 1
+    ) -> bool:
+        """
+        Check a reading-decoding profile (e.g. its digit-constrained
+        `logits_processor`) against `model.generate`; disables the generator on a
+        mismatch. A profile with unsupported settings keeps decoding with `generate`.
+        """
+        if not self.enabled:
+            return False
+        if not self.supports(generate_kwargs):
+            logging.info(f"Static decoding: meter type '{name}' decodes with generate")
+            return True
+        return self._check(generate_kwargs, [batch_size], f"meter type '{name}'")
+
+    def _check(
+        self, generate_kwargs: Dict[str, Any], batch_sizes: List[int], label: str
+    ) -> bool:
+        """Decode random inputs with both paths; False (and disabled) if they differ."""
+        requested = self._requested_new_tokens(self._settings(generate_kwargs))
+        if requested > self.max_new_tokens and not self._cap_warned:
+            self._cap_warned = True
+            logging.warning(
+                f"Static decoding: readings are cut at {self.max_new_tokens} tokens, "
+                f"generate allows {requested} ({label}); raise "
+                f"static_decoding.max_new_tokens for longer readings"
+            )
+
+        # compare like for like: readings longer than the cache are cut by design
+        generate_kwargs = {
+            key: value for key, value in generate_kwargs.items() if key != "max_length"
+        }
+        generate_kwargs["max_new_tokens"] = min(requested, self.max_new_tokens)
+
+        encoder_config = self.model.config.encoder
+        size = getattr(encoder_config, "image_size", 384)
+        size = tuple(size) if isinstance(size, (list, tuple)) else (size, size)
+        generator = torch.Generator().manual_seed(0)
+
+        for batch_size in batch_sizes:
+            pixel_values = torch.rand((batch_size, 3) + size, generator=generator) * 2 - 1
+            pixel_values = pixel_values.to(self.device)
+            try:
+                static_ids = self.generate(pixel_values, generate_kwargs)
+            except Exception as exc:
+                if not self.compiled:
+                    raise
+                logging.warning(f"Static decoding: compile failed ({exc}); using eager steps")
+                self._step_fn, self.compiled = self._step, False
+                static_ids = self.generate(pixel_values, generate_kwargs)
+
+            with torch.inference_mode():
+                eager_ids = self.model.generate(pixel_values, **generate_kwargs)
+            if static_ids.shape != eager_ids.shape or not torch.equal(
+                static_ids.to(eager_ids.device), eager_ids
+            ):
+                logging.warning(
+                    f"Static decoding differs from generate ({label}, batch {batch_size}); "
+                    f"disabled"
+                )
+                self.enabled = False
+                return False
+        return True
@@ -0,0 +1,249 @@
+"""
+In-process metrics for MeterVision, exported in Prometheus text format.
+
+A dependency-free registry of counters and histograms (thread-safe, label support)
+plus the metrics the pipeline records:
+
+Features:
+- `metervision_stage_seconds{stage}`: latency histogram per stage (decode, crop,
+  display, reading, ocr, total, ...). Stages nest: "display" includes its crop.
+- `metervision_detection_misses_total{stage}`: display / reading not detected.
+- `metervision_empty_readings_total`: OCR returned an empty string.
+- `metervision_images_total{entrypoint}`: images served per pipeline method.
+- `metervision_gate_checks_total{gate}` and `metervision_gate_rejections_total{gate}`:
+  early-exit gates of the pipeline (meter, display, reading; see pipeline.gating).
+- `metervision_batch_size{component}` and `metervision_queue_wait_seconds{component}`
+  for the pipeline, the server micro-batcher and the app executor.
+
+`stage_timer` times a block, records it and (if tracing is enabled) wraps it in a
+span; inside a profiling capture it also marks the stage (`profiling.stage`), and
+inside `collect_stage_times` it adds the time to the caller's per-request dict.
+
+`render_prometheus` returns the text exposition; the inference server serves it on
+GET /metrics and `start_metrics_server` exposes it for the Streamlit app.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from metervision.monitoring import profiling, tracing
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_STAGE_TIMES: contextvars.ContextVar = contextvars.ContextVar(
+    "metervision_stage_times", default=None
+)
+
+
+def _label_text(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter, optionally per label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels.get(n, "")) for n in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_label_text(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally per label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self, **labels: str) -> Optional[Dict[str, float]]:
+        """Count and sum of one series (None if never observed)."""
+        series = self._values.get(tuple(str(labels.get(n, "")) for n in self.labelnames))
+        return None if series is None else {"count": series[-2], "sum": series[-1]}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = _label_text(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+            inf = _label_text(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {series[-2]}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {series[-2]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics; `counter` / `histogram` get or create."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "metervision_stage_seconds", "Latency of each pipeline stage.", ["stage"]
+)
+DETECTION_MISSES = REGISTRY.counter(
+    "metervision_detection_misses_total",
+    "Images where the display or reading detector found no box.",
+    ["stage"],
+)
+EMPTY_READINGS = REGISTRY.counter(
+    "metervision_empty_readings_total", "OCR calls that returned an empty reading."
+)
+IMAGES = REGISTRY.counter(
+    "metervision_images_total", "Images served, per pipeline entry point.", ["entrypoint"]
+)
+GATE_CHECKS = REGISTRY.counter(
+    "metervision_gate_checks_total", "Images checked by each early-exit gate.", ["gate"]
+)
+GATE_REJECTIONS = REGISTRY.counter(
+    "metervision_gate_rejections_total",
+    "Images rejected by each early-exit gate (later stages skipped).",
+    ["gate"],
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "metervision_batch_size", "Images per batch.", ["component"], BATCH_BUCKETS
+)
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "metervision_queue_wait_seconds",
+    "Time a request waited in a queue before its batch started.",
+    ["component"],
+)
+
+
+@contextmanager
+def stage_timer(stage: str, **attributes) -> Iterator[None]:
+    """Observe the block's duration in `metervision_stage_seconds{stage}` (+ a span)."""
+    with tracing.span(f"metervision.{stage}", **attributes), profiling.stage(stage):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start_time
+            STAGE_SECONDS.observe(seconds, stage=stage)
+            collected = _STAGE_TIMES.get()
+            if collected is not None:
+                collected[stage] = collected.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def collect_stage_times() -> Iterator[Dict[str, float]]:
+    """Collect the seconds spent per stage by the enclosed pipeline call(s)."""
+    collected: Dict[str, float] = {}
+    token = _STAGE_TIMES.set(collected)
+    try:
+        yield collected
+    finally:
+        _STAGE_TIMES.reset(token)
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:  # keep scrapes out of the app log
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve GET /metrics on a daemon thread (for processes without an HTTP server)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,343 @@
+"""
+On-demand profiling of pipeline requests (cProfile + torch profiler).
+
+Off by default. It can be switched on at runtime, without a redeploy, for the next
+`requests` pipeline calls and/or a random `sample_fraction` of them:
+
+- the `profiling` section of parameter_config.yaml (read on first use);
+- the METERVISION_PROFILE environment variable, e.g. "requests=20" or
+  "fraction=0.01,torch=0" (overrides the config);
+- the inference server's admin endpoint, POST /admin/profile (when `allow_admin`);
+- `start_profiling()` / `stop_profiling()` from code.
+
+Features:
+- Each captured request (a top-level `predict`, `predict_batch`, `predict_files` or
+  `predict_multi` call) writes into `profiles_dir`:
+  - <name>.prof: cProfile stats (pstats, snakeviz);
+  - <name>.collapsed: collapsed stacks for flamegraph.pl / speedscope, built from
+    the cProfile call graph (time is split between callers proportionally);
+  - <name>.trace.json: torch profiler Chrome trace (chrome://tracing, Perfetto),
+    with every pipeline stage as a labelled range;
+  - <name>.json: entry point and wall time of every stage.
+- One capture at a time (the torch profiler is process-wide); requests arriving
+  during a capture are served normally and do not use up the budget.
+- When nothing is scheduled, a request and its stages only check a flag (a few
+  microseconds in total).
+"""
+
+import cProfile
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from metervision.logger.logs import logging
+
+ENV_VAR = "METERVISION_PROFILE"
+MIN_STACK_SHARE = 0.001  # collapsed stacks: drop subtrees below 0.1% of the request
+
+_LOCK = threading.Lock()
+_STATE: Dict[str, Any] = {
+    "remaining": 0,
+    "fraction": 0.0,
+    "torch": True,
+    "output_dir": None,
+    "capturing": False,
+    "captured": 0,
+}
+_ACTIVE = False  # fast path: is any capture scheduled?
+_LOADED = False
+_CAPTURE: contextvars.ContextVar = contextvars.ContextVar("metervision_profile", default=None)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Switching on / off
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def parse_env(value: str) -> Dict[str, Any]:
+    """Parse METERVISION_PROFILE ("requests=20,fraction=0.01,torch=0")."""
+    options: Dict[str, Any] = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        key, _, raw = part.partition("=")
+        key = key.strip().lower()
+        if key == "requests":
+            options["requests"] = int(raw)
+        elif key == "fraction":
+            options["fraction"] = float(raw)
+        elif key == "torch":
+            options["torch_profiler"] = raw.strip().lower() not in ("0", "false", "no")
+        else:
+            raise ValueError(f"Unknown {ENV_VAR} option '{key}'")
+    return options
+
+
+def _load_settings() -> None:
+    global _LOADED
+    _LOADED = True
+    # imported lazily, like tracing: metrics (used by the utils) imports this module
+    from metervision.constants import PARAMS_CONFIG_FILE
+
+    params = PARAMS_CONFIG_FILE.profiling
+    options = {
+        "requests": params.requests,
+        "fraction": params.sample_fraction,
+        "torch_profiler": params.torch_profiler,
+    }
+    if os.environ.get(ENV_VAR):
+        options.update(parse_env(os.environ[ENV_VAR]))
+    if options["requests"] or options["fraction"]:
+        start_profiling(**options)
+
+
+def start_profiling(
+    requests: int = 0,
+    fraction: float = 0.0,
+    torch_profiler: Optional[bool] = None,
+    output_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Profile the next `requests` pipeline calls and/or a random `fraction` of them.
+
+    Parameters
+    ----------
+    requests : int
+        Number of upcoming requests to capture.
+    fraction : float
+        Probability of capturing any request (after `requests` are used up).
+    torch_profiler : Optional[bool]
+        Also record a torch profiler trace; unchanged if None.
+    output_dir : Optional[str]
+        Where to write the profiles; `profiles_dir` from the directory config if None.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The new status (see `profiling_status`).
+    """
+    global _ACTIVE, _LOADED
+    if not 0.0 <= fraction <= 1.0:
+        raise ValueError("fraction must be between 0 and 1")
+    with _LOCK:
+        _LOADED = True
+        _STATE["remaining"] = max(0, int(requests))
+        _STATE["fraction"] = float(fraction)
+        if torch_profiler is not None:
+            _STATE["torch"] = bool(torch_profiler)
+        if output_dir is not None:
+            _STATE["output_dir"] = output_dir
+        _ACTIVE = bool(_STATE["remaining"] or _STATE["fraction"])
+    logging.info(f"Profiling scheduled: {profiling_status()}")
+    return profiling_status()
+
+
+def stop_profiling() -> Dict[str, Any]:
+    """Cancel any scheduled captures (a capture in progress still completes)."""
+    return start_profiling(requests=0, fraction=0.0)
+
+
+def profiling_status() -> Dict[str, Any]:
+    with _LOCK:
+        return {
+            "active": _ACTIVE,
+            "remaining_requests": _STATE["remaining"],
+            "sample_fraction": _STATE["fraction"],
+            "torch_profiler": _STATE["torch"],
+            "capturing": _STATE["capturing"],
+            "captured": _STATE["captured"],
+        }
+
+
+def _claim() -> bool:
+    """Decide (atomically) whether the current request is captured."""
+    global _ACTIVE
+    with _LOCK:
+        if _STATE["capturing"]:
+            return False
+        if _STATE["remaining"] > 0:
+            _STATE["remaining"] -= 1
+        elif not (_STATE["fraction"] and random.random() < _STATE["fraction"]):
+            return False
+        _ACTIVE = bool(_STATE["remaining"] or _STATE["fraction"])
+        _STATE["capturing"] = True
+        return True
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Capture
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def _start_torch_profiler():
+    try:
+        import torch
+        from torch.profiler import ProfilerActivity, profile, record_function
+    except ImportError:
+        return None, None
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    try:
+        profiler = profile(activities=activities)
+        profiler.__enter__()
+    except Exception as exc:
+        logging.warning(f"torch profiler unavailable for this capture: {exc}")
+        return None, None
+    return profiler, record_function
+
+
+@contextmanager
+def profile_request(entrypoint: str) -> Iterator[None]:
+    """Capture the enclosed pipeline call if a profile is scheduled for it."""
+    if not _LOADED:
+        _load_settings()
+    if not _ACTIVE or _CAPTURE.get() is not None or not _claim():
+        yield
+        return
+
+    record: Dict[str, Any] = {"entrypoint": entrypoint, "stages": [], "record_function": None}
+    torch_profiler = None
+    profiler: Optional[cProfile.Profile] = cProfile.Profile()
+    try:
+        if _STATE["torch"]:
+            torch_profiler, record["record_function"] = _start_torch_profiler()
+        token = _CAPTURE.set(record)
+        try:
+            profiler.enable()
+        except ValueError as exc:  # another profiler already runs on this thread
+            logging.warning(f"cProfile unavailable for this capture: {exc}")
+            profiler = None
+
+        record["start"] = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["total_s"] = time.perf_counter() - record["start"]
+            if profiler is not None:
+                profiler.disable()
+            if torch_profiler is not None:
+                torch_profiler.__exit__(None, None, None)
+            _CAPTURE.reset(token)
+            _write_profile(record, profiler, torch_profiler)
+    finally:
+        with _LOCK:
+            _STATE["capturing"] = False
+            _STATE["captured"] += 1
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mark a pipeline stage inside a capture (no-op otherwise)."""
+    record = _CAPTURE.get()
+    if record is None:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    record_function = record["record_function"]
+    with record_function(f"metervision.{name}") if record_function else nullcontext():
+        try:
+            yield
+        finally:
+            record["stages"].append(
+                {
+                    "stage": name,
+                    "offset_s": round(start_time - record["start"], 6),
+                    "seconds": round(time.perf_counter() - start_time, 6),
+                }
+            )
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Export
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # built-ins
+        return name.replace(";", ",")
+    return f"{name} ({os.path.basename(filename)}:{lineno})".replace(";", ",")
+
+
+def collapsed_stacks(stats: Dict) -> Dict[str, int]:
+    """
+    Approximate collapsed stacks (stack -> microseconds) from cProfile stats.
+
+    cProfile keeps caller -> callee edges rather than full stacks, so a function's
+    time is attributed to each of its callers in proportion to the time spent
+    through that edge.
+    """
+    children = defaultdict(list)
+    for callee, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            if caller in stats:
+                children[caller].append((callee, edge[3]))
+
+    roots = [f for f, (_, _, _, _, callers) in stats.items() if not callers]
+    total = sum(stats[f][3] for f in roots) or 1.0
+    stacks: Dict[str, float] = defaultdict(float)
+
+    def walk(func, share: float, path: Tuple[str, ...], on_path: frozenset) -> None:
+        _, _, tottime, cumtime, _ = stats[func]
+        path = path + (_frame_label(func),)
+        if tottime * share > 0:
+            stacks[";".join(path)] += tottime * share * 1e6
+        for callee, edge_time in children.get(func, ()):
+            callee_cumtime = stats[callee][3]
+            if callee in on_path or callee_cumtime <= 0:
+                continue
+            callee_share = min(1.0, share * edge_time / callee_cumtime)
+            if callee_cumtime * callee_share >= MIN_STACK_SHARE * total:
+                walk(callee, callee_share, path, on_path | {callee})
+
+    for root in roots:
+        walk(root, 1.0, (), frozenset([root]))
+    return {stack: int(round(us)) for stack, us in stacks.items() if us >= 1}
+
+
+def _write_profile(record: Dict[str, Any], profiler, torch_profiler) -> None:
+    """Write the capture's files; failures are logged, never raised into the request."""
+    try:
+        output_dir = _STATE["output_dir"]
+        if output_dir is None:
+            from metervision.constants import DIR_CONFIG_FILE
+
+            output_dir = DIR_CONFIG_FILE.profiles_dir
+        os.makedirs(output_dir, exist_ok=True)
+        name = (
+            f"{time.strftime('%Y%m%d_%H%M%S')}_{record['entrypoint']}"
+            f"_{os.getpid()}_{_STATE['captured']}"
+        )
+        base = os.path.join(output_dir, name)
+        files = []
+
+        if profiler is not None:
+            profiler.dump_stats(f"{base}.prof")
+            profiler.create_stats()
+            with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+                for stack, us in sorted(collapsed_stacks(profiler.stats).items()):
+                    f.write(f"{stack} {us}\n")
+            files += [f"{base}.prof", f"{base}.collapsed"]
+
+        if torch_profiler is not None:
+            torch_profiler.export_chrome_trace(f"{base}.trace.json")
+            files.append(f"{base}.trace.json")
+
+        summary = {
+            "entrypoint": record["entrypoint"],
+            "total_s": round(record["total_s"], 6),
+            "stages": record["stages"],
+            "files": files,
+        }
+        with open(f"{base}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        logging.info(f"Profile of {record['entrypoint']} written to {base}.*")
+    except Exception as exc:
+        logging.error(f"Could not write profile: {exc}")
@@ -0,0 +1,92 @@
+"""
+Optional OpenTelemetry-style spans around pipeline stages.
+
+Disabled unless `metrics.tracing` is set in parameter_config.yaml. When enabled:
+
+- with the `opentelemetry-api` package installed (extra `otel`), spans go to the
+  globally configured OpenTelemetry tracer provider (exporters are configured the
+  usual OTel way, e.g. `opentelemetry-instrument` or the OTEL_* environment);
+- otherwise spans are kept in a small in-memory ring buffer with the same shape
+  (trace id, span id, parent id, name, start/end, attributes), readable through
+  `recent_spans()` and the inference server's GET /traces.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+_SETTINGS: Dict[str, Any] = {}
+_RECENT: Deque[Dict[str, Any]] = deque(maxlen=2048)
+_RECENT_LOCK = threading.Lock()
+_CURRENT: contextvars.ContextVar = contextvars.ContextVar("metervision_span", default=None)
+
+
+def configure(enabled: bool, max_spans: int = 2048) -> None:
+    """Turn tracing on/off (called with the `metrics` config section on first use)."""
+    global _RECENT
+    _SETTINGS["enabled"] = bool(enabled)
+    _SETTINGS["tracer"] = None
+    if enabled:
+        try:
+            from opentelemetry import trace
+
+            _SETTINGS["tracer"] = trace.get_tracer("metervision")
+        except ImportError:
+            pass
+    with _RECENT_LOCK:
+        _RECENT = deque(_RECENT, maxlen=max_spans)
+
+
+def _settings() -> Dict[str, Any]:
+    if "enabled" not in _SETTINGS:
+        # imported lazily: this module is used by utils that constants itself imports
+        from metervision.constants import PARAMS_CONFIG_FILE
+
+        configure(PARAMS_CONFIG_FILE.metrics.tracing, PARAMS_CONFIG_FILE.metrics.max_spans)
+    return _SETTINGS
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """Record `name` as a span (child of the current one) around the block."""
+    settings = _settings()
+    if not settings["enabled"]:
+        yield None
+        return
+
+    tracer = settings["tracer"]
+    if tracer is not None:
+        with tracer.start_as_current_span(name, attributes=attributes) as otel_span:
+            yield otel_span
+        return
+
+    parent = _CURRENT.get()
+    record = {
+        "trace_id": parent["trace_id"] if parent else os.urandom(16).hex(),
+        "span_id": os.urandom(8).hex(),
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start_unix_nano": time.time_ns(),
+        "attributes": dict(attributes),
+    }
+    token = _CURRENT.set(record)
+    try:
+        yield record
+    except Exception as exc:
+        record["status"] = f"error: {exc}"
+        raise
+    finally:
+        _CURRENT.reset(token)
+        record["end_unix_nano"] = time.time_ns()
+        with _RECENT_LOCK:
+            _RECENT.append(record)
+
+
+def recent_spans(limit: int = 200) -> List[Dict[str, Any]]:
+    """The last `limit` finished in-memory spans (oldest first)."""
+    with _RECENT_LOCK:
+        return list(_RECENT)[-limit:]
@@ -0,0 +1,144 @@
+"""
+Deadline-aware execution of single predictions (`predict_within(image, budget_ms)`).
+
+The detector and OCR settings are fixed at construction, so without a budget a slow
+request can only overrun. With a budget, the pipeline asks `LatencyBudget.choose`
+before each stage whether the time left still covers that stage and the later ones
+at full quality, and otherwise runs the stage with cheaper settings:
+
+Features:
+- `StageCosts`: learned cost of every stage and mode, an exponentially weighted mean
+  of the observed times, seeded from `latency_budget.initial_costs_ms` (degraded
+  modes start at a fraction of the full-quality cost);
+- degradations, in pipeline order:
+  - "display:small_input" / "reading:small_input": detector at `detector_imgsz`
+    instead of its default input size;
+  - "reading:skip": no reading re-detection inside the display crop, the display
+    crop itself goes to OCR;
+  - "ocr:short": greedy decoding capped at `short_max_new_tokens` tokens;
+- `LatencyBudget.report()`: budget, elapsed time, time per stage and the list of
+  degradations applied, returned with the prediction.
+
+`benchmarks/latency_budget_harness.py` shows how closely p99 latency follows the
+budget.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+DEGRADED_COST_RATIO = 0.5  # first guess for a degraded mode, before it is observed
+STAGES = ("display", "reading", "ocr")
+
+
+class StageCosts:
+    """
+    Thread-safe running estimate of each stage's cost, per mode.
+
+    Parameters
+    ----------
+    params : object
+        The `latency_budget` section of the parameter config.
+    """
+
+    def __init__(self, params):
+        self.smoothing = float(params.cost_smoothing)
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = {
+            stage: float(ms) / 1000 for stage, ms in dict(params.initial_costs_ms).items()
+        }
+        self._seconds.setdefault("reading:skip", 0.0)
+
+    def get(self, stage: str, mode: Optional[str] = None) -> float:
+        """Estimated seconds of `stage` run in `mode` (None = full quality)."""
+        key = f"{stage}:{mode}" if mode else stage
+        with self._lock:
+            if key in self._seconds:
+                return self._seconds[key]
+            return self._seconds.get(stage, 0.0) * DEGRADED_COST_RATIO
+
+    def observe(self, stage: str, mode: Optional[str], seconds: float) -> None:
+        key = f"{stage}:{mode}" if mode else stage
+        with self._lock:
+            previous = self._seconds.get(key)
+            self._seconds[key] = (
+                seconds
+                if previous is None
+                else previous + self.smoothing * (seconds - previous)
+            )
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current estimates in milliseconds."""
+        with self._lock:
+            return {key: round(s * 1000, 3) for key, s in self._seconds.items()}
+
+
+class LatencyBudget:
+    """
+    Deadline of one request and the degradations chosen to meet it.
+
+    Parameters
+    ----------
+    budget_ms : float
+        Latency budget of the request, in milliseconds.
+    costs : StageCosts
+        Shared stage cost estimates (updated with this request's stage times).
+    safety_factor : float
+        Estimated costs are multiplied by this before comparing with the time left.
+    """
+
+    def __init__(self, budget_ms: float, costs: StageCosts, safety_factor: float = 1.0):
+        if budget_ms <= 0:
+            raise ValueError("budget_ms must be positive")
+        self.budget_ms = float(budget_ms)
+        self.costs = costs
+        self.safety_factor = float(safety_factor)
+        self.start = time.perf_counter()
+        self.deadline = self.start + self.budget_ms / 1000
+        self.degradations: List[str] = []
+        self.stage_ms: Dict[str, float] = {}
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (negative once it has passed)."""
+        return self.deadline - time.perf_counter()
+
+    def choose(
+        self, stage: str, modes: Sequence[str], later: Sequence[str] = ()
+    ) -> Optional[str]:
+        """
+        Mode to run `stage` in: None (full quality) while the time left covers it and
+        the `later` stages at full quality, else the first of `modes` that fits, else
+        the cheapest of `modes`.
+        """
+        remaining = self.remaining()
+        later_cost = sum(self.costs.get(name) for name in later)
+        candidates: List[Optional[str]] = [None, *modes]
+        for mode in candidates:
+            cost = self.costs.get(stage, mode) + later_cost
+            if cost * self.safety_factor <= remaining:
+                return mode
+        return min(candidates, key=lambda mode: self.costs.get(stage, mode))
+
+    @contextmanager
+    def stage(self, stage: str, mode: Optional[str]) -> Iterator[None]:
+        """Time a stage run in `mode`, learn its cost and record the degradation."""
+        if mode:
+            self.degradations.append(f"{stage}:{mode}")
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start_time
+            self.stage_ms[stage] = round(seconds * 1000, 3)
+            self.costs.observe(stage, mode, seconds)
+
+    def report(self) -> Dict[str, Any]:
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        return {
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "within_budget": elapsed_ms <= self.budget_ms,
+            "degradations": list(self.degradations),
+            "stage_ms": dict(self.stage_ms),
+        }
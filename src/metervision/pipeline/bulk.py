@@ -0,0 +1,477 @@
+"""
+Bulk (headless) reading engine.
+
+This module streams meter images from a folder or a zip archive, fans them out to a
+process pool in which every worker owns its own `MeterVisionPipeline`, and appends
+the readings to CSV or Parquet as chunks complete.
+
+Features:
+- Images are decoded inside the workers; the parent only ships (source, names).
+- Results are persisted incrementally; a checkpoint file records every image whose
+  row is on disk, so an interrupted run resumes where it stopped.
+- A small JSON progress file is rewritten atomically after every chunk so that other
+  processes (e.g. the Streamlit "Bulk Data" page) can poll the job.
+- With `results_store.enabled`, every reading is also recorded in the results store
+  under the meter id taken from its image name (see `pipeline.results`).
+
+Note: rows are written before their names reach the checkpoint, so a crash between
+the two can repeat at most the last chunk on resume (at-least-once delivery).
+
+CLI:
+    python -m metervision.pipeline.bulk --source meters.zip --output readings.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from metervision.constants import DIR_CONFIG_FILE, PARAMS_CONFIG_FILE
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+from metervision.pipeline.results import RecordingPipeline, with_results_store
+from metervision.utils.file_utils import read_img
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+RESULT_COLUMNS = ["image", "reading", "status", "error"]
+
+# One pipeline per worker process, created by `_init_worker`
+_WORKER_PIPELINE = None
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Image sources
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def list_image_keys(source: str) -> List[str]:
+    """
+    List the images of a folder (recursively) or a zip archive.
+
+    Parameters
+    ----------
+    source : str
+        Folder path or path to a .zip archive.
+
+    Returns
+    -------
+    List[str]
+        Sorted image names (relative POSIX paths for folders, member names for zips).
+    """
+    try:
+        if os.path.isfile(source) and zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                names = [
+                    name
+                    for name in archive.namelist()
+                    if name.lower().endswith(IMAGE_SUFFIXES)
+                ]
+        elif os.path.isdir(source):
+            root = Path(source)
+            names = [
+                path.relative_to(root).as_posix()
+                for path in root.rglob("*")
+                if path.is_file() and path.name.lower().endswith(IMAGE_SUFFIXES)
+            ]
+        else:
+            raise ValueError(f"Source must be a folder or a zip archive: {source}")
+
+        return sorted(names)
+    except Exception as e:
+        raise CustomException(str(e), sys)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Worker side
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def _init_worker(cpu_num_threads: int) -> None:
+    """Process-pool initializer: load one pipeline per worker, pinned to its thread share."""
+    global _WORKER_PIPELINE
+
+    from metervision.pipeline.cache import with_prediction_cache
+    from metervision.pipeline.predictor import MeterVisionPipeline
+
+    # duplicate files across workers are shared through the on-disk cache tier
+    _WORKER_PIPELINE = with_prediction_cache(
+        MeterVisionPipeline(cpu_num_threads=cpu_num_threads),
+        PARAMS_CONFIG_FILE.prediction_cache,
+        DIR_CONFIG_FILE.prediction_cache_db,
+    )
+    # every worker writes its own batches; SQLite WAL serializes the commits
+    _WORKER_PIPELINE = with_results_store(
+        _WORKER_PIPELINE, PARAMS_CONFIG_FILE.results_store, DIR_CONFIG_FILE.results_db
+    )
+
+
+def _error_row(key: str, error: str) -> Dict[str, Any]:
+    return {"image": key, "reading": None, "status": "error", "error": error}
+
+
+def _process_chunk(source: str, keys: List[str]) -> List[Dict[str, Any]]:
+    """Decode and predict one chunk of images inside a worker; never raises per image."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    images, image_keys = [], []
+
+    archive = zipfile.ZipFile(source) if os.path.isfile(source) else None
+    try:
+        for key in keys:
+            try:
+                if archive is not None:
+                    image = read_img(io.BytesIO(archive.read(key)))
+                else:
+                    image = read_img(os.path.join(source, key))
+            except Exception as exc:
+                image = None
+                rows[key] = _error_row(key, str(exc))
+
+            if image is None:
+                rows.setdefault(key, _error_row(key, "Image could not be decoded"))
+            else:
+                images.append(image)
+                image_keys.append(key)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    # the results store takes the meter id from the image name
+    recording = isinstance(_WORKER_PIPELINE, RecordingPipeline)
+    try:
+        predictions = _WORKER_PIPELINE.predict_batch(
+            images=images, **({"sources": image_keys} if recording else {})
+        )
+        readings = [reading for _, _, reading in predictions]
+    except Exception:
+        # Isolate the failing image(s) instead of losing the whole chunk
+        readings = []
+        for key, image in zip(image_keys, images):
+            try:
+                extra = {"source": key} if recording else {}
+                readings.append(_WORKER_PIPELINE.predict(image=image, **extra)[2])
+            except Exception as exc:
+                readings.append(None)
+                rows[key] = _error_row(key, str(exc))
+
+    for key, reading in zip(image_keys, readings):
+        rows.setdefault(
+            key, {"image": key, "reading": reading, "status": "ok", "error": None}
+        )
+
+    return [rows[key] for key in keys]
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Result writers & checkpoint
+# ------------------------------------------------------------------------------------------------------------------
+
+
+class CsvResultWriter:
+    """
+    Appends result rows to a CSV file, flushing to disk after every call.
+
+    `write` returns the image names whose rows are now durable.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+
+    def write(self, rows: List[Dict[str, Any]]) -> List[str]:
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+            if self.write_header:
+                writer.writeheader()
+                self.write_header = False
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+        return [row["image"] for row in rows]
+
+    def close(self) -> List[str]:
+        return []
+
+
+class ParquetResultWriter:
+    """
+    Writes result rows as a Parquet dataset: a folder of part files.
+
+    Rows are buffered and written as one part file per `flush_rows` rows, since a
+    Parquet file is only readable once its footer is written. Each resumed run adds
+    new parts, and the folder can be read back with `pandas.read_parquet(path)`.
+    """
+
+    def __init__(self, path: str, flush_rows: int = 2000):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise CustomException(
+                f"Parquet output requires the 'pyarrow' package: {exc}", sys
+            )
+
+        self.path = path
+        self.flush_rows = flush_rows
+        self.buffer: List[Dict[str, Any]] = []
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, rows: List[Dict[str, Any]]) -> List[str]:
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.flush_rows:
+            return self._flush()
+        return []
+
+    def close(self) -> List[str]:
+        return self._flush()
+
+    def _flush(self) -> List[str]:
+        if not self.buffer:
+            return []
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(
+            self.buffer,
+            schema=pa.schema([(column, pa.string()) for column in RESULT_COLUMNS]),
+        )
+        part_name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S%f')}.parquet"
+        pq.write_table(table, os.path.join(self.path, part_name))
+
+        persisted = [row["image"] for row in self.buffer]
+        self.buffer = []
+        return persisted
+
+
+class BulkCheckpoint:
+    """
+    Append-only list of image names whose results are already on disk.
+
+    Parameters
+    ----------
+    path : str
+        Checkpoint file; created on first use and read back on resume.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+
+    def mark(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{key}\n" for key in keys))
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(keys)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Progress reporting
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def default_checkpoint_path(output: str) -> str:
+    return output.rstrip("/\\") + ".checkpoint"
+
+
+def default_progress_path(output: str) -> str:
+    return output.rstrip("/\\") + ".progress.json"
+
+
+def write_progress(path: str, progress: Dict[str, Any]) -> None:
+    """Atomically replace the progress file so readers never see a partial JSON."""
+    progress = {**progress, "updated_at": datetime.now().isoformat(timespec="seconds")}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, path)
+
+
+def read_progress(path: str) -> Optional[Dict[str, Any]]:
+    """Return the last progress snapshot of a job, or None if it has not started."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Job runner
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def run_bulk_job(
+    source: str,
+    output: str,
+    output_format: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    checkpoint_path: Optional[str] = None,
+    progress_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Read every image of `source` and write the readings to `output`.
+
+    Parameters
+    ----------
+    source : str
+        Folder or zip archive of meter images.
+    output : str
+        CSV file, or Parquet dataset folder.
+    output_format : Optional[str]
+        "csv" or "parquet"; inferred from the `output` suffix, then from the config.
+    workers : Optional[int]
+        Worker processes, each holding one pipeline. Defaults to `bulk_job.workers`.
+    chunk_size : Optional[int]
+        Images per `predict_batch` call. Defaults to `bulk_job.chunk_size`.
+    checkpoint_path, progress_path : Optional[str]
+        Default to `<output>.checkpoint` and `<output>.progress.json`.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Final progress snapshot (total / done / failed / status / elapsed).
+    """
+    params = PARAMS_CONFIG_FILE.bulk_job
+    workers = workers or params.workers
+    chunk_size = chunk_size or params.chunk_size
+    if output_format is None:
+        output_format = (
+            "parquet" if output.endswith(".parquet") else params.output_format
+        )
+    checkpoint_path = checkpoint_path or default_checkpoint_path(output)
+    progress_path = progress_path or default_progress_path(output)
+
+    progress: Dict[str, Any] = {
+        "status": "running",
+        "source": source,
+        "output": output,
+        "total": 0,
+        "done": 0,
+        "failed": 0,
+        "elapsed": 0.0,
+        "error": None,
+    }
+    write_progress(progress_path, progress)
+    start_time = time.perf_counter()
+
+    try:
+        checkpoint = BulkCheckpoint(checkpoint_path)
+        keys = list_image_keys(source)
+        pending_keys = [key for key in keys if key not in checkpoint.done]
+        progress["total"] = len(keys)
+        progress["done"] = len(keys) - len(pending_keys)
+        logging.info(
+            f"Bulk job: {len(keys)} images, {len(pending_keys)} left to process "
+            f"with {workers} workers"
+        )
+
+        if output_format == "parquet":
+            writer = ParquetResultWriter(output)
+        else:
+            writer = CsvResultWriter(output)
+
+        def handle(rows: List[Dict[str, Any]]) -> None:
+            checkpoint.mark(writer.write(rows))
+            progress["done"] += len(rows)
+            progress["failed"] += sum(row["status"] != "ok" for row in rows)
+            progress["elapsed"] = round(time.perf_counter() - start_time, 3)
+            write_progress(progress_path, progress)
+
+        cpu_num_threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(cpu_num_threads,)
+        ) as executor:
+            in_flight = set()
+            for i in range(0, len(pending_keys), chunk_size):
+                chunk = pending_keys[i : i + chunk_size]
+                in_flight.add(executor.submit(_process_chunk, source, chunk))
+
+                # Keep a bounded number of chunks queued so large jobs stream
+                if len(in_flight) >= 2 * workers:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        handle(future.result())
+
+            for future in wait(in_flight).done:
+                handle(future.result())
+
+        checkpoint.mark(writer.close())
+        progress["status"] = "completed"
+    except Exception as e:
+        progress["status"] = "failed"
+        progress["error"] = str(e)
+        raise CustomException(str(e), sys)
+    finally:
+        progress["elapsed"] = round(time.perf_counter() - start_time, 3)
+        write_progress(progress_path, progress)
+        logging.info(
+            f"Bulk job {progress['status']}: {progress['done']}/{progress['total']} "
+            f"images (time {progress['elapsed']}s)"
+        )
+
+    return progress
+
+
+def submit_bulk_job(
+    source: str,
+    output: str,
+    output_format: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> subprocess.Popen:
+    """
+    Start `run_bulk_job` in a detached CLI process and return immediately.
+
+    Progress can be polled with `read_progress(default_progress_path(output))`.
+    """
+    command = [sys.executable, "-m", "metervision.pipeline.bulk"]
+    command += ["--source", source, "--output", output]
+    if output_format:
+        command += ["--format", output_format]
+    if workers:
+        command += ["--workers", str(workers)]
+
+    logging.info(f"Submitting bulk job: {' '.join(command)}")
+    return subprocess.Popen(command)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Read every meter image of a folder or zip archive."
+    )
+    parser.add_argument("--source", required=True, help="Folder or .zip of images")
+    parser.add_argument("--output", required=True, help="CSV file or Parquet folder")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--progress", default=None)
+    args = parser.parse_args()
+
+    run_bulk_job(
+        source=args.source,
+        output=args.output,
+        output_format=args.format,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        progress_path=args.progress,
+    )
+
+
+if __name__ == "__main__":
+    main()
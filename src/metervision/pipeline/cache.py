@@ -0,0 +1,450 @@
+"""
+Content-addressed prediction cache for `MeterVisionPipeline`.
+
+The same meter photo is often submitted several times (retries, re-uploads, duplicate
+files in bulk folders). `CachedPipeline` sits in front of the pipeline and reuses
+earlier results:
+
+- Tier 1 (full prediction): keyed by a hash of the decoded image bytes + shape (or of
+  the encoded file bytes for `predict_file(s)`), the model version tag and the meter
+  type. Stored in an in-memory LRU bounded in bytes
+  and, optionally, in a SQLite file shared by every worker on the host (WAL mode).
+- Tier 2 (OCR only, optional): keyed by a coarse fingerprint of the reading-ROI crop
+  (small grayscale thumbnail, quantized), so near-duplicate photos that yield the
+  same crop skip TrOCR even when the full image hash differs.
+
+Cached ROI images are private copies: callers get their own copy on every hit, so
+drawing on a returned image never changes the cache. Hit/miss counters per tier are
+exposed through `stats()`. Settings live under `prediction_cache` in
+parameter_config.yaml.
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+from metervision.pipeline.predictor import _reading_or_placeholder
+
+Prediction = Tuple[np.ndarray, np.ndarray, str]
+
+
+def image_cache_key(image: np.ndarray, version: str, meter_type: Optional[str]) -> str:
+    """Hash of the decoded pixels (plus shape/dtype), model version and meter type."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{image.shape}|{image.dtype}|{version}|{meter_type}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def file_cache_key(img_source, version: str, meter_type: Optional[str]) -> str:
+    """Hash of the encoded file bytes (path or file-like), model version and meter type."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"file|{version}|{meter_type}".encode())
+    if hasattr(img_source, "read"):
+        img_source.seek(0)
+        digest.update(img_source.read())
+        img_source.seek(0)
+    else:
+        with open(img_source, "rb") as f:
+            for chunk in iter(lambda: f.read(2**20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def crop_cache_key(crop: np.ndarray, version: str, meter_type: Optional[str]) -> str:
+    """Coarse fingerprint of a reading crop: 96x32 grayscale, 4-bit quantized."""
+    gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+    thumbnail = cv2.resize(gray, (96, 32), interpolation=cv2.INTER_AREA) >> 4
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"crop|{version}|{meter_type}".encode())
+    digest.update(thumbnail.tobytes())
+    return digest.hexdigest()
+
+
+def model_version_tag(pipeline) -> str:
+    """
+    Identify the loaded models: artifact paths, their size/mtime and runtime options.
+
+    Retraining or swapping a model file changes the tag, which invalidates the cache.
+    """
+    parts = [
+        getattr(pipeline, "quantization", ""),
+        getattr(pipeline.trocr_recognizer, "backend_name", ""),
+    ]
+    for path in (
+        pipeline.display_model_path,
+        pipeline.reading_model_path,
+        os.path.join(pipeline.dir_config.trocr_model, "config.json"),
+    ):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{int(stat.st_mtime)}")
+        except OSError:
+            parts.append(str(path))
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=8).hexdigest()
+
+
+class LRUByteCache:
+    """
+    Thread-safe LRU whose capacity is a byte budget rather than an entry count.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Total size of the stored values; least recently used entries are evicted.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.current_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class SQLitePredictionStore:
+    """
+    On-disk prediction store shared across worker processes.
+
+    ROI images are stored PNG-encoded next to the reading text; WAL mode lets many
+    readers run alongside one writer.
+
+    Parameters
+    ----------
+    path : str
+        SQLite database file (created if missing).
+    """
+
+    def __init__(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.lock = threading.Lock()
+            self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, reading TEXT NOT NULL, "
+                "display_png BLOB, reading_png BLOB)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS crop_readings ("
+                "key TEXT PRIMARY KEY, reading TEXT NOT NULL)"
+            )
+            self.connection.commit()
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    @staticmethod
+    def _encode(image: np.ndarray) -> bytes:
+        ok, buffer = cv2.imencode(".png", image)
+        return buffer.tobytes() if ok else b""
+
+    @staticmethod
+    def _decode(blob: bytes) -> np.ndarray:
+        return cv2.imdecode(np.frombuffer(blob, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+
+    def get(self, key: str) -> Optional[Prediction]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT reading, display_png, reading_png FROM predictions WHERE key = ?",
+                (key,),
+            ).fetchone()
+        # rows written before empty encodings were skipped are treated as misses
+        if row is None or not row[1] or not row[2]:
+            return None
+        return self._decode(row[1]), self._decode(row[2]), row[0]
+
+    def put(self, key: str, prediction: Prediction) -> None:
+        display_image, reading_image, reading = prediction
+        display_png, reading_png = self._encode(display_image), self._encode(reading_image)
+        if not display_png or not reading_png:
+            logging.warning(f"Prediction {key} not stored on disk: PNG encoding failed")
+            return
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                (key, reading, display_png, reading_png),
+            )
+            self.connection.commit()
+
+    def get_reading(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT reading FROM crop_readings WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_reading(self, key: str, reading: str) -> None:
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO crop_readings VALUES (?, ?)", (key, reading)
+            )
+            self.connection.commit()
+
+
+class CachedPipeline:
+    """
+    Drop-in front for `MeterVisionPipeline.predict` / `predict_batch` /
+    `predict_file(s)` with caching.
+
+    Parameters
+    ----------
+    pipeline : MeterVisionPipeline
+        The wrapped pipeline.
+    max_memory_mb : float
+        Byte budget of the in-memory LRU.
+    disk_path : Optional[str]
+        SQLite file for the shared on-disk tier; None keeps the cache in memory only.
+    crop_tier : bool
+        Also cache OCR results by reading-crop fingerprint (near-duplicate photos).
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        max_memory_mb: float = 256,
+        disk_path: Optional[str] = None,
+        crop_tier: bool = False,
+    ):
+        self.pipeline = pipeline
+        self.version = model_version_tag(pipeline)
+        self.memory = LRUByteCache(int(max_memory_mb * 2**20))
+        self.disk = SQLitePredictionStore(disk_path) if disk_path else None
+        self.crop_tier = crop_tier
+        self.crop_memory = LRUByteCache(8 * 2**20)
+
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "crop_hits": 0,
+            "crop_misses": 0,
+        }
+        self.counter_lock = threading.Lock()
+        logging.info(
+            f"Prediction cache enabled (version {self.version}, "
+            f"{max_memory_mb} MB memory, disk={'on' if self.disk else 'off'}, "
+            f"crop tier={'on' if crop_tier else 'off'})"
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        # expose the wrapped pipeline's attributes (detectors, configs, ...)
+        if name == "pipeline":
+            raise AttributeError(name)
+        return getattr(self.pipeline, name)
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self.counter_lock:
+            self.counters[counter] += amount
+
+    def _remember(self, key: str, prediction: Prediction) -> None:
+        # copies: the caller keeps its arrays, and a view into a batched ROI buffer
+        # would otherwise keep the whole buffer alive behind an undercounted nbytes
+        display_image, reading_image, reading = prediction
+        display_image, reading_image = display_image.copy(), reading_image.copy()
+        size = display_image.nbytes + reading_image.nbytes + len(reading)
+        self.memory.put(key, (display_image, reading_image, reading), size)
+
+    def _lookup(self, key: str) -> Optional[Prediction]:
+        prediction = self.memory.get(key)
+        if prediction is not None:
+            self._count("memory_hits")
+            display_image, reading_image, reading = prediction
+            return display_image.copy(), reading_image.copy(), reading
+
+        if self.disk is not None:
+            prediction = self.disk.get(key)
+            if prediction is not None:
+                self._count("disk_hits")
+                self._remember(key, prediction)
+                return prediction
+
+        self._count("misses")
+        return None
+
+    def _store(self, key: str, prediction: Prediction) -> None:
+        self._remember(key, prediction)
+        if self.disk is not None:
+            self.disk.put(key, prediction)
+
+    def _crop_lookup(self, key: str) -> Optional[str]:
+        reading = self.crop_memory.get(key)
+        if reading is None and self.disk is not None:
+            reading = self.disk.get_reading(key)
+        self._count("crop_hits" if reading is not None else "crop_misses")
+        return reading
+
+    def _crop_store(self, key: str, reading: str) -> None:
+        self.crop_memory.put(key, reading, len(key) + len(reading))
+        if self.disk is not None:
+            self.disk.put_reading(key, reading)
+
+    def _compute_batch(
+        self, images: List[np.ndarray], meter_type: Optional[str]
+    ) -> List[Prediction]:
+        """Run the models, consulting the crop tier before OCR when enabled."""
+        if not self.crop_tier:
+            return self.pipeline.predict_batch(images=images, meter_type=meter_type)
+
+        pipeline = self.pipeline
+        # images rejected by an early-exit gate keep their placeholder reading
+        display_images, reading_images, readings = pipeline.extract_batch(images)
+
+        crop_keys = {
+            i: crop_cache_key(reading_images[i], self.version, meter_type)
+            for i, reading in enumerate(readings)
+            if reading is None
+        }
+        for i, key in crop_keys.items():
+            readings[i] = self._crop_lookup(key)
+        todo = [i for i, reading in enumerate(readings) if reading is None]
+        if todo:
+            recognized = pipeline.trocr_recognizer.recognize_readings(
+                images=[reading_images[i] for i in todo], meter_type=meter_type
+            )
+            for i, reading in zip(todo, recognized):
+                readings[i] = reading
+                self._crop_store(crop_keys[i], reading)
+
+        return [
+            (display_image, reading_image, _reading_or_placeholder(reading))
+            for display_image, reading_image, reading in zip(
+                display_images, reading_images, readings
+            )
+        ]
+
+    def _cached(
+        self, keys: List[str], compute: Callable[[List[int]], List[Prediction]]
+    ) -> List[Prediction]:
+        """Look every key up; `compute(indices)` runs the models for the misses."""
+        results: List[Optional[Prediction]] = [self._lookup(key) for key in keys]
+
+        # duplicates inside one batch are computed once
+        missing: Dict[str, int] = {}
+        for i, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[i], i)
+
+        if missing:
+            computed = compute(list(missing.values()))
+            by_key = dict(zip(missing.keys(), computed))
+            for key, prediction in by_key.items():
+                self._store(key, prediction)
+            results = [result or by_key[key] for result, key in zip(results, keys)]
+
+        return results
+
+    def predict_batch(
+        self, images: List[np.ndarray], meter_type: Optional[str] = None
+    ) -> List[Prediction]:
+        """Cached counterpart of `MeterVisionPipeline.predict_batch`."""
+        try:
+            keys = [image_cache_key(img, self.version, meter_type) for img in images]
+            return self._cached(
+                keys,
+                lambda todo: self._compute_batch([images[i] for i in todo], meter_type),
+            )
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    def predict(
+        self, image: np.ndarray, meter_type: Optional[str] = None
+    ) -> Prediction:
+        """Cached counterpart of `MeterVisionPipeline.predict`."""
+        return self.predict_batch(images=[image], meter_type=meter_type)[0]
+
+    def predict_files(
+        self, img_sources: List[Any], meter_type: Optional[str] = None
+    ) -> List[Prediction]:
+        """
+        Cached counterpart of `MeterVisionPipeline.predict_files`.
+
+        Keys hash the encoded file bytes, so a hit never decodes the image; misses go
+        through the wrapped coarse-to-fine path (the crop tier is not consulted there).
+        """
+        try:
+            keys = [file_cache_key(src, self.version, meter_type) for src in img_sources]
+            return self._cached(
+                keys,
+                lambda todo: self.pipeline.predict_files(
+                    img_sources=[img_sources[i] for i in todo], meter_type=meter_type
+                ),
+            )
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    def predict_file(self, img_source, meter_type: Optional[str] = None) -> Prediction:
+        """Cached counterpart of `MeterVisionPipeline.predict_file`."""
+        return self.predict_files(img_sources=[img_source], meter_type=meter_type)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per tier plus memory usage of the LRU."""
+        with self.counter_lock:
+            stats = dict(self.counters)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (
+            round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4)
+            if lookups
+            else 0.0
+        )
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_bytes"] = self.memory.current_bytes
+        stats["evictions"] = self.memory.evictions
+        return stats
+
+
+def with_prediction_cache(pipeline, params, cache_path: Optional[str] = None):
+    """
+    Wrap `pipeline` in a `CachedPipeline` when `prediction_cache.enabled` is set.
+
+    Parameters
+    ----------
+    pipeline : MeterVisionPipeline
+        Loaded pipeline.
+    params : ConfigBox
+        The `prediction_cache` section of the parameter config.
+    cache_path : Optional[str]
+        SQLite file for the disk tier (used when `params.use_disk` is true).
+    """
+    if not params.enabled:
+        return pipeline
+    return CachedPipeline(
+        pipeline,
+        max_memory_mb=params.max_memory_mb,
+        disk_path=cache_path if params.use_disk else None,
+        crop_tier=params.crop_tier,
+    )
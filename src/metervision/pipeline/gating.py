@@ -0,0 +1,159 @@
+"""
+Early-exit gates of the prediction pipeline.
+
+Every image used to go through all three models: when the display was not found the
+whole photo went on to reading detection, and whatever the reading detector returned
+(or the whole display) went on to a full OCR decode. The gates stop that work as
+soon as the outcome is known.
+
+Features:
+- meter gate (before the YOLO models, off by default): rejects uploads that are not
+  meter photos, either with a thumbnail heuristic (size, contrast and sharpness of a
+  small grayscale thumbnail, well under a millisecond) or with an optional small image
+  classifier (`meter_classifier_model`, Ultralytics classify task);
+- display gate: the display detector found no box, or its best box is below
+  `display_min_conf`, so reading detection and OCR are skipped;
+- reading gate: the same for the reading detector and `reading_min_conf`, so OCR is
+  skipped.
+
+A rejected image keeps the usual (display_image, reading_image, reading) result, with
+a placeholder reading (`NOT_A_METER`, `NO_DISPLAY`, `NO_READING`) that `rejected_gate`
+maps back to its gate. Checks and rejections are counted per gate in
+`metervision_gate_checks_total` / `metervision_gate_rejections_total` (GET /metrics);
+`gate_stats` returns the same numbers as a dict.
+"""
+
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+from metervision.monitoring.metrics import GATE_CHECKS, GATE_REJECTIONS
+
+NOT_A_METER = "Not a Meter"
+NO_DISPLAY = "No Display Found"
+NO_READING = "No Reading Detected"
+
+GATE_READINGS = {"meter": NOT_A_METER, "display": NO_DISPLAY, "reading": NO_READING}
+GATES = tuple(GATE_READINGS)
+
+
+def record_gate(gate: str, passed: bool) -> Optional[str]:
+    """Count one check of `gate`; return its placeholder reading if the image is rejected."""
+    GATE_CHECKS.inc(gate=gate)
+    if passed:
+        return None
+    GATE_REJECTIONS.inc(gate=gate)
+    return GATE_READINGS[gate]
+
+
+def rejected_gate(reading: str) -> Optional[str]:
+    """Name of the gate that produced this placeholder reading, None for a real reading."""
+    for gate, placeholder in GATE_READINGS.items():
+        if reading == placeholder:
+            return gate
+    return None
+
+
+def gate_stats() -> Dict[str, Dict[str, int]]:
+    """Checked / rejected images per gate since the process started."""
+    return {
+        gate: {
+            "checked": int(GATE_CHECKS.value(gate=gate)),
+            "rejected": int(GATE_REJECTIONS.value(gate=gate)),
+        }
+        for gate in GATES
+    }
+
+
+def thumbnail_stats(image: np.ndarray, side: int) -> Tuple[float, float]:
+    """(contrast, sharpness) of a `side` x `side` grayscale thumbnail of the image."""
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    thumbnail = cv2.resize(gray, (side, side), interpolation=cv2.INTER_AREA)
+    contrast = float(thumbnail.std())
+    sharpness = float(cv2.Laplacian(thumbnail, cv2.CV_32F).var())
+    return contrast, sharpness
+
+
+class MeterGate:
+    """
+    Cheap "is this a meter photo" check run before the display detector.
+
+    Parameters
+    ----------
+    params : object
+        The `gating` section of the parameter config.
+    classifier_path : Optional[str]
+        Classify model for `meter_gate: classifier` (`meter_classifier_model`).
+    """
+
+    def __init__(self, params, classifier_path: Optional[str] = None):
+        self.params = params
+        self.mode = params.meter_gate
+        self.classifier = None
+        if self.mode not in ("heuristic", "classifier"):
+            raise ValueError(f"Unknown meter_gate '{self.mode}'")
+        if self.mode != "classifier":
+            return
+
+        try:
+            start_time = time.perf_counter()
+            from ultralytics import YOLO
+
+            self.classifier = YOLO(model=classifier_path, task="classify", verbose=False)
+            names = {name: index for index, name in self.classifier.names.items()}
+            self.class_index = names[params.classifier_class]
+            elapsed = round(time.perf_counter() - start_time, 3)
+            logging.info(f"Meter Classifier Loaded Successfully (time {elapsed}s)")
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    def accepts(self, images: List[np.ndarray]) -> List[bool]:
+        """
+        Whether each image looks like a meter photo.
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            RGB images (full resolution or thumbnails).
+
+        Returns
+        -------
+        List[bool]
+            False for the images the gate rejects.
+        """
+        if not images:
+            return []
+        if self.classifier is not None:
+            try:
+                results = self.classifier(images, verbose=False)
+                return [
+                    float(result.probs.data[self.class_index])
+                    >= self.params.classifier_min_prob
+                    for result in results
+                ]
+            except Exception as e:
+                raise CustomException(str(e), sys)
+
+        params = self.params
+        accepted = []
+        for image in images:
+            if min(image.shape[:2]) < params.min_side:
+                accepted.append(False)
+                continue
+            contrast, sharpness = thumbnail_stats(image, params.thumbnail_side)
+            accepted.append(
+                contrast >= params.min_contrast and sharpness >= params.min_sharpness
+            )
+        return accepted
+
+
+def build_meter_gate(params, classifier_path: Optional[str]) -> Optional[MeterGate]:
+    """The configured meter gate, or None when gating or the meter gate is off."""
+    if not params.enabled or params.meter_gate in (None, False, "none"):
+        return None
+    return MeterGate(params, classifier_path)
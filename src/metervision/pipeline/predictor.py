@@ -3,16 +3,54 @@ Prediction pipeline orchestration.
 
 This module instantiates the display and reading ROI model wrappers and exposes a
 single `PredictionPipeline` that coordinates ROI detection flows.
+
+Importing this module is cheap: torch, transformers and ultralytics are only imported
+when a pipeline is constructed. The three models are then loaded concurrently and an
+optional warm-up inference runs, with the time of each step kept in `startup_timings`.
+
+`predict_file` reads large photos coarse-to-fine: the display is located on a cheaply
+decoded thumbnail and only the display region is cropped at full resolution.
+
+`predict_multi` reads every display of a photo (e.g. a meter bank) with one detector
+call per stage and one batched OCR decode.
+
+With `gating.enabled`, images stop early (see `metervision.pipeline.gating`): a meter
+gate can reject non-meter uploads before the detectors run, and an image whose display
+or reading is not found (or found below `*_min_conf`) skips the remaining models and
+gets a placeholder reading.
+
+`predict_within(image, budget_ms)` runs against a latency budget: stages whose
+full-quality cost no longer fits switch to cheaper settings (see
+`metervision.pipeline.budget`) and the result reports the degradations applied.
 """
 
-from typing import Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 
 from metervision.constants import DIR_CONFIG_FILE, PARAMS_CONFIG_FILE
-from metervision.models.ocr_model import TrOCRRecognizer
-from metervision.models.roi_display import DisplayDetector
-from metervision.models.roi_reading import ReadingDetector
+from metervision.logger.logs import logging
+from metervision.monitoring.metrics import (BATCH_SIZE, EMPTY_READINGS, IMAGES,
+                                            stage_timer)
+from metervision.monitoring.profiling import profile_request
+from metervision.pipeline.budget import LatencyBudget, StageCosts
+from metervision.pipeline.gating import build_meter_gate, record_gate
+from metervision.utils.file_utils import (read_img, read_img_region,
+                                          read_img_thumbnail)
+from metervision.utils.roi_postprocessing import extract_roi, extract_roi_batch
+
+
+def _reading_or_placeholder(reading: str) -> str:
+    """Replace an empty OCR result by the "No Reading Found" placeholder (and count it)."""
+    if reading:
+        return reading
+    EMPTY_READINGS.inc()
+    return "No Reading Found"
+
+
+Prediction = Tuple[np.ndarray, np.ndarray, str]
 
 
 class MeterVisionPipeline:
@@ -29,28 +67,180 @@ class MeterVisionPipeline:
         Detector that finds the display ROI.
     reading_detector : ReadingDetector
         Detector that finds the reading ROI within the display ROI.
+    quantization : str
+        Model precision in use, "fp32" or "int8" (`quantization.mode` by default).
+    startup_timings : Dict[str, float]
+        Seconds spent importing, loading each model, warming up, and in total.
+    cpu_num_threads : Optional[int]
+        Intra-op CPU threads of the OCR model, passed by worker processes that split
+        the cores (replica pool, bulk). `torch.set_num_threads` is process-wide, so
+        None (in-process deployments) leaves torch's thread pool alone.
+    shared_weights : bool
+        Load the mmap'd weights written by `metervision.models.shared_weights`, so
+        processes on the same host share their physical pages (`shared_weights.enabled`).
+        Not used in INT8 mode: quantization makes private copies of the weights.
+    models : Optional[Dict[str, Any]]
+        Already built "display_model", "reading_model" and "ocr_model" (see
+        `from_models`); nothing is imported or loaded from disk then.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        quantization: Optional[str] = None,
+        parallel_load: Optional[bool] = None,
+        warmup: Optional[bool] = None,
+        cpu_num_threads: Optional[int] = None,
+        shared_weights: Optional[bool] = None,
+        models: Optional[Dict[str, Any]] = None,
+    ):
+        startup_start = time.perf_counter()
         self.dir_config = DIR_CONFIG_FILE
         self.params_config = PARAMS_CONFIG_FILE
-
-        # instantiate the display-detector, reading-detector and TrOCR Recognizer with configured weights/params
-        self.display_detector = DisplayDetector(
-            model_path=self.dir_config.display_roi_model,
-            params=self.params_config.display_roi_resized,
+        self.quantization = quantization or self.params_config.quantization.mode
+        self.cpu_num_threads = cpu_num_threads
+        startup = self.params_config.startup
+        parallel_load = startup.parallel_load if parallel_load is None else parallel_load
+        warmup = startup.warmup if warmup is None else warmup
+        self.shared_weights = (
+            self.params_config.shared_weights.enabled
+            if shared_weights is None
+            else shared_weights
         )
+        self.startup_timings: Dict[str, float] = {}
+
+        # INT8 detectors are separate exports (see metervision.models.quantization):
+        # .onnx files or OpenVINO folders, each under its own config key
+        if self.quantization == "int8":
+            detector_format = self.params_config.quantization.detector_format
+            suffix = "_openvino" if detector_format == "openvino" else ""
+            self.display_model_path = self.dir_config[f"display_roi_model_int8{suffix}"]
+            self.reading_model_path = self.dir_config[f"reading_roi_model_int8{suffix}"]
+        else:
+            self.display_model_path = self.dir_config.display_roi_model
+            self.reading_model_path = self.dir_config.reading_roi_model
+        self.trocr_model_source = self.dir_config.trocr_model
+
+        if self.shared_weights:
+            from metervision.models.shared_weights import shared_model_paths
 
-        self.reading_detector = ReadingDetector(
-            model_path=self.dir_config.reading_roi_model,
-            params=self.params_config.reading_roi_resized,
+            shared_paths = shared_model_paths(self.dir_config.shared_weights_dir)
+            if self.quantization != "int8":
+                self.display_model_path = shared_paths["display_roi_model"]
+                self.reading_model_path = shared_paths["reading_roi_model"]
+                self.trocr_model_source = shared_paths["trocr_model"]
+            else:
+                # INT8 TrOCR layers are quantized into private copies of the weights
+                logging.warning("INT8 models are not memory-mapped; using their files.")
+
+        if models is None:
+            models = self._load_configured_models(parallel_load)
+        self.display_detector = models["display_model"]
+        self.reading_detector = models["reading_model"]
+        self.trocr_recognizer = models["ocr_model"]
+        self.meter_gate = build_meter_gate(
+            self.params_config.gating, self.dir_config.meter_classifier_model
         )
+        self.stage_costs = StageCosts(self.params_config.latency_budget)
+
+        if warmup:
+            self.warmup()
 
-        self.trocr_recognizer = TrOCRRecognizer(
-            model_source=self.dir_config.trocr_model
+        self.startup_timings["total"] = time.perf_counter() - startup_start
+        breakdown = ", ".join(f"{k} {v:.3f}s" for k, v in self.startup_timings.items())
+        logging.info(f"Pipeline startup breakdown: {breakdown}")
+
+    @classmethod
+    def from_models(
+        cls, display_detector, reading_detector, trocr_recognizer, **kwargs
+    ) -> "MeterVisionPipeline":
+        """
+        Build a pipeline around already constructed models (e.g. offline stubs).
+
+        Other keyword arguments are those of the constructor (`warmup`,
+        `quantization`, ...); configs, gates and stage costs are set up as usual.
+        """
+        models = {
+            "display_model": display_detector,
+            "reading_model": reading_detector,
+            "ocr_model": trocr_recognizer,
+        }
+        return cls(models=models, **kwargs)
+
+    def _load_configured_models(self, parallel_load: bool) -> Dict[str, Any]:
+        """Import the model wrappers and load the three configured models."""
+        # Heavy imports happen here, once, on the calling thread (not at module import)
+        start_time = time.perf_counter()
+        from metervision.models.ocr_model import TrOCRRecognizer
+        from metervision.models.roi_display import DisplayDetector
+        from metervision.models.roi_reading import ReadingDetector
+
+        self.startup_timings["import"] = time.perf_counter() - start_time
+
+        # instantiate the display-detector, reading-detector and TrOCR Recognizer with configured weights/params
+        loaders: Dict[str, Callable[[], Any]] = {
+            "display_model": lambda: DisplayDetector(
+                model_path=self.display_model_path,
+                params=self.params_config.display_roi_resized,
+            ),
+            "reading_model": lambda: ReadingDetector(
+                model_path=self.reading_model_path,
+                params=self.params_config.reading_roi_resized,
+            ),
+            "ocr_model": lambda: TrOCRRecognizer(
+                model_source=self.trocr_model_source,
+                cpu_num_threads=self.cpu_num_threads,
+                backend=self.params_config.trocr_model.backend,
+                onnx_source=self.dir_config.trocr_onnx_model,
+                quantization=self.quantization,
+                decoding_profiles=self.params_config.reading_decoding.meter_types,
+                default_meter_type=self.params_config.reading_decoding.default_meter_type,
+                fast_preprocessing=self.params_config.trocr_model.fast_preprocessing,
+                static_decoding=self.params_config.static_decoding,
+            ),
+        }
+        return self._load_models(loaders, parallel_load)
+
+    def _load_models(
+        self, loaders: Dict[str, Callable[[], Any]], parallel: bool
+    ) -> Dict[str, Any]:
+        """Run the model loaders (concurrently if `parallel`) and time each one."""
+
+        def timed(name: str) -> Any:
+            start_time = time.perf_counter()
+            model = loaders[name]()
+            self.startup_timings[name] = time.perf_counter() - start_time
+            return model
+
+        if not parallel:
+            return {name: timed(name) for name in loaders}
+
+        # weight loading is mostly file I/O and torch deserialization, which release the GIL
+        with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+            futures = {name: executor.submit(timed, name) for name in loaders}
+            return {name: future.result() for name, future in futures.items()}
+
+    def warmup(self) -> None:
+        """
+        Run one throw-away prediction so allocator / kernel initialization is paid at
+        startup instead of by the first real request.
+
+        The stages are called directly: the blank warm-up image would stop at the
+        early-exit gates and leave the reading detector and OCR cold.
+        """
+        start_time = time.perf_counter()
+        height = self.params_config.display_roi_resized.resized_height
+        width = self.params_config.display_roi_resized.resized_width
+        image = np.full((height * 2, width, 3), 127, dtype=np.uint8)
+        display_images = self.display_detector.extract_display_roi_batch(images=[image])
+        reading_images = self.reading_detector.extract_reading_roi_batch(
+            images=display_images
         )
+        self.trocr_recognizer.recognize_readings(images=reading_images)
+        self.startup_timings["warmup"] = time.perf_counter() - start_time
 
-    def predict(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray, str]:
+    def predict(
+        self, image: np.ndarray, meter_type: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray, str]:
         """
         Run the full prediction flow.
 
@@ -58,6 +248,8 @@ class MeterVisionPipeline:
         ----------
         image  : ndarray
             Original image array.
+        meter_type : Optional[str]
+            Reading-decoding profile (`reading_decoding.meter_types`); config default if None.
 
         Returns
         -------
@@ -66,15 +258,458 @@ class MeterVisionPipeline:
                                                                  and recognized text.
         """
 
-        # Detect and extract the display ROI
-        display_image = self.display_detector.extract_display_roi(img=image)
+        IMAGES.inc(entrypoint="predict")
+        if self.params_config.gating.enabled:
+            with profile_request("predict"), stage_timer("total"):
+                return self._recognize_batch(*self.extract_batch([image]), meter_type)[0]
+
+        with profile_request("predict"), stage_timer("total"):
+            # Detect and extract the display ROI
+            with stage_timer("display"):
+                display_image = self.display_detector.extract_display_roi(img=image)
+
+            # Detect and extract the reading ROI inside the display ROI
+            with stage_timer("reading"):
+                reading_image = self.reading_detector.extract_reading_roi(img=display_image)
+
+            # Recognize the Readings from the Reading Image
+            with stage_timer("ocr"):
+                recognize_reading = self.trocr_recognizer.recognize_reading(
+                    image=reading_image, meter_type=meter_type
+                )
+
+        return display_image, reading_image, _reading_or_placeholder(recognize_reading)
+
+    def predict_within(
+        self, image: np.ndarray, budget_ms: float, meter_type: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray, str, Dict[str, Any]]:
+        """
+        Run the prediction flow against a latency budget.
+
+        Before each stage, the time left is compared with the learned full-quality
+        cost of that stage and the later ones; when it does not cover them, the stage
+        runs degraded: smaller detector input (`detector_imgsz`), no reading
+        re-detection (the display crop goes to OCR), or short greedy decoding
+        (`short_max_new_tokens`). Settings come from `latency_budget` in the config.
+
+        Parameters
+        ----------
+        image : ndarray
+            Original image array.
+        budget_ms : float
+            Latency budget of the request, in milliseconds.
+        meter_type : Optional[str]
+            Reading-decoding profile (`reading_decoding.meter_types`); config default if None.
+
+        Returns
+        -------
+        Tuple[ndarray, ndarray, str, Dict[str, Any]]
+            (display_image, reading_image, recognize_reading, report), where report has
+            budget_ms, elapsed_ms, within_budget, degradations (e.g. ["ocr:short"]) and
+            stage_ms.
+        """
+
+        IMAGES.inc(entrypoint="predict_within")
+        params = self.params_config.latency_budget
+        budget = LatencyBudget(budget_ms, self.stage_costs, params.safety_factor)
+        # the int8 OpenVINO detectors are exported with a fixed input size
+        fixed_input = (
+            self.quantization == "int8"
+            and self.params_config.quantization.detector_format == "openvino"
+        )
+        small_input = [] if fixed_input else ["small_input"]
+
+        with profile_request("predict_within"), stage_timer("total"):
+            gates = self._check_meters([image])
+
+            mode = budget.choose("display", small_input, later=("reading", "ocr"))
+            with budget.stage("display", mode), stage_timer("display"):
+                display_image = self._extract_rois(
+                    "display", [image], gates, params.detector_imgsz if mode else None
+                )[0]
+
+            if gates[0] is None:
+                mode = budget.choose("reading", [*small_input, "skip"], later=("ocr",))
+                with budget.stage("reading", mode), stage_timer("reading"):
+                    if mode == "skip":
+                        reading_image = display_image
+                    else:
+                        reading_image = self._extract_rois(
+                            "reading",
+                            [display_image],
+                            gates,
+                            params.detector_imgsz if mode else None,
+                        )[0]
+            else:
+                reading_image = display_image
+
+            if gates[0] is None:
+                mode = budget.choose("ocr", ["short"])
+                with budget.stage("ocr", mode), stage_timer("ocr"):
+                    reading = self.trocr_recognizer.recognize_readings(
+                        images=[reading_image],
+                        meter_type=meter_type,
+                        max_new_tokens=params.short_max_new_tokens if mode else None,
+                    )[0]
+                reading = _reading_or_placeholder(reading)
+            else:
+                reading = gates[0]
+
+        report = budget.report()
+        if report["degradations"]:
+            logging.info(
+                f"Budget {budget_ms}ms: degraded {report['degradations']} "
+                f"(elapsed {report['elapsed_ms']}ms)"
+            )
+        return display_image, reading_image, reading, report
+
+    def predict_batch(
+        self, images: List[np.ndarray], meter_type: Optional[str] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray, str]]:
+        """
+        Run the full prediction flow over a list of images.
+
+        Each stage is executed once for the whole list: one display-detector call,
+        one reading-detector call and one batched `generate` call for OCR.
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            Original image arrays.
+        meter_type : Optional[str]
+            Reading-decoding profile applied to the whole batch.
+
+        Returns
+        -------
+        List[Tuple[ndarray, ndarray, str]]
+            One (display_image, reading_image, recognize_reading) tuple per input image,
+            in the same order as `predict` would return them.
+        """
+
+        if not images:
+            return []
+
+        IMAGES.inc(len(images), entrypoint="predict_batch")
+        BATCH_SIZE.observe(len(images), component="pipeline")
+        with profile_request("predict_batch"), stage_timer(
+            "total_batch", batch_size=len(images)
+        ):
+            return self._recognize_batch(*self.extract_batch(images), meter_type)
+
+    def extract_batch(
+        self, images: List[np.ndarray]
+    ) -> Tuple[List[np.ndarray], List[np.ndarray], List[Optional[str]]]:
+        """
+        Detection stages of `predict_batch`, with the early-exit gates.
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            Original image arrays.
+
+        Returns
+        -------
+        Tuple[List[ndarray], List[ndarray], List[Optional[str]]]
+            Display images, reading images, and per image the placeholder reading of
+            the gate that rejected it (None for the images that still need OCR).
+        """
+        gates: List[Optional[str]] = self._check_meters(images)
+        with stage_timer("display_batch"):
+            display_images = self._extract_rois("display", images, gates)
+        with stage_timer("reading_batch"):
+            reading_images = self._extract_rois("reading", display_images, gates)
+        return display_images, reading_images, gates
+
+    def _check_meters(self, images: List[np.ndarray]) -> List[Optional[str]]:
+        """Run the meter gate (if any): the placeholder reading per rejected image."""
+        if self.meter_gate is None or not images:
+            return [None] * len(images)
+        with stage_timer("meter_gate"):
+            accepted = self.meter_gate.accepts(images)
+        return [record_gate("meter", passed) for passed in accepted]
+
+    def _extract_rois(
+        self,
+        stage: str,
+        images: List[np.ndarray],
+        gates: List[Optional[str]],
+        imgsz: Optional[int] = None,
+        detector: Optional[Any] = None,
+    ) -> List[np.ndarray]:
+        """
+        Display or reading ROIs of the images no gate has rejected yet; with gating,
+        images whose box is missing or below `<stage>_min_conf` are rejected in `gates`.
+        Rejected images are passed through unchanged. `imgsz` overrides the detector
+        input size; `detector` replaces the pipeline's own detector of that stage.
+        """
+        if stage == "display":
+            detector = detector or self.display_detector
+            detect = detector.detect_display_batch
+            crop = detector.crop_display_batch
+        else:
+            detector = detector or self.reading_detector
+            detect = detector.detect_reading_batch
+            crop = detector.crop_reading_batch
+
+        rois = list(images)
+        pending = [i for i, gate in enumerate(gates) if gate is None]
+        if not pending:
+            return rois
+
+        batch = [images[i] for i in pending]
+        polygons = detect(batch, min_conf=self._min_conf(stage), imgsz=imgsz)
+        if self.params_config.gating.enabled:
+            for i, polygon in zip(pending, polygons):
+                gates[i] = record_gate(stage, polygon is not None and polygon.any())
+        for i, roi in zip(pending, crop(batch, polygons)):
+            rois[i] = roi
+        return rois
+
+    def _recognize_batch(
+        self,
+        display_images: List[np.ndarray],
+        reading_images: List[np.ndarray],
+        gates: List[Optional[str]],
+        meter_type: Optional[str],
+    ) -> List[Prediction]:
+        """One batched OCR decode over the images no gate has rejected."""
+        readings = list(gates)
+        pending = [i for i, gate in enumerate(gates) if gate is None]
+        if pending:
+            with stage_timer("ocr_batch"):
+                recognized = self.trocr_recognizer.recognize_readings(
+                    images=[reading_images[i] for i in pending], meter_type=meter_type
+                )
+            for i, reading in zip(pending, recognized):
+                readings[i] = _reading_or_placeholder(reading)
+        return list(zip(display_images, reading_images, readings))
+
+    def predict_file(
+        self, img_source, meter_type: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray, str]:
+        """
+        Run the prediction flow on an encoded image (path or file-like object).
+
+        With `coarse_to_fine.enabled`, photos larger than `min_side` are not decoded
+        to a full-resolution array up front: the display OBB is detected on a
+        thumbnail (JPEG draft decoding at 1/2-1/8 scale), mapped back to full
+        resolution, and only the display region is converted and warped at full
+        quality. Falls back to the full-resolution flow otherwise, or when no
+        display is found on the thumbnail.
+
+        Parameters
+        ----------
+        img_source : str or file-like
+            Image path or an object with `read`/`seek` (e.g. a Streamlit upload).
+        meter_type : Optional[str]
+            Reading-decoding profile (see `reading_decoding` in parameter_config.yaml).
+
+        Returns
+        -------
+        Tuple[ndarray, ndarray, str]
+            (display_image, reading_image, recognize_reading), as `predict`.
+        """
+
+        return self.predict_files(img_sources=[img_source], meter_type=meter_type)[0]
+
+    def predict_files(
+        self, img_sources: List[Any], meter_type: Optional[str] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray, str]]:
+        """
+        Batched `predict_file`: one display-detector call over all thumbnails (plus
+        one over the full-resolution fallbacks), one reading-detector call and one
+        batched OCR decode.
+
+        Parameters
+        ----------
+        img_sources : List[str or file-like]
+            Image paths or file-like objects.
+        meter_type : Optional[str]
+            Reading-decoding profile applied to the whole batch.
+
+        Returns
+        -------
+        List[Tuple[ndarray, ndarray, str]]
+            One (display_image, reading_image, recognize_reading) tuple per source.
+        """
+
+        if not img_sources:
+            return []
+
+        IMAGES.inc(len(img_sources), entrypoint="predict_files")
+        BATCH_SIZE.observe(len(img_sources), component="pipeline")
+        with profile_request("predict_files"), stage_timer(
+            "total_batch", batch_size=len(img_sources)
+        ):
+            return self._predict_files(img_sources, meter_type)
+
+    def _predict_files(
+        self, img_sources: List[Any], meter_type: Optional[str]
+    ) -> List[Tuple[np.ndarray, np.ndarray, str]]:
+        params = self.params_config.coarse_to_fine
+        gates: List[Optional[str]] = [None] * len(img_sources)
+        display_images: List[Optional[np.ndarray]] = [None] * len(img_sources)
+        full_indices = list(range(len(img_sources)))
+        meter_checked = set()
+        # sources whose thumbnail is already the full-resolution image
+        decoded: Dict[int, np.ndarray] = {}
+
+        if params.enabled:
+            coarse = []
+            for i, img_source in enumerate(img_sources):
+                thumbnail, full_size = read_img_thumbnail(
+                    img_source, params.thumbnail_max_side
+                )
+                if max(full_size) >= params.min_side:
+                    coarse.append((i, thumbnail, full_size))
+                elif thumbnail.shape[1::-1] == tuple(full_size):
+                    decoded[i] = thumbnail
+
+            # the meter gate runs on the thumbnail, so a rejected photo is never decoded
+            coarse_gates = self._check_meters([thumbnail for _, thumbnail, _ in coarse])
+            for (i, thumbnail, _), gate in zip(coarse, coarse_gates):
+                meter_checked.add(i)
+                if gate is not None:
+                    gates[i], display_images[i] = gate, thumbnail
+            coarse = [c for c, gate in zip(coarse, coarse_gates) if gate is None]
+
+            with stage_timer("display_batch", coarse=True):
+                polygons = self.display_detector.detect_display_batch(
+                    images=[thumbnail for _, thumbnail, _ in coarse],
+                    min_conf=self._min_conf("display"),
+                )
+                for (i, thumbnail, full_size), polygon in zip(coarse, polygons):
+                    if polygon is not None and polygon.any():
+                        if self.params_config.gating.enabled:
+                            record_gate("display", True)
+                        display_images[i] = self._coarse_display_crop(
+                            img_sources[i], thumbnail, full_size, polygon
+                        )
+            full_indices = [i for i, image in enumerate(display_images) if image is None]
+
+        if full_indices:
+            full_images = [
+                decoded[i] if i in decoded else read_img(img_sources[i])
+                for i in full_indices
+            ]
+            unchecked = [k for k, i in enumerate(full_indices) if i not in meter_checked]
+            full_gates: List[Optional[str]] = [None] * len(full_indices)
+            for k, gate in zip(
+                unchecked, self._check_meters([full_images[k] for k in unchecked])
+            ):
+                full_gates[k] = gate
+            with stage_timer("display_batch"):
+                full_displays = self._extract_rois("display", full_images, full_gates)
+            for i, display_image, gate in zip(full_indices, full_displays, full_gates):
+                display_images[i], gates[i] = display_image, gate
+
+        with stage_timer("reading_batch"):
+            reading_images = self._extract_rois("reading", display_images, gates)
+        return self._recognize_batch(display_images, reading_images, gates, meter_type)
+
+    def _min_conf(self, stage: str) -> float:
+        """Detector confidence floor of a stage (0 when gating is off)."""
+        gating = self.params_config.gating
+        return gating[f"{stage}_min_conf"] if gating.enabled else 0.0
+
+    def _coarse_display_crop(
+        self,
+        img_source,
+        thumbnail: np.ndarray,
+        full_size: Tuple[int, int],
+        polygon: np.ndarray,
+    ) -> np.ndarray:
+        """Warp the display at full quality from a polygon found on the thumbnail."""
+        params = self.params_config.coarse_to_fine
+        full_w, full_h = full_size
+
+        # thumbnail -> full-resolution coordinates
+        scale = np.array(
+            [full_w / thumbnail.shape[1], full_h / thumbnail.shape[0]], dtype=np.float32
+        )
+        polygon = polygon.astype(np.float32) * scale
+
+        # decode only the display's bounding rect (plus a margin) at full quality
+        x1, y1 = polygon.reshape(-1, 2).min(axis=0)
+        x2, y2 = polygon.reshape(-1, 2).max(axis=0)
+        margin_x = (x2 - x1) * params.crop_margin
+        margin_y = (y2 - y1) * params.crop_margin
+        left, top = int(max(0, x1 - margin_x)), int(max(0, y1 - margin_y))
+        right = int(min(full_w, np.ceil(x2 + margin_x)))
+        bottom = int(min(full_h, np.ceil(y2 + margin_y)))
+        region = read_img_region(img_source, (left, top, right, bottom))
+
+        local_polygon = np.round(polygon - np.array([left, top], dtype=np.float32))
+        display_params = self.params_config.display_roi_resized
+        return extract_roi(
+            region,
+            local_polygon.astype(np.int32),
+            (display_params.resized_width, display_params.resized_height),
+            "Display",
+        )
+
+    def predict_multi(
+        self, image: np.ndarray, meter_type: Optional[str] = None
+    ) -> List[Tuple[np.ndarray, str, float]]:
+        """
+        Read every meter display in one image.
+
+        Cost is one display-detector call, one warp per display, one reading-detector
+        call over all display crops and one batched `generate` call, independent of
+        the number of meters. Thresholds come from `multi_meter` in the config.
+
+        Parameters
+        ----------
+        image : ndarray
+            Original image array.
+        meter_type : Optional[str]
+            Reading-decoding profile applied to all displays.
+
+        Returns
+        -------
+        List[Tuple[ndarray, str, float]]
+            One (display polygon in image coordinates, reading, detection confidence)
+            per display, highest confidence first. Empty when no display is found or
+            the meter gate rejects the image.
+        """
+
+        IMAGES.inc(entrypoint="predict_multi")
+        with profile_request("predict_multi"):
+            return self._predict_multi(image, meter_type)
+
+    def _predict_multi(
+        self, image: np.ndarray, meter_type: Optional[str]
+    ) -> List[Tuple[np.ndarray, str, float]]:
+        params = self.params_config.multi_meter
+        if self._check_meters([image])[0] is not None:
+            return []
+
+        with stage_timer("display_multi"):
+            polygons, confidences = self.display_detector.detect_displays(
+                image=image,
+                conf_threshold=params.conf_threshold,
+                iou_threshold=params.iou_threshold,
+                max_displays=params.max_displays,
+            )
+            if not polygons:
+                return []
 
-        # Detect and extract the reading ROI inside the display ROI
-        reading_image = self.reading_detector.extract_reading_roi(img=display_image)
+            display_params = self.params_config.display_roi_resized
+            display_images = extract_roi_batch(
+                image,
+                polygons,
+                (display_params.resized_width, display_params.resized_height),
+                "Display",
+            )
 
-        # Recognize the Readings from the Reading Image
-        recognize_reading = self.trocr_recognizer.recognize_reading(image=reading_image)
-        if len(recognize_reading) == 0:
-            recognize_reading = "No Reading Found"
+        BATCH_SIZE.observe(len(polygons), component="multi_meter")
+        display_images = list(display_images)
+        gates: List[Optional[str]] = [None] * len(display_images)
+        with stage_timer("reading_batch"):
+            reading_images = self._extract_rois("reading", display_images, gates)
+        results = self._recognize_batch(display_images, reading_images, gates, meter_type)
 
-        return display_image, reading_image, recognize_reading
+        return [
+            (polygon, reading, confidence)
+            for polygon, (_, _, reading), confidence in zip(polygons, results, confidences)
+        ]
@@ -0,0 +1,681 @@
+"""
+Local results store: every reading the pipeline produces, queryable by meter and time.
+
+Predictions used to be returned to the caller and then lost. `RecordingPipeline` sits
+in front of the pipeline (like `CachedPipeline`) and records one row per image in a
+SQLite database (WAL mode, so readers never block the writer):
+
+Features:
+- Row: timestamp, meter id, image hash, source name, reading, status ("ok", "empty",
+  "rejected:<gate>"), meter type, model version tag, entry point, batch size, time
+  per stage (ms, JSON) and the latency-budget degradations (JSON). For batched calls
+  the stage times are amortized: the batch's times divided by `batch_size`.
+- Indexes on (meter_id, created_at), created_at and image_hash.
+- `BackgroundResultWriter`: the request thread only enqueues the row (it never waits
+  on disk); a daemon thread inserts the rows in batches of `batch_size` (or every
+  `flush_interval_s`), one transaction each. Rows are small (no image is kept), and
+  when the queue is full they are dropped and counted instead of blocking.
+- Query API (`ResultsStore`): `query` / `iter_query` with meter id(s), time range,
+  image hash, status and model version filters, `latest_readings` (last row per
+  meter), `count` and `export` to CSV / Parquet, used by the Bulk Data page.
+  Large meter-id lists go through a temporary table join instead of a huge IN list.
+
+The meter id is given by the caller, or taken from the image or file name with
+`results_store.meter_id_pattern` (first regex group; the file stem otherwise).
+The image hash is a BLAKE2b digest of the decoded RGB pixels (plus shape and dtype),
+computed on the request thread. `predict_files` decodes each file in full for it
+(PIL, the same decoding as `read_img`), so a photo gets the same hash whether it was
+passed as a file or decoded by the caller; re-encoded copies of a photo do not.
+"""
+
+import atexit
+import csv
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from multiprocessing.util import Finalize
+from pathlib import PurePath
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+from PIL import Image
+
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+from metervision.monitoring.metrics import collect_stage_times
+from metervision.pipeline.gating import rejected_gate
+
+COLUMNS = [
+    "id",
+    "created_at",
+    "meter_id",
+    "image_hash",
+    "source",
+    "reading",
+    "status",
+    "meter_type",
+    "model_version",
+    "entrypoint",
+    "batch_size",
+    "stage_ms",
+    "degradations",
+]
+INSERT_COLUMNS = COLUMNS[1:]
+JSON_COLUMNS = ("stage_ms", "degradations")
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS readings ("
+    "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, meter_id TEXT, image_hash TEXT, "
+    "source TEXT, reading TEXT, status TEXT NOT NULL, meter_type TEXT, "
+    "model_version TEXT, entrypoint TEXT, batch_size INTEGER, stage_ms TEXT, "
+    "degradations TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_readings_meter_time ON readings (meter_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_readings_time ON readings (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_readings_image_hash ON readings (image_hash)",
+]
+TimeValue = Union[float, int, str, datetime, None]
+
+
+def _timestamp(value: TimeValue) -> Optional[float]:
+    """Unix seconds of a datetime, an ISO string or a number."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def reading_status(reading: Optional[str]) -> str:
+    """"ok", "empty" (no text read) or "rejected:<gate>" (early-exit gate)."""
+    gate = rejected_gate(reading) if reading else None
+    if gate is not None:
+        return f"rejected:{gate}"
+    if not reading or reading == "No Reading Found":
+        return "empty"
+    return "ok"
+
+
+def source_name(img_source: Any) -> Optional[str]:
+    """File name of a path or of a file-like object with a `name` (e.g. an upload)."""
+    name = img_source if isinstance(img_source, (str, os.PathLike)) else None
+    name = name or getattr(img_source, "name", None)
+    return str(name) if name else None
+
+
+def meter_id_from_name(name: Optional[str], pattern: Optional[str] = None) -> Optional[str]:
+    """Meter id of an image name: first group of `pattern`, else the file stem."""
+    if not name:
+        return None
+    stem = PurePath(name.replace("\\", "/")).stem
+    if pattern:
+        match = re.search(pattern, name)
+        if match:
+            return match.group(1) if match.groups() else match.group(0)
+    return stem
+
+
+def image_fingerprint(image: np.ndarray) -> str:
+    """Image hash of a decoded image: digest of its pixels, shape and dtype."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.shape}|{image.dtype}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def file_fingerprint(img_source: Any) -> Optional[str]:
+    """Image hash of an encoded image (path or file-like), decoded like `read_img`."""
+    try:
+        if hasattr(img_source, "seek"):
+            img_source.seek(0)
+        with Image.open(img_source) as img:
+            image = np.array(img.convert("RGB"), dtype=np.uint8)
+        return image_fingerprint(image)
+    except OSError:
+        return None
+    finally:
+        if hasattr(img_source, "seek"):
+            img_source.seek(0)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Store
+# ------------------------------------------------------------------------------------------------------------------
+
+
+class ResultsStore:
+    """
+    SQLite table of readings with the indexes and queries history lookups need.
+
+    Parameters
+    ----------
+    path : str
+        SQLite database file (created if missing).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.lock = threading.Lock()
+            self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+            self.connection.commit()
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert rows (dicts keyed by column) in one transaction."""
+        if not rows:
+            return 0
+        values = [tuple(self._flat(row).get(c) for c in INSERT_COLUMNS) for row in rows]
+        sql = (
+            f"INSERT INTO readings ({', '.join(INSERT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in INSERT_COLUMNS)})"
+        )
+        with self.lock, self.connection:
+            self.connection.executemany(sql, values)
+        return len(values)
+
+    def _reader(self) -> sqlite3.Connection:
+        """A connection of its own per query, so reads run alongside the writer (WAL)."""
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _where(
+        connection: sqlite3.Connection,
+        meter_id: Optional[str],
+        meter_ids: Optional[Sequence[str]],
+        since: TimeValue,
+        until: TimeValue,
+        image_hash: Optional[str],
+        status: Optional[str],
+        model_version: Optional[str],
+    ):
+        """FROM/WHERE clause and parameters of the query filters."""
+        source, clauses, params = "readings r", [], []
+        if meter_ids is not None:
+            # thousands of ids: join a temporary table rather than binding an IN list
+            connection.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS query_meters "
+                "(meter_id TEXT PRIMARY KEY) WITHOUT ROWID"
+            )
+            connection.execute("DELETE FROM query_meters")
+            connection.executemany(
+                "INSERT OR IGNORE INTO query_meters VALUES (?)", ((m,) for m in meter_ids)
+            )
+            # CROSS JOIN keeps the id list as the outer loop (one index seek per meter)
+            source = "query_meters q CROSS JOIN readings r ON r.meter_id = q.meter_id"
+        if meter_id is not None:
+            clauses.append("r.meter_id = ?")
+            params.append(meter_id)
+        if since is not None:
+            clauses.append("r.created_at >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("r.created_at < ?")
+            params.append(_timestamp(until))
+        for column, value in (
+            ("image_hash", image_hash),
+            ("status", status),
+            ("model_version", model_version),
+        ):
+            if value is not None:
+                clauses.append(f"r.{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return f"FROM {source}{where}", params
+
+    def iter_query(
+        self,
+        meter_id: Optional[str] = None,
+        meter_ids: Optional[Sequence[str]] = None,
+        since: TimeValue = None,
+        until: TimeValue = None,
+        image_hash: Optional[str] = None,
+        status: Optional[str] = None,
+        model_version: Optional[str] = None,
+        limit: Optional[int] = None,
+        chunk_size: int = 10000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream the matching rows in chunks, ordered by meter and time.
+
+        Parameters
+        ----------
+        meter_id, meter_ids : Optional
+            One meter, or a list of meters (e.g. 50k ids).
+        since, until : Optional[float, str or datetime]
+            Time range [since, until) as unix seconds, ISO strings or datetimes.
+        image_hash, status, model_version : Optional[str]
+            Exact-match filters.
+        limit : Optional[int]
+            Maximum number of rows.
+        chunk_size : int
+            Rows per yielded list.
+
+        Yields
+        ------
+        List[Dict[str, Any]]
+            Rows as dicts (`COLUMNS`), `stage_ms` / `degradations` decoded from JSON.
+        """
+        try:
+            with closing(self._reader()) as connection:
+                clause, params = self._where(
+                    connection, meter_id, meter_ids, since, until, image_hash, status,
+                    model_version,
+                )
+                sql = (
+                    f"SELECT {', '.join(f'r.{c}' for c in COLUMNS)} {clause} "
+                    f"ORDER BY r.meter_id, r.created_at"
+                )
+                if limit is not None:
+                    sql += f" LIMIT {int(limit)}"
+                cursor = connection.execute(sql, params)
+                while True:
+                    batch = cursor.fetchmany(chunk_size)
+                    if not batch:
+                        break
+                    yield [self._row(values) for values in batch]
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    @staticmethod
+    def _row(values) -> Dict[str, Any]:
+        row = dict(zip(COLUMNS, values))
+        for column in JSON_COLUMNS:
+            if row[column]:
+                row[column] = json.loads(row[column])
+        return row
+
+    @staticmethod
+    def _flat(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Row with the JSON columns encoded as text (for SQLite, CSV and Parquet)."""
+        encoded = dict(row)
+        for column in JSON_COLUMNS:
+            if encoded.get(column) is not None:
+                encoded[column] = json.dumps(encoded[column])
+        return encoded
+
+    def query(self, **filters) -> List[Dict[str, Any]]:
+        """All matching rows as a list (see `iter_query` for the filters)."""
+        return [row for chunk in self.iter_query(**filters) for row in chunk]
+
+    def count(self, **filters) -> int:
+        """Number of matching rows (same filters as `iter_query`, without `limit`)."""
+        try:
+            with closing(self._reader()) as connection:
+                clause, params = self._where(
+                    connection,
+                    filters.get("meter_id"),
+                    filters.get("meter_ids"),
+                    filters.get("since"),
+                    filters.get("until"),
+                    filters.get("image_hash"),
+                    filters.get("status"),
+                    filters.get("model_version"),
+                )
+                return connection.execute(f"SELECT COUNT(*) {clause}", params).fetchone()[0]
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    def latest_readings(
+        self,
+        meter_ids: Optional[Sequence[str]] = None,
+        until: TimeValue = None,
+        status: Optional[str] = "ok",
+    ) -> List[Dict[str, Any]]:
+        """Last row per meter (before `until`), by default among the "ok" readings."""
+        try:
+            with closing(self._reader()) as connection:
+                clause, params = self._where(
+                    connection, None, meter_ids, None, until, None, status, None
+                )
+                # SQLite returns the other columns of the row holding MAX(created_at)
+                columns = ", ".join(f"r.{c}" for c in COLUMNS)
+                sql = (
+                    f"SELECT {columns}, MAX(r.created_at) {clause} "
+                    f"GROUP BY r.meter_id ORDER BY r.meter_id"
+                )
+                rows = connection.execute(sql, params)
+                return [self._row(values[:-1]) for values in rows]
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+    def export(self, output: str, output_format: Optional[str] = None, **filters) -> int:
+        """
+        Write the matching rows to CSV or Parquet (format from `output`'s suffix).
+
+        Returns
+        -------
+        int
+            Number of rows written.
+        """
+        output_format = output_format or (
+            "parquet" if output.endswith(".parquet") else "csv"
+        )
+        written = 0
+        try:
+            if output_format == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                writer = None
+                for chunk in self.iter_query(**filters):
+                    table = pa.Table.from_pylist([self._flat(row) for row in chunk])
+                    writer = writer or pq.ParquetWriter(output, table.schema)
+                    writer.write_table(table)
+                    written += len(chunk)
+                if writer is not None:
+                    writer.close()
+            else:
+                with open(output, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=COLUMNS)
+                    writer.writeheader()
+                    for chunk in self.iter_query(**filters):
+                        writer.writerows(self._flat(row) for row in chunk)
+                        written += len(chunk)
+            logging.info(f"Exported {written} readings to {output}")
+            return written
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Background writer
+# ------------------------------------------------------------------------------------------------------------------
+
+
+class BackgroundResultWriter:
+    """
+    Batches rows into `ResultsStore.insert_many` on a daemon thread.
+
+    Parameters
+    ----------
+    store : ResultsStore
+        Destination store.
+    batch_size : int
+        Rows per transaction at most.
+    flush_interval_s : float
+        A partial batch is written after waiting this long for more rows.
+    queue_size : int
+        Rows waiting to be written; further rows are dropped (and counted).
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        store: ResultsStore,
+        batch_size: int = 500,
+        flush_interval_s: float = 1.0,
+        queue_size: int = 20000,
+    ):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="results-writer", daemon=True)
+        self.thread.start()
+        # multiprocessing workers exit through os._exit, which skips atexit
+        atexit.register(self.close)
+        Finalize(self, self.close, exitpriority=10)
+
+    def record(self, row: Dict[str, Any]) -> bool:
+        """Queue one row without blocking; False if it was dropped (queue full)."""
+        try:
+            self.queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logging.warning(f"Results queue full: {self.dropped} rows dropped so far")
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every row queued so far is written."""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write the queued rows and stop the thread (idempotent)."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(self._STOP)
+        self.thread.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            try:
+                items = [self.queue.get(timeout=self.flush_interval_s)]
+            except queue.Empty:
+                continue
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows, events = [], []
+            for item in items:
+                if item is self._STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    events.append(item)
+                else:
+                    rows.append(item)
+            try:
+                self.written += self.store.insert_many(rows)
+            except Exception as exc:
+                logging.error(f"Could not write {len(rows)} results: {exc}")
+            for event in events:
+                event.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+        }
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Recording front
+# ------------------------------------------------------------------------------------------------------------------
+
+
+class RecordingPipeline:
+    """
+    Front for a pipeline (or `CachedPipeline`) that records every prediction.
+
+    Parameters
+    ----------
+    pipeline : MeterVisionPipeline or CachedPipeline
+        The wrapped pipeline.
+    writer : BackgroundResultWriter
+        Writer feeding the results store.
+    meter_id_pattern : Optional[str]
+        Regex extracting the meter id from image / file names (see `meter_id_from_name`).
+    """
+
+    def __init__(self, pipeline, writer: BackgroundResultWriter, meter_id_pattern=None):
+        from metervision.pipeline.cache import model_version_tag
+
+        self.pipeline = pipeline
+        self.writer = writer
+        self.store = writer.store
+        self.meter_id_pattern = meter_id_pattern or None
+        self.version = getattr(pipeline, "version", None) or model_version_tag(pipeline)
+
+    def __getattr__(self, name: str) -> Any:
+        # expose the wrapped pipeline's attributes (detectors, configs, stats, ...)
+        if name == "pipeline":
+            raise AttributeError(name)
+        return getattr(self.pipeline, name)
+
+    def _record(
+        self,
+        entrypoint: str,
+        readings: List[str],
+        hashes: List[Optional[str]],
+        meter_ids: Optional[Sequence[Optional[str]]],
+        sources: Sequence[Optional[str]],
+        meter_type: Optional[str],
+        stage_times: Dict[str, float],
+        degradations: Optional[List[str]] = None,
+    ) -> None:
+        now = time.time()
+        pattern = self.meter_id_pattern
+        # per image: a batch's stage times are shared by its images
+        stage_ms = {
+            stage: round(s * 1000 / len(readings), 3) for stage, s in stage_times.items()
+        }
+        for i, (reading, digest, source) in enumerate(zip(readings, hashes, sources)):
+            meter_id = meter_ids[i] if meter_ids is not None else None
+            self.writer.record(
+                {
+                    "created_at": now,
+                    "meter_id": meter_id or meter_id_from_name(source, pattern),
+                    "image_hash": digest,
+                    "source": source,
+                    "reading": reading,
+                    "status": reading_status(reading),
+                    "meter_type": meter_type,
+                    "model_version": self.version,
+                    "entrypoint": entrypoint,
+                    "batch_size": len(readings),
+                    "stage_ms": stage_ms,
+                    "degradations": degradations,
+                }
+            )
+
+    def predict(
+        self,
+        image: np.ndarray,
+        meter_type: Optional[str] = None,
+        meter_id: Optional[str] = None,
+        source: Optional[str] = None,
+    ):
+        """`predict` of the wrapped pipeline, recorded under `meter_id`."""
+        with collect_stage_times() as stage_times:
+            result = self.pipeline.predict(image=image, meter_type=meter_type)
+        self._record(
+            "predict",
+            [result[2]],
+            [image_fingerprint(image)],
+            [meter_id],
+            [source],
+            meter_type,
+            stage_times,
+        )
+        return result
+
+    def predict_within(
+        self,
+        image: np.ndarray,
+        budget_ms: float,
+        meter_type: Optional[str] = None,
+        meter_id: Optional[str] = None,
+        source: Optional[str] = None,
+    ):
+        """`predict_within` of the wrapped pipeline, recorded with its degradations."""
+        with collect_stage_times() as stage_times:
+            result = self.pipeline.predict_within(image, budget_ms, meter_type)
+        self._record(
+            "predict_within",
+            [result[2]],
+            [image_fingerprint(image)],
+            [meter_id],
+            [source],
+            meter_type,
+            stage_times,
+            result[3]["degradations"],
+        )
+        return result
+
+    def predict_batch(
+        self,
+        images: List[np.ndarray],
+        meter_type: Optional[str] = None,
+        meter_ids: Optional[Sequence[Optional[str]]] = None,
+        sources: Optional[Sequence[Optional[str]]] = None,
+    ):
+        """`predict_batch` of the wrapped pipeline, one recorded row per image."""
+        with collect_stage_times() as stage_times:
+            results = self.pipeline.predict_batch(images=images, meter_type=meter_type)
+        self._record(
+            "predict_batch",
+            [reading for _, _, reading in results],
+            [image_fingerprint(image) for image in images],
+            meter_ids,
+            sources or [None] * len(images),
+            meter_type,
+            stage_times,
+        )
+        return results
+
+    def predict_files(
+        self,
+        img_sources: List[Any],
+        meter_type: Optional[str] = None,
+        meter_ids: Optional[Sequence[Optional[str]]] = None,
+    ):
+        """`predict_files` of the wrapped pipeline, meter ids from the file names."""
+        with collect_stage_times() as stage_times:
+            results = self.pipeline.predict_files(
+                img_sources=img_sources, meter_type=meter_type
+            )
+        self._record(
+            "predict_files",
+            [reading for _, _, reading in results],
+            [file_fingerprint(img_source) for img_source in img_sources],
+            meter_ids,
+            [source_name(img_source) for img_source in img_sources],
+            meter_type,
+            stage_times,
+        )
+        return results
+
+    def predict_file(self, img_source, meter_type: Optional[str] = None, meter_id=None):
+        meter_ids = [meter_id] if meter_id is not None else None
+        return self.predict_files([img_source], meter_type, meter_ids)[0]
+
+
+def with_results_store(pipeline, params, db_path: str):
+    """
+    Wrap `pipeline` in a `RecordingPipeline` when `results_store.enabled` is set.
+
+    Parameters
+    ----------
+    pipeline : MeterVisionPipeline or CachedPipeline
+        Loaded pipeline.
+    params : ConfigBox
+        The `results_store` section of the parameter config.
+    db_path : str
+        SQLite file of the store (`results_db` in the directory config).
+    """
+    if not params.enabled:
+        return pipeline
+    writer = BackgroundResultWriter(
+        ResultsStore(db_path),
+        batch_size=params.batch_size,
+        flush_interval_s=params.flush_interval_s,
+        queue_size=params.queue_size,
+    )
+    logging.info(f"Results store enabled ({db_path})")
+    return RecordingPipeline(pipeline, writer, params.meter_id_pattern)
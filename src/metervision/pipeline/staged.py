@@ -0,0 +1,376 @@
+"""
+Stage-overlapped (pipelined) execution of the MeterVision flow.
+
+`StagedPipeline` splits the prediction flow of `MeterVisionPipeline` into three stages
+connected by bounded queues:
+
+    display detection + crop -> reading detection + crop -> OCR
+
+Each stage runs in its own worker thread(s), so for a stream of images the display
+detector works on image N+1 while TrOCR decodes image N (PyTorch releases the GIL
+inside its kernels). Results are yielded in input order. The stages use the same
+batch helpers as `MeterVisionPipeline.predict_batch` (meter gate, early-exit gates,
+decoding profile and "No Reading Found" placeholder), so each result is the one
+`predict` would return.
+
+Per-stage thread counts come from `staged_pipeline` in parameter_config.yaml. Extra
+threads of the YOLO stages get their own detector instance, as Ultralytics
+predictors are not safe to share between threads; OCR threads share the recognizer.
+`stats()` exposes queue depths and per-stage utilization to locate the bottleneck.
+"""
+
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+from metervision.models.roi_display import DisplayDetector
+from metervision.models.roi_reading import ReadingDetector
+from metervision.pipeline.predictor import MeterVisionPipeline
+
+# Queue marker telling a worker that no more items will come
+_STOP = object()
+
+
+class _Stage:
+    """
+    One pipeline stage: `threads` workers applying a step function to queued items.
+
+    Items are (sequence number, payload, error) tuples; an item that already carries
+    an error is forwarded untouched so the consumer can raise it in order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        steps: List[Callable[[Any], Any]],
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        stop_event: threading.Event,
+    ):
+        self.name = name
+        self.steps = steps
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = stop_event
+        self.next_stage_threads = 1
+
+        self.lock = threading.Lock()
+        self.running_threads = 0
+        self.processed = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def threads(self) -> int:
+        return len(self.steps)
+
+    def start(self) -> List[threading.Thread]:
+        self.running_threads = self.threads
+        workers = [
+            threading.Thread(
+                target=self._work,
+                args=(step,),
+                name=f"{self.name}-{i}",
+                daemon=True,
+            )
+            for i, step in enumerate(self.steps)
+        ]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    def _work(self, step: Callable[[Any], Any]) -> None:
+        while True:
+            item = _get(self.input_queue, self.stop_event)
+            if item is _STOP or item is None:
+                break
+
+            seq, payload, error = item
+            if error is None:
+                start_time = time.perf_counter()
+                try:
+                    payload = step(payload)
+                except Exception as exc:
+                    error = exc
+                with self.lock:
+                    self.busy_seconds += time.perf_counter() - start_time
+                    self.processed += 1
+
+            if not _put(self.output_queue, (seq, payload, error), self.stop_event):
+                break
+
+        # the last worker of this stage closes the next stage's input
+        with self.lock:
+            self.running_threads -= 1
+            last = self.running_threads == 0
+        if last:
+            for _ in range(self.next_stage_threads):
+                _put(self.output_queue, _STOP, self.stop_event)
+
+
+def _get(q: queue.Queue, stop_event: threading.Event) -> Optional[Any]:
+    """Blocking get that gives up (returns None) once the pipeline is stopped."""
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _put(q: queue.Queue, item: Any, stop_event: threading.Event) -> bool:
+    """Blocking put on a bounded queue that gives up once the pipeline is stopped."""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class StagedPipeline:
+    """
+    Runs display, reading and OCR stages of a `MeterVisionPipeline` concurrently.
+
+    Parameters
+    ----------
+    pipeline : MeterVisionPipeline
+        Loaded pipeline whose models are used by the first worker of every stage.
+    display_threads, reading_threads, ocr_threads : Optional[int]
+        Worker threads per stage. Default to `staged_pipeline` in the parameter config.
+    queue_size : Optional[int]
+        Capacity of each inter-stage queue (bounds memory and provides backpressure).
+    """
+
+    def __init__(
+        self,
+        pipeline: MeterVisionPipeline,
+        display_threads: Optional[int] = None,
+        reading_threads: Optional[int] = None,
+        ocr_threads: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        params = pipeline.params_config.staged_pipeline
+        self.pipeline = pipeline
+        self.display_threads = display_threads or params.display_threads
+        self.reading_threads = reading_threads or params.reading_threads
+        self.ocr_threads = ocr_threads or params.ocr_threads
+        self.queue_size = queue_size or params.queue_size
+
+        self.stages: List[_Stage] = []
+        self.queues: List[queue.Queue] = []
+        self.elapsed = 0.0
+        self.run_start: Optional[float] = None
+        # the meter gate may be an Ultralytics classifier, shared by the display threads
+        self._meter_gate_lock = threading.Lock()
+
+        # Extra YOLO replicas are created lazily, once, and reused across runs
+        self._display_replicas: List[DisplayDetector] = []
+        self._reading_replicas: List[ReadingDetector] = []
+
+    # --------------------------------------------------------------------------------------------------------------
+    # Stage steps
+    # --------------------------------------------------------------------------------------------------------------
+
+    def _display_detector(self, index: int) -> DisplayDetector:
+        if index == 0:
+            return self.pipeline.display_detector
+        while len(self._display_replicas) < index:
+            self._display_replicas.append(
+                DisplayDetector(
+                    model_path=self.pipeline.display_model_path,
+                    params=self.pipeline.params_config.display_roi_resized,
+                )
+            )
+        return self._display_replicas[index - 1]
+
+    def _reading_detector(self, index: int) -> ReadingDetector:
+        if index == 0:
+            return self.pipeline.reading_detector
+        while len(self._reading_replicas) < index:
+            self._reading_replicas.append(
+                ReadingDetector(
+                    model_path=self.pipeline.reading_model_path,
+                    params=self.pipeline.params_config.reading_roi_resized,
+                )
+            )
+        return self._reading_replicas[index - 1]
+
+    def _display_step(self, index: int) -> Callable[[np.ndarray], Tuple]:
+        detector = self._display_detector(index)
+
+        def step(image):
+            with self._meter_gate_lock:
+                gates = self.pipeline._check_meters([image])
+            display_images = self.pipeline._extract_rois(
+                "display", [image], gates, detector=detector
+            )
+            return display_images, gates
+
+        return step
+
+    def _reading_step(self, index: int) -> Callable[[Tuple], Tuple]:
+        detector = self._reading_detector(index)
+
+        def step(payload):
+            display_images, gates = payload
+            reading_images = self.pipeline._extract_rois(
+                "reading", display_images, gates, detector=detector
+            )
+            return display_images, reading_images, gates
+
+        return step
+
+    def _ocr_step(self, index: int, meter_type: Optional[str]) -> Callable[[Tuple], Tuple]:
+        return lambda payload: self.pipeline._recognize_batch(*payload, meter_type)[0]
+
+    # --------------------------------------------------------------------------------------------------------------
+    # Execution
+    # --------------------------------------------------------------------------------------------------------------
+
+    def _build(self, stop_event: threading.Event, meter_type: Optional[str]) -> None:
+        # Replicas are loaded here, on the caller thread, before any stage starts
+        display_steps = [self._display_step(i) for i in range(self.display_threads)]
+        reading_steps = [self._reading_step(i) for i in range(self.reading_threads)]
+        ocr_steps = [self._ocr_step(i, meter_type) for i in range(self.ocr_threads)]
+
+        self.queues = [queue.Queue(maxsize=self.queue_size) for _ in range(4)]
+        specs = [
+            ("display", display_steps),
+            ("reading", reading_steps),
+            ("ocr", ocr_steps),
+        ]
+        self.stages = [
+            _Stage(
+                name=name,
+                steps=steps,
+                input_queue=self.queues[i],
+                output_queue=self.queues[i + 1],
+                stop_event=stop_event,
+            )
+            for i, (name, steps) in enumerate(specs)
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_stage_threads = next_stage.threads
+
+    def run(
+        self, images: Iterable[np.ndarray], meter_type: Optional[str] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, str]]:
+        """
+        Stream images through the overlapped stages.
+
+        Parameters
+        ----------
+        images : Iterable[ndarray]
+            Original image arrays; consumed lazily as the first queue drains.
+        meter_type : Optional[str]
+            Reading-decoding profile (`reading_decoding.meter_types`); config default if None.
+
+        Yields
+        ------
+        Tuple[ndarray, ndarray, str]
+            (display_image, reading_image, recognize_reading) per image, in input order,
+            exactly as `MeterVisionPipeline.predict` would return them.
+        """
+        stop_event = threading.Event()
+        try:
+            self._build(stop_event, meter_type)
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+        first_stage = self.stages[0]
+
+        def feed() -> None:
+            seq = 0
+            try:
+                for image in images:
+                    if not _put(self.queues[0], (seq, image, None), stop_event):
+                        return
+                    seq += 1
+            except Exception as exc:
+                # a failing source (e.g. a generator reading from disk) is raised in order
+                error = CustomException(str(exc), sys)
+                _put(self.queues[0], (seq, None, error), stop_event)
+            finally:
+                for _ in range(first_stage.threads):
+                    _put(self.queues[0], _STOP, stop_event)
+
+        self.run_start = time.perf_counter()
+        self.elapsed = 0.0
+        threads = [threading.Thread(target=feed, name="staged-feeder", daemon=True)]
+        for stage in self.stages:
+            threads.extend(stage.start())
+        threads[0].start()
+
+        pending: Dict[int, Tuple[Any, Optional[Exception]]] = {}
+        next_seq = 0
+        try:
+            while True:
+                item = _get(self.queues[-1], stop_event)
+                if item is _STOP or item is None:
+                    break
+
+                seq, payload, error = item
+                pending[seq] = (payload, error)
+                while next_seq in pending:
+                    payload, error = pending.pop(next_seq)
+                    next_seq += 1
+                    if error is not None:
+                        # stage errors are already CustomExceptions from the models
+                        raise error
+                    yield payload
+        finally:
+            stop_event.set()
+            self.elapsed = time.perf_counter() - self.run_start
+            logging.info(f"Staged pipeline finished: {self.stats()}")
+
+    def predict_many(
+        self, images: Iterable[np.ndarray], meter_type: Optional[str] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray, str]]:
+        """Convenience wrapper collecting `run` into a list."""
+        return list(self.run(images, meter_type))
+
+    # --------------------------------------------------------------------------------------------------------------
+    # Introspection
+    # --------------------------------------------------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-stage counters of the current (or last) run.
+
+        Returns
+        -------
+        Dict[str, Dict[str, Any]]
+            For each stage: threads, processed items, busy seconds, utilization
+            (busy time / (wall time x threads)) and the depth of its input queue.
+        """
+        if self.run_start is None:
+            return {}
+
+        elapsed = self.elapsed or (time.perf_counter() - self.run_start)
+        return {
+            stage.name: {
+                "threads": stage.threads,
+                "processed": stage.processed,
+                "busy_seconds": round(stage.busy_seconds, 4),
+                "utilization": round(
+                    stage.busy_seconds / max(elapsed * stage.threads, 1e-9), 3
+                ),
+                "queue_depth": stage.input_queue.qsize(),
+                "queue_capacity": self.queue_size,
+            }
+            for stage in self.stages
+        }
+
+    def bottleneck(self) -> Optional[str]:
+        """Name of the stage with the highest utilization, if a run has started."""
+        stats = self.stats()
+        if not stats:
+            return None
+        return max(stats, key=lambda name: stats[name]["utilization"])
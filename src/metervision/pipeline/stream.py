@@ -0,0 +1,332 @@
+"""
+Stream (video / frame-sequence) reading mode.
+
+Some sites send a short clip or a burst of frames of the same meter instead of a
+single photo. Running both detectors on every frame is wasted work when the camera
+is steady, so `StreamReader`:
+
+Features:
+- Samples every n-th frame of a local video file (skipped frames are grabbed, not
+  decoded) or of a folder of images (sorted by name).
+- Tracks the display / reading boxes between frames: they are reused while a cheap
+  motion check (mean absolute difference of small grayscale thumbnails against the
+  frame the boxes were detected on) stays under `drift_threshold`, and the detectors
+  only run again on drift, after a failed detection or every `redetect_every` frames.
+- OCRs the tracked reading crops in batches and combines the per-frame readings into
+  one consensus reading (majority vote) with a confidence (the vote share).
+
+CLI:
+    python -m metervision.pipeline.stream --source clip.mp4 --sample-every 5
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from metervision.constants import PARAMS_CONFIG_FILE
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+from metervision.utils.file_utils import read_img
+from metervision.utils.roi_postprocessing import extract_roi
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+NO_READING = "No Reading Found"
+THUMBNAIL_SIZE = (64, 48)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Frame sources
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def iter_frames(
+    source: str, sample_every: int = 1, max_frames: int = 0
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (frame_index, RGB frame) for every `sample_every`-th frame of a source.
+
+    Parameters
+    ----------
+    source : str
+        Path to a video file readable by OpenCV, or a folder of images.
+    sample_every : int
+        Keep one frame out of `sample_every`.
+    max_frames : int
+        Stop after this many sampled frames (0 = no limit).
+    """
+    sample_every = max(1, int(sample_every))
+    yielded = 0
+
+    if os.path.isdir(source):
+        names = sorted(
+            name for name in os.listdir(source) if name.lower().endswith(IMAGE_SUFFIXES)
+        )
+        for index in range(0, len(names), sample_every):
+            frame = read_img(os.path.join(source, names[index]))
+            if frame is None:
+                logging.warning(f"Skipping unreadable frame {names[index]}")
+                continue
+            yield index, frame
+            yielded += 1
+            if max_frames and yielded >= max_frames:
+                return
+        return
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Source must be a video file or a folder of images: {source}")
+    try:
+        index = 0
+        while True:
+            # grab() advances without decoding; only sampled frames are retrieved
+            if not capture.grab():
+                break
+            if index % sample_every == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    yield index, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    yielded += 1
+                    if max_frames and yielded >= max_frames:
+                        break
+            index += 1
+    finally:
+        capture.release()
+
+
+def _thumbnail(frame: np.ndarray) -> np.ndarray:
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Consensus
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def consensus_reading(readings: List[str]) -> Tuple[str, float, Dict[str, int]]:
+    """
+    Majority vote over per-frame readings.
+
+    Parameters
+    ----------
+    readings : List[str]
+        One OCR output per frame; empty strings and "No Reading Found" are ignored.
+
+    Returns
+    -------
+    Tuple[str, float, Dict[str, int]]
+        (reading, confidence, votes). The confidence is the share of all frames that
+        agree with the reading, so frames without a reading lower it as well. Ties go
+        to the reading seen first.
+    """
+    votes = Counter(r.strip() for r in readings if r and r.strip() and r != NO_READING)
+    if not votes:
+        return NO_READING, 0.0, {}
+
+    reading, count = votes.most_common(1)[0]
+    return reading, round(count / len(readings), 3), dict(votes)
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Stream reader
+# ------------------------------------------------------------------------------------------------------------------
+
+
+class StreamReader:
+    """
+    Reads one meter from a video or frame sequence, reusing boxes between frames.
+
+    Parameters
+    ----------
+    pipeline : MeterVisionPipeline
+        Loaded pipeline (a `CachedPipeline` wrapper works too).
+    sample_every : int
+        Keep one frame out of `sample_every`.
+    max_frames : int
+        Maximum sampled frames per stream (0 = no limit).
+    drift_threshold : float
+        Mean absolute thumbnail difference (0-1) above which the detectors run again.
+    redetect_every : int
+        Force a detection after this many tracked frames (0 = only on drift).
+    ocr_batch_size : int
+        Reading crops per OCR `generate` call.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        sample_every: Optional[int] = None,
+        max_frames: Optional[int] = None,
+        drift_threshold: Optional[float] = None,
+        redetect_every: Optional[int] = None,
+        ocr_batch_size: Optional[int] = None,
+    ):
+        params = PARAMS_CONFIG_FILE.stream_mode
+        self.pipeline = pipeline
+        self.sample_every = sample_every or params.sample_every
+        self.max_frames = params.max_frames if max_frames is None else max_frames
+        self.drift_threshold = (
+            params.drift_threshold if drift_threshold is None else drift_threshold
+        )
+        self.redetect_every = (
+            params.redetect_every if redetect_every is None else redetect_every
+        )
+        self.ocr_batch_size = ocr_batch_size or params.ocr_batch_size
+
+    def _detect(
+        self, frame: np.ndarray
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Run both detectors; returns (display_polygon, reading_polygon)."""
+        display_params = self.pipeline.display_detector.params
+        # batch helpers return None on a frame with no box instead of raising
+        display_polygon = self.pipeline.display_detector.detect_display_batch([frame])[0]
+        if display_polygon is None or not display_polygon.any():
+            return None, None
+
+        display_image = extract_roi(
+            frame,
+            display_polygon,
+            (display_params.resized_width, display_params.resized_height),
+            "Display",
+        )
+        reading_polygon = self.pipeline.reading_detector.detect_reading_batch(
+            [display_image]
+        )[0]
+        if reading_polygon is None or not reading_polygon.any():
+            reading_polygon = None
+        return display_polygon, reading_polygon
+
+    def _crop(
+        self,
+        frame: np.ndarray,
+        display_polygon: np.ndarray,
+        reading_polygon: Optional[np.ndarray],
+    ) -> np.ndarray:
+        """Reading crop of a frame from known boxes (same flow as `predict`)."""
+        display_params = self.pipeline.display_detector.params
+        reading_params = self.pipeline.reading_detector.params
+        display_image = extract_roi(
+            frame,
+            display_polygon,
+            (display_params.resized_width, display_params.resized_height),
+            "Display",
+        )
+        if reading_polygon is None:
+            return display_image
+        return extract_roi(
+            display_image,
+            reading_polygon,
+            (reading_params.resized_width, reading_params.resized_height),
+            "Reading",
+        )
+
+    def read(self, source: str, meter_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Read a video file or folder of frames into one consensus reading.
+
+        Parameters
+        ----------
+        source : str
+            Video file or folder of images.
+        meter_type : Optional[str]
+            Reading-decoding profile (see `reading_decoding` in parameter_config.yaml).
+
+        Returns
+        -------
+        Dict[str, Any]
+            reading, confidence, votes, frames_sampled, frames_read, detector_runs
+            and the per-frame readings as (frame_index, reading) pairs.
+        """
+        try:
+            display_polygon, reading_polygon = None, None
+            reference, tracked_for = None, 0
+            detector_runs = 0
+            frame_indices: List[int] = []
+            crops: List[np.ndarray] = []
+            frames_sampled = 0
+
+            for index, frame in iter_frames(source, self.sample_every, self.max_frames):
+                frames_sampled += 1
+                thumbnail = _thumbnail(frame)
+
+                drifted = (
+                    display_polygon is None
+                    or reference is None
+                    or thumbnail.shape != reference.shape
+                    or np.abs(thumbnail - reference).mean() / 255 > self.drift_threshold
+                    or (self.redetect_every and tracked_for >= self.redetect_every)
+                )
+                if drifted:
+                    display_polygon, reading_polygon = self._detect(frame)
+                    detector_runs += 1
+                    reference, tracked_for = thumbnail, 0
+                    if display_polygon is None:
+                        logging.warning(f"Frame {index}: display not detected")
+                        continue
+                else:
+                    tracked_for += 1
+
+                frame_indices.append(index)
+                crops.append(self._crop(frame, display_polygon, reading_polygon))
+
+            readings: List[str] = []
+            recognizer = self.pipeline.trocr_recognizer
+            for start in range(0, len(crops), self.ocr_batch_size):
+                readings.extend(
+                    recognizer.recognize_readings(
+                        images=crops[start : start + self.ocr_batch_size],
+                        meter_type=meter_type,
+                    )
+                )
+
+            # frames where no display was found count against the confidence
+            reading, confidence, votes = consensus_reading(
+                readings + [NO_READING] * (frames_sampled - len(readings))
+            )
+            logging.info(
+                f"Stream {source}: {frames_sampled} frames sampled, {detector_runs} "
+                f"detector runs, reading {reading!r} (confidence {confidence})"
+            )
+            return {
+                "reading": reading,
+                "confidence": confidence,
+                "votes": votes,
+                "frames_sampled": frames_sampled,
+                "frames_read": len(readings),
+                "detector_runs": detector_runs,
+                "frame_readings": list(zip(frame_indices, readings)),
+            }
+        except Exception as e:
+            raise CustomException(str(e), sys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Read a meter from a video file or a folder of frames."
+    )
+    parser.add_argument("--source", required=True, help="Video file or folder of frames")
+    parser.add_argument("--sample-every", type=int, default=None)
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--drift-threshold", type=float, default=None)
+    parser.add_argument("--meter-type", default=None)
+    args = parser.parse_args()
+
+    from metervision.pipeline.predictor import MeterVisionPipeline
+
+    reader = StreamReader(
+        MeterVisionPipeline(),
+        sample_every=args.sample_every,
+        max_frames=args.max_frames,
+        drift_threshold=args.drift_threshold,
+    )
+    print(json.dumps(reader.read(args.source, meter_type=args.meter_type), indent=2))
+
+
+if __name__ == "__main__":
+    main()
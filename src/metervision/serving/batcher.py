@@ -0,0 +1,176 @@
+"""
+Dynamic micro-batching for asyncio services.
+
+`MicroBatcher` collects concurrently submitted items into batches and runs one batch
+function call per batch on a worker thread, so the event loop stays responsive while
+the models run and concurrent clients share model calls.
+
+A batch is dispatched as soon as it holds `max_batch_size` items, or once the oldest
+item in it has waited `max_wait_ms` milliseconds, whichever comes first. With
+`concurrency` > 1 (e.g. a `ReplicaPool` behind `batch_fn`) that many batches run at
+the same time. A failing batch is retried item by item, so one bad image only fails
+its own request.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Set
+
+from metervision.logger.logs import logging
+from metervision.monitoring.metrics import BATCH_SIZE, QUEUE_WAIT_SECONDS
+
+
+class QueueFullError(Exception):
+    """Raised by `MicroBatcher.submit` when the request queue is at capacity."""
+
+
+class MicroBatcher:
+    """
+    Groups items submitted from coroutines into batches for `batch_fn`.
+
+    Parameters
+    ----------
+    batch_fn : Callable[[List[Any]], List[Any]]
+        Blocking function mapping a list of items to a list of results (same order),
+        e.g. `MeterVisionPipeline.predict_batch`.
+    max_batch_size : int
+        Upper bound of items per `batch_fn` call.
+    max_wait_ms : float
+        Longest time the first item of a batch waits for companions.
+    max_queue_size : int
+        Pending items beyond this are rejected with `QueueFullError` (0 = unbounded).
+    concurrency : int
+        Batches allowed in flight at once (one worker thread each).
+    name : str
+        `component` label of the batch-size / queue-wait metrics.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_queue_size: int = 0,
+        concurrency: int = 1,
+        name: str = "micro_batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self.concurrency = max(1, concurrency)
+        self.name = name
+
+        self.queue: Optional[asyncio.Queue] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="batcher"
+        )
+        self.worker_task: Optional[asyncio.Task] = None
+        self.in_flight: Set[asyncio.Task] = set()
+
+        # simple counters, handy to tune max_batch_size / max_wait_ms
+        self.batches_run = 0
+        self.items_run = 0
+
+    def start(self) -> None:
+        """Start the batching loop on the running event loop."""
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self.slots = asyncio.Semaphore(self.concurrency)
+        self.worker_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the batching loop and release the worker thread."""
+        if self.worker_task is not None:
+            self.worker_task.cancel()
+            try:
+                await self.worker_task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch it joins."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise QueueFullError("Inference queue is full")
+        return await future
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    async def _collect(self) -> List[Any]:
+        """Wait for the first item, then gather more until full or the wait expires."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            # only start collecting once a slot is free, so batches fill while busy
+            await self.slots.acquire()
+            batch = await self._collect()
+
+            # drop items whose client went away before the batch ran
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                self.slots.release()
+                continue
+
+            # keep a reference: the event loop only holds tasks weakly
+            task = asyncio.create_task(self._dispatch(batch))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def _dispatch(self, batch) -> None:
+        started = time.perf_counter()
+        for _, _, queued_at in batch:
+            QUEUE_WAIT_SECONDS.observe(started - queued_at, component=self.name)
+        BATCH_SIZE.observe(len(batch), component=self.name)
+
+        try:
+            await self._run_batch(batch)
+        finally:
+            self.slots.release()
+
+    async def _run_batch(self, batch) -> None:
+        items = [item for item, _, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.batch_fn, items
+            )
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results "
+                    f"for {len(items)} items"
+                )
+        except Exception as exc:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(exc)
+                return
+            logging.warning(f"Micro-batch of {len(items)} failed ({exc}); retrying one by one")
+            for entry in batch:
+                if not entry[1].done():
+                    await self._run_batch([entry])
+            return
+
+        self.batches_run += 1
+        self.items_run += len(items)
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,167 @@
+"""
+Thread-safe, batching inference front for in-process callers (the Streamlit app).
+
+Streamlit runs every user session's script on its own thread, so calling one shared
+`MeterVisionPipeline` directly lets several sessions drive the YOLO and HF models at
+the same time. `InferenceExecutor` gives the models a single owner instead:
+
+Features:
+- One worker thread owns the pipeline; nothing else calls it, so model calls never
+  overlap.
+- `submit` returns a `concurrent.futures.Future` immediately; the caller can show
+  progress (`queue_depth`, `future.running()`) while it waits.
+- Requests arriving within `max_wait_ms` of each other are served by one
+  `predict_batch` / `predict_files` call (up to `max_batch_size`), grouped by kind
+  and meter type.
+- The queue is bounded: beyond `max_queue_size`, `submit` raises `QueueFullError`.
+- A failing batch is retried image by image, so one bad upload only fails itself.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metervision.logger.logs import logging
+from metervision.monitoring.metrics import BATCH_SIZE, QUEUE_WAIT_SECONDS
+from metervision.serving.batcher import QueueFullError
+
+# request kind -> (batched pipeline method, its list keyword)
+_BATCH_METHODS = {
+    "image": ("predict_batch", "images"),
+    "file": ("predict_files", "img_sources"),
+}
+
+
+class InferenceExecutor:
+    """
+    Bounded queue + single model-owning worker thread with micro-batching.
+
+    Parameters
+    ----------
+    pipeline : MeterVisionPipeline
+        Loaded pipeline (a `CachedPipeline` wrapper works too); owned by the worker.
+    max_batch_size : int
+        Largest number of requests served by one pipeline call.
+    max_wait_ms : float
+        Longest time the first request of a batch waits for companions.
+    max_queue_size : int
+        Pending requests beyond this are rejected with `QueueFullError`.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        max_queue_size: int = 64,
+    ):
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue: "queue.Queue[Tuple[str, Any, Optional[str], Future, float]]" = (
+            queue.Queue(maxsize=max_queue_size)
+        )
+
+        # counters, handy to tune max_batch_size / max_wait_ms
+        self.batches_run = 0
+        self.items_run = 0
+
+        self.worker = threading.Thread(
+            target=self._run, name="inference-executor", daemon=True
+        )
+        self.worker.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    def submit(
+        self,
+        image: Optional[np.ndarray] = None,
+        img_source: Any = None,
+        meter_type: Optional[str] = None,
+    ) -> Future:
+        """
+        Queue one prediction and return its future.
+
+        Parameters
+        ----------
+        image : Optional[ndarray]
+            Decoded image (served with `predict_batch`).
+        img_source : Any
+            Encoded image path / file-like object instead (served with `predict_files`,
+            i.e. coarse-to-fine for large photos).
+        meter_type : Optional[str]
+            Reading-decoding profile.
+
+        Returns
+        -------
+        Future
+            Resolves to (display_image, reading_image, reading), as `predict`.
+        """
+        if (image is None) == (img_source is None):
+            raise ValueError("Pass exactly one of `image` or `img_source`")
+
+        kind, payload = ("image", image) if image is not None else ("file", img_source)
+        future: Future = Future()
+        try:
+            self.queue.put_nowait((kind, payload, meter_type, future, time.perf_counter()))
+        except queue.Full:
+            raise QueueFullError("Inference queue is full, please retry shortly") from None
+        return future
+
+    def _collect(self) -> List[Tuple[str, Any, Optional[str], Future, float]]:
+        """Wait for the first request, then gather more until full or the wait expires."""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+
+            started = time.perf_counter()
+            groups: Dict[Tuple[str, Optional[str]], List[Tuple[Any, Future]]] = {}
+            for kind, payload, meter_type, future, queued_at in batch:
+                # skip requests cancelled while queued
+                if future.set_running_or_notify_cancel():
+                    QUEUE_WAIT_SECONDS.observe(started - queued_at, component="app_executor")
+                    groups.setdefault((kind, meter_type), []).append((payload, future))
+
+            for (kind, meter_type), items in groups.items():
+                self._serve(kind, meter_type, items)
+
+    def _serve(
+        self, kind: str, meter_type: Optional[str], items: List[Tuple[Any, Future]]
+    ) -> None:
+        method, keyword = _BATCH_METHODS[kind]
+        batch_fn = getattr(self.pipeline, method)
+        payloads = [payload for payload, _ in items]
+        BATCH_SIZE.observe(len(items), component="app_executor")
+        try:
+            results = batch_fn(**{keyword: payloads, "meter_type": meter_type})
+        except Exception as exc:
+            if len(items) == 1:
+                items[0][1].set_exception(exc)
+                return
+            logging.warning(f"Batch of {len(items)} failed ({exc}); retrying one by one")
+            for item in items:
+                self._serve(kind, meter_type, [item])
+            return
+
+        self.batches_run += 1
+        self.items_run += len(items)
+        for (_, future), result in zip(items, results):
+            future.set_result(result)
@@ -0,0 +1,547 @@
+"""
+Process-pool runtime of `MeterVisionPipeline` replicas.
+
+Several PyTorch processes that each use every core oversubscribe the machine and get
+slower, not faster. `ReplicaPool` starts N replica processes instead, each loading
+its own pipeline with a fixed number of intra-op threads and, optionally, pinned to
+its own set of cores.
+
+Features:
+- Images are handed to the replicas through one shared-memory block per batch; only
+  the block name and the array layout are pickled.
+- Replicas pull batches from a shared queue, so a slow batch never blocks the others.
+- `submit` returns a `concurrent.futures.Future`; `predict_batch` / `predict` block.
+- Pool size: `replica_pool.replicas` / `threads_per_replica`, or 0 for automatic. The
+  automatic size comes from the sizing file written by `calibrate` (per-replica
+  throughput measured for several thread counts) or, without it, from the core count.
+
+CLI (measure per-replica throughput and save the chosen sizing):
+    python -m metervision.serving.replica_pool --images 32 --batch-size 8
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metervision.constants import DIR_CONFIG_FILE, PARAMS_CONFIG_FILE
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+
+# (offset, shape, dtype) of every image inside a shared-memory block
+ImageLayout = List[Tuple[int, Tuple[int, ...], str]]
+_ALIGN = 64
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Shared-memory image transfer
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def pack_images(images: List[np.ndarray]) -> Tuple[SharedMemory, ImageLayout]:
+    """Copy a batch of arrays into one new shared-memory block; returns it and the layout."""
+    layout: ImageLayout = []
+    offset = 0
+    for image in images:
+        layout.append((offset, image.shape, image.dtype.str))
+        offset += -(-image.nbytes // _ALIGN) * _ALIGN
+
+    shm = SharedMemory(create=True, size=max(offset, 1))
+    for image, (start, shape, dtype) in zip(images, layout):
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        view[...] = image
+    return shm, layout
+
+
+def attach_images(name: str, layout: ImageLayout) -> Tuple[SharedMemory, List[np.ndarray]]:
+    """Attach to a block created by `pack_images`; returns it and zero-copy views."""
+    try:
+        shm = SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        shm = SharedMemory(name=name)
+        # the creating process owns (and unlinks) the block, not this one
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+    views = [
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        for start, shape, dtype in layout
+    ]
+    return shm, views
+
+
+def _detach(value: Any, views: List[np.ndarray]) -> Any:
+    """Copy arrays that still point into the shared block (e.g. an uncropped fallback)."""
+    if isinstance(value, np.ndarray):
+        if any(np.may_share_memory(value, view) for view in views):
+            return value.copy()
+        return value
+    if isinstance(value, (tuple, list)):
+        return type(value)(_detach(item, views) for item in value)
+    return value
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# CPU placement
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on (respects cgroup / taskset restrictions)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    try:
+        import psutil
+
+        return sorted(psutil.Process().cpu_affinity())
+    except Exception:
+        return list(range(os.cpu_count() or 1))
+
+
+def set_cpu_affinity(cpus: List[int]) -> bool:
+    """Pin the current process to `cpus`; returns False where unsupported."""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+            return True
+        import psutil
+
+        psutil.Process().cpu_affinity(cpus)
+        return True
+    except Exception as exc:
+        logging.warning(f"CPU affinity not applied: {exc}")
+        return False
+
+
+def replica_cpus(index: int, threads: int, cpus: List[int]) -> List[int]:
+    """Consecutive block of `threads` CPUs for replica `index` (wrapping around)."""
+    return [cpus[(index * threads + i) % len(cpus)] for i in range(threads)]
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Replica process
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def _replica_main(
+    index: int,
+    num_threads: int,
+    cpus: Optional[List[int]],
+    task_queue: mp.Queue,
+    result_queue: mp.Queue,
+    gating: bool = True,
+) -> None:
+    """Replica process: pin threads / cores, load one pipeline, serve batches."""
+    # must be set before torch (and its OpenMP runtime) is imported in this process
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(num_threads)
+    if cpus:
+        set_cpu_affinity(cpus)
+
+    try:
+        import cv2
+        import torch
+
+        from metervision.pipeline.predictor import MeterVisionPipeline
+
+        torch.set_num_interop_threads(1)
+        cv2.setNumThreads(num_threads)
+        if not gating:
+            # this process's own copy of the config (spawned replica)
+            PARAMS_CONFIG_FILE.gating.enabled = False
+        pipeline = MeterVisionPipeline(cpu_num_threads=num_threads)
+    except Exception as exc:
+        result_queue.put(("failed", index, str(exc)))
+        return
+
+    result_queue.put(("ready", index, os.getpid()))
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, shm_name, layout, method, kwargs = task
+        shm, views, results = None, [], None
+        try:
+            shm, views = attach_images(shm_name, layout)
+            if method == "predict_batch":
+                results = pipeline.predict_batch(images=views, **kwargs)
+            else:
+                results = [getattr(pipeline, method)(view, **kwargs) for view in views]
+            result_queue.put(("done", task_id, _detach(results, views)))
+        except Exception as exc:
+            result_queue.put(("error", task_id, str(exc)))
+        finally:
+            # every view into the block must be gone before it can be closed
+            views = results = None
+            if shm is not None:
+                try:
+                    shm.close()
+                except BufferError:
+                    logging.warning(f"Replica {index}: shared block still referenced")
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Pool
+# ------------------------------------------------------------------------------------------------------------------
+
+
+class ReplicaPool:
+    """
+    N pipeline replica processes behind a future-based API.
+
+    Parameters
+    ----------
+    replicas : Optional[int]
+        Replica processes; 0 / None = `replica_pool.replicas`, then automatic.
+    threads_per_replica : Optional[int]
+        Intra-op threads per replica; 0 / None = `replica_pool.threads_per_replica`,
+        then automatic.
+    cpu_affinity : Optional[bool]
+        Pin each replica to its own block of cores (`replica_pool.cpu_affinity`).
+    gating : bool
+        False turns the early-exit gates off in the replicas (used by `calibrate`).
+    """
+
+    def __init__(
+        self,
+        replicas: Optional[int] = None,
+        threads_per_replica: Optional[int] = None,
+        cpu_affinity: Optional[bool] = None,
+        gating: bool = True,
+    ):
+        params = PARAMS_CONFIG_FILE.replica_pool
+        self.cpus = available_cpus()
+        replicas = replicas or params.replicas
+        threads_per_replica = threads_per_replica or params.threads_per_replica
+        if not replicas or not threads_per_replica:
+            auto_replicas, auto_threads = auto_size(self.cpus)
+            if not threads_per_replica:
+                threads_per_replica = auto_threads
+            if not replicas:
+                replicas = (
+                    auto_replicas
+                    if threads_per_replica == auto_threads
+                    else max(1, len(self.cpus) // threads_per_replica)
+                )
+
+        self.replicas = int(replicas)
+        self.threads_per_replica = int(threads_per_replica)
+        self.cpu_affinity = params.cpu_affinity if cpu_affinity is None else cpu_affinity
+        self.gating = gating
+
+        self._context = mp.get_context("spawn")
+        self._task_queue = None
+        self._result_queue = None
+        self._processes: List[Any] = []
+        self._pending: Dict[int, Tuple[Future, SharedMemory]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._collector: Optional[threading.Thread] = None
+        self._closed = False
+        self.error: Optional[str] = None
+
+    def start(self, timeout: float = 600.0) -> "ReplicaPool":
+        """Spawn the replicas and wait until every one has loaded its models."""
+        try:
+            start_time = time.perf_counter()
+            self._task_queue = self._context.Queue()
+            self._result_queue = self._context.Queue()
+            for index in range(self.replicas):
+                cpus = (
+                    replica_cpus(index, self.threads_per_replica, self.cpus)
+                    if self.cpu_affinity
+                    else None
+                )
+                process = self._context.Process(
+                    target=_replica_main,
+                    args=(
+                        index,
+                        self.threads_per_replica,
+                        cpus,
+                        self._task_queue,
+                        self._result_queue,
+                        self.gating,
+                    ),
+                    daemon=True,
+                    name=f"metervision-replica-{index}",
+                )
+                process.start()
+                self._processes.append(process)
+
+            for _ in range(self.replicas):
+                status, index, detail = self._result_queue.get(timeout=timeout)
+                if status != "ready":
+                    raise RuntimeError(f"Replica {index} failed to load: {detail}")
+
+            self._collector = threading.Thread(
+                target=self._collect, name="replica-results", daemon=True
+            )
+            self._collector.start()
+
+            elapsed = round(time.perf_counter() - start_time, 3)
+            logging.info(
+                f"Replica pool ready: {self.replicas} replicas x "
+                f"{self.threads_per_replica} threads (time {elapsed}s)"
+            )
+            return self
+        except Exception as e:
+            self.close()
+            raise CustomException(str(e), sys)
+
+    def _collect(self) -> None:
+        """Resolve futures from replica results; fail them all if a replica dies."""
+        while not self._closed:
+            try:
+                status, task_id, payload = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if any(not p.is_alive() for p in self._processes) and not self._closed:
+                    self._fail_all("A replica process exited unexpectedly")
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+
+            with self._lock:
+                future, shm = self._pending.pop(task_id, (None, None))
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            if future is None:
+                continue
+            if status == "done":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _fail_all(self, message: str) -> None:
+        self.error = message
+        logging.error(message)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, shm in pending.values():
+            shm.close()
+            shm.unlink()
+            future.set_exception(RuntimeError(message))
+
+    def submit(
+        self, images: List[np.ndarray], method: str = "predict_batch", **kwargs
+    ) -> Future:
+        """
+        Queue a batch for the next free replica.
+
+        Parameters
+        ----------
+        images : List[ndarray]
+            Decoded images; copied once into shared memory.
+        method : str
+            Pipeline method run on the batch: "predict_batch" (one call), or a
+            per-image method such as "predict" / "predict_multi".
+        **kwargs
+            Extra keyword arguments for the method (e.g. meter_type).
+
+        Returns
+        -------
+        Future
+            Resolves to the method's results, one per image.
+        """
+        if self.error or self._closed:
+            raise RuntimeError(self.error or "Replica pool is closed")
+
+        future: Future = Future()
+        if not images:
+            future.set_result([])
+            return future
+
+        shm, layout = pack_images(images)
+        task_id = next(self._ids)
+        with self._lock:
+            self._pending[task_id] = (future, shm)
+        self._task_queue.put((task_id, shm.name, layout, method, kwargs))
+        return future
+
+    def predict_batch(self, images: List[np.ndarray], meter_type: Optional[str] = None):
+        """Blocking equivalent of `MeterVisionPipeline.predict_batch`."""
+        return self.submit(images, meter_type=meter_type).result()
+
+    def predict(self, image: np.ndarray, meter_type: Optional[str] = None):
+        """Blocking equivalent of `MeterVisionPipeline.predict`."""
+        return self.predict_batch([image], meter_type=meter_type)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replicas": self.replicas,
+            "threads_per_replica": self.threads_per_replica,
+            "cpu_affinity": self.cpu_affinity,
+            "pending": len(self._pending),
+            "alive": sum(p.is_alive() for p in self._processes),
+        }
+
+    def close(self) -> None:
+        """Stop the replicas and release every pending shared-memory block."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task_queue is not None:
+            for _ in self._processes:
+                self._task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        if self._pending:
+            self._fail_all("Replica pool is closed")
+
+    def __enter__(self) -> "ReplicaPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# ------------------------------------------------------------------------------------------------------------------
+# Sizing
+# ------------------------------------------------------------------------------------------------------------------
+
+
+def _sizing_path() -> str:
+    return DIR_CONFIG_FILE.replica_pool_sizing
+
+
+def auto_size(cpus: Optional[List[int]] = None) -> Tuple[int, int]:
+    """
+    (replicas, threads_per_replica) for this machine.
+
+    Uses the sizing file written by `calibrate` when it was measured on the same
+    number of cores; otherwise one replica per `trocr_model.cpu_num_threads` cores.
+    """
+    cpus = cpus or available_cpus()
+    try:
+        with open(_sizing_path(), "r", encoding="utf-8") as f:
+            sizing = json.load(f)
+        if sizing.get("cores") == len(cpus):
+            return sizing["replicas"], sizing["threads_per_replica"]
+        logging.info("Replica sizing file was measured on a different core count")
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        logging.info("No replica sizing file; run `metervision-replica-sizing` to measure")
+
+    threads = max(1, min(int(PARAMS_CONFIG_FILE.trocr_model.cpu_num_threads), len(cpus)))
+    return max(1, len(cpus) // threads), threads
+
+
+def measure_replica(
+    threads: int, images: List[np.ndarray], batch_size: int
+) -> Dict[str, float]:
+    """
+    Images/s and resident memory of a single replica using `threads` threads.
+
+    Gating is off, so every image runs through all three models even when the gates
+    would reject it (the synthetic calibration images are not meter photos).
+    """
+    with ReplicaPool(
+        replicas=1, threads_per_replica=threads, cpu_affinity=True, gating=False
+    ) as pool:
+        pool.predict_batch(images[:batch_size])  # warm-up
+        start_time = time.perf_counter()
+        futures = [
+            pool.submit(images[i : i + batch_size])
+            for i in range(0, len(images), batch_size)
+        ]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start_time
+
+        rss_mb = 0.0
+        try:
+            import psutil
+
+            rss_mb = psutil.Process(pool._processes[0].pid).memory_info().rss / 2**20
+        except Exception:
+            pass
+
+    return {
+        "threads": threads,
+        "images_per_s": round(len(images) / elapsed, 3),
+        "rss_mb": round(rss_mb, 1),
+    }
+
+
+def calibrate(images: List[np.ndarray], batch_size: int = 8) -> Dict[str, Any]:
+    """
+    Measure one replica at 1, 2, 4, ... threads and pick the pool layout with the
+    highest estimated throughput (replicas x per-replica images/s) that fits in the
+    available memory. The result is saved to `replica_pool_sizing`.
+    """
+    cpus = available_cpus()
+    candidates = [t for t in (1, 2, 4, 8, 16, 32) if t <= len(cpus)]
+    measurements = [measure_replica(t, images, batch_size) for t in candidates]
+
+    available_mb = None
+    try:
+        import psutil
+
+        available_mb = psutil.virtual_memory().available / 2**20
+    except Exception:
+        pass
+
+    layouts = []
+    for m in measurements:
+        replicas = len(cpus) // m["threads"]
+        if available_mb and m["rss_mb"]:
+            replicas = min(replicas, max(1, int(available_mb * 0.8 // m["rss_mb"])))
+        estimate = replicas * m["images_per_s"]
+        m["estimated_pool_images_per_s"] = round(estimate, 3)
+        layouts.append((estimate, replicas, m["threads"]))
+
+    # within 5% of the best estimate counts as a tie; ties go to fewer replicas
+    # (less memory)
+    top = max(estimate for estimate, _, _ in layouts)
+    best = min(
+        (layout for layout in layouts if layout[0] * 1.05 >= top),
+        key=lambda layout: (layout[1], -layout[0]),
+    )
+
+    sizing = {
+        "cores": len(cpus),
+        "replicas": best[1],
+        "threads_per_replica": best[2],
+        "measurements": measurements,
+    }
+    path = _sizing_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(sizing, f, indent=2)
+    logging.info(f"Replica sizing saved to {path}: {sizing}")
+    return sizing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure per-replica throughput and save the replica pool sizing."
+    )
+    parser.add_argument("--images", type=int, default=32, help="Synthetic images per run")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=960)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    images = [
+        rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+        for _ in range(args.images)
+    ]
+    print(json.dumps(calibrate(images, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
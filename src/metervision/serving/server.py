@@ -0,0 +1,315 @@
+"""
+Standalone asyncio HTTP inference server for MeterVision.
+
+The server loads `MeterVisionPipeline` once, in the background, and serves readings
+through a `MicroBatcher` so concurrent requests share `predict_batch` calls. It is
+independent of the Streamlit app and only uses the standard library for HTTP.
+
+With `use_replica_pool` the readings are served by a `ReplicaPool` of model-replica
+processes instead of an in-process pipeline, one micro-batch in flight per replica.
+
+Endpoints:
+- GET  /health   : liveness, always 200 once the socket is listening.
+- GET  /ready    : 200 when the models are loaded, 503 while loading (or on failure).
+- POST /predict  : raw image bytes (jpg/png) in the body -> JSON reading.
+- GET  /metrics  : per-stage latency, miss, batch-size and queue-wait metrics
+                   (Prometheus text format).
+- GET  /traces   : most recent in-memory spans (JSON), when `metrics.tracing` is on.
+- /admin/profile : on-demand profiling (only with `profiling.allow_admin`):
+                   POST {"requests": 20} or {"fraction": 0.01, "torch": false} schedules
+                   captures, GET returns the status, DELETE cancels. With the replica
+                   pool the models run in other processes; use METERVISION_PROFILE there.
+
+CLI:
+    python -m metervision.serving.server --port 8080 --max-batch-size 8 --max-wait-ms 10
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+from metervision.constants import PARAMS_CONFIG_FILE
+from metervision.exception.custom_exception import CustomException
+from metervision.logger.logs import logging
+from metervision.monitoring import profiling, tracing
+from metervision.monitoring.metrics import CONTENT_TYPE, render_prometheus
+from metervision.serving.batcher import MicroBatcher, QueueFullError
+from metervision.utils.file_utils import read_img
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+
+class InferenceServer:
+    """
+    asyncio HTTP front-end around a lazily loaded `MeterVisionPipeline`.
+
+    Parameters
+    ----------
+    host : str
+        Interface to bind.
+    port : int
+        TCP port to bind.
+    max_batch_size : int
+        Largest micro-batch handed to `predict_batch`.
+    max_wait_ms : float
+        Longest time a request waits for others to join its batch.
+    max_queue_size : int
+        Pending requests beyond this get a 503 instead of queueing forever.
+    use_replica_pool : bool
+        Serve from a `ReplicaPool` (sized by `replica_pool`) instead of in-process.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_queue_size: int,
+        use_replica_pool: bool = False,
+    ):
+        self.host = host
+        self.port = port
+        self.pipeline = None
+        self.load_error: Optional[str] = None
+        self.replica_pool = None
+        if use_replica_pool:
+            from metervision.serving.replica_pool import ReplicaPool
+
+            self.replica_pool = ReplicaPool()
+        self.batcher = MicroBatcher(
+            batch_fn=self._predict_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            max_queue_size=max_queue_size,
+            concurrency=self.replica_pool.replicas if self.replica_pool else 1,
+            name="server",
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.pipeline is not None
+
+    def _predict_batch(self, images):
+        return self.pipeline.predict_batch(images=images)
+
+    async def _load_pipeline(self) -> None:
+        """Load the models on a worker thread so /health and /ready keep answering."""
+        from metervision.pipeline.predictor import MeterVisionPipeline
+
+        try:
+            start_time = time.perf_counter()
+            self.pipeline = await asyncio.get_running_loop().run_in_executor(
+                None, self.replica_pool.start if self.replica_pool else MeterVisionPipeline
+            )
+            elapsed = round(time.perf_counter() - start_time, 3)
+            logging.info(f"Inference server models loaded (time {elapsed}s)")
+        except Exception as exc:
+            self.load_error = str(exc)
+            logging.error(f"Inference server failed to load models: {exc}")
+
+    # --------------------------------------------------------------------------------------------------------------
+    # HTTP handling
+    # --------------------------------------------------------------------------------------------------------------
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Tuple[str, str, Dict[str, str], bytes]:
+        """Parse one HTTP/1.1 request; raises IncompleteReadError once the client closed."""
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("payload too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    async def _route(
+        self, method: str, path: str, body: bytes
+    ) -> Tuple[int, Union[Dict[str, Any], str]]:
+        if path == "/health":
+            return 200, {"status": "ok"}
+
+        if path == "/ready":
+            if self.ready:
+                return 200, {"status": "ready"}
+            if self.load_error:
+                return 503, {"status": "failed", "error": self.load_error}
+            return 503, {"status": "loading"}
+
+        if path == "/metrics":
+            return 200, render_prometheus()
+
+        if path == "/traces":
+            return 200, {"spans": tracing.recent_spans()}
+
+        if path == "/admin/profile":
+            return self._admin_profile(method, body)
+
+        if path != "/predict":
+            return 404, {"error": "not found"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        if not self.ready:
+            return 503, {"error": "models are still loading"}
+
+        # decoding a large photo takes tens of ms; keep it off the event loop
+        image = await asyncio.get_running_loop().run_in_executor(
+            None, read_img, io.BytesIO(body)
+        )
+        if image is None:
+            return 400, {"error": "body is not a decodable image"}
+
+        start_time = time.perf_counter()
+        try:
+            _, _, reading = await self.batcher.submit(image)
+        except QueueFullError as exc:
+            return 503, {"error": str(exc)}
+        except Exception as exc:
+            return 500, {"error": str(exc)}
+
+        latency_ms = round((time.perf_counter() - start_time) * 1000, 2)
+        return 200, {"reading": reading, "latency_ms": latency_ms}
+
+    def _admin_profile(self, method: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Schedule (POST), inspect (GET) or cancel (DELETE) profiling captures."""
+        if not PARAMS_CONFIG_FILE.profiling.allow_admin:
+            return 403, {"error": "profiling admin endpoint is disabled"}
+        if method == "GET":
+            return 200, profiling.profiling_status()
+        if method == "DELETE":
+            return 200, profiling.stop_profiling()
+        if method != "POST":
+            return 405, {"error": "use GET, POST or DELETE"}
+
+        try:
+            options = json.loads(body or b"{}")
+            status = profiling.start_profiling(
+                requests=int(options.get("requests", 0)),
+                fraction=float(options.get("fraction", 0.0)),
+                torch_profiler=options.get("torch"),
+            )
+        except (ValueError, TypeError, AttributeError) as exc:
+            return 400, {"error": str(exc)}
+        return 200, status
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except (ValueError, asyncio.LimitOverrunError) as exc:
+                    status = 413 if "too large" in str(exc) else 400
+                    await self._respond(writer, status, {"error": str(exc)}, False)
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload = await self._route(method, path, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Union[Dict[str, Any], str],
+        keep_alive: bool,
+    ) -> None:
+        """Send `payload` as JSON, or as Prometheus text when it is a string."""
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), CONTENT_TYPE
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self) -> None:
+        """Bind the socket first, then load the models in the background."""
+        self.batcher.start()
+        server = await asyncio.start_server(
+            self._handle_connection, host=self.host, port=self.port
+        )
+        logging.info(f"Inference server listening on {self.host}:{self.port}")
+
+        loader = asyncio.create_task(self._load_pipeline())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            loader.cancel()
+            await self.batcher.stop()
+            if self.replica_pool is not None:
+                self.replica_pool.close()
+
+
+def main() -> None:
+    params = PARAMS_CONFIG_FILE.inference_server
+
+    parser = argparse.ArgumentParser(description="MeterVision HTTP inference server.")
+    parser.add_argument("--host", default=params.host)
+    parser.add_argument("--port", type=int, default=params.port)
+    parser.add_argument("--max-batch-size", type=int, default=params.max_batch_size)
+    parser.add_argument("--max-wait-ms", type=float, default=params.max_wait_ms)
+    parser.add_argument("--max-queue-size", type=int, default=params.max_queue_size)
+    parser.add_argument(
+        "--replica-pool",
+        action=argparse.BooleanOptionalAction,
+        default=params.use_replica_pool,
+        help="Serve from model-replica processes (see replica_pool in the config)",
+    )
+    args = parser.parse_args()
+
+    try:
+        server = InferenceServer(
+            host=args.host,
+            port=args.port,
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+            max_queue_size=args.max_queue_size,
+            use_replica_pool=args.replica_pool,
+        )
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        logging.info("Inference server stopped")
+    except Exception as e:
+        raise CustomException(str(e), sys)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from PIL import Image
 
 from metervision.exception.custom_exception import CustomException
 from metervision.logger.logs import logging
+from metervision.monitoring.metrics import stage_timer
 
 
 # Reading the YAML Files
@@ -37,10 +38,48 @@ def read_json(file_dir):
 # Reading the Images and returned as np.array
 def read_img(img_path):
     try:
-        img = Image.open(img_path)
-        img = img.convert("RGB")
-        img_array = np.array(img, dtype=np.uint8)
+        with stage_timer("decode"):
+            img = Image.open(img_path)
+            img = img.convert("RGB")
+            img_array = np.array(img, dtype=np.uint8)
         logging.info("Image Converted into Numpy Array")
         return img_array
     except Exception as e:
         CustomException(str(e), sys)
+
+
+def _rewind(img_source):
+    # file-like sources (uploads, BytesIO) are read more than once
+    if hasattr(img_source, "seek"):
+        img_source.seek(0)
+    return img_source
+
+
+# Reading a downscaled preview of an image, using JPEG draft (DCT-scaled) decoding
+def read_img_thumbnail(img_source, max_side):
+    try:
+        with stage_timer("decode_thumbnail"):
+            img = Image.open(_rewind(img_source))
+            full_size = img.size
+            # JPEG only: decode at 1/2, 1/4 or 1/8 scale, still at least max_side wide/high
+            img.draft("RGB", (max_side, max_side))
+            img = img.convert("RGB")
+            img.thumbnail((max_side, max_side))
+            img_array = np.array(img, dtype=np.uint8)
+        logging.info(f"Image Thumbnail {img_array.shape[1]}x{img_array.shape[0]} of {full_size[0]}x{full_size[1]}")
+        return img_array, full_size
+    except Exception as e:
+        raise CustomException(str(e), sys)
+
+
+# Reading only a region (left, top, right, bottom) of an image at full resolution
+def read_img_region(img_source, box):
+    try:
+        with stage_timer("decode_region"):
+            img = Image.open(_rewind(img_source))
+            region = img.crop(tuple(int(v) for v in box)).convert("RGB")
+            img_array = np.array(region, dtype=np.uint8)
+        logging.info("Image Region Converted into Numpy Array")
+        return img_array
+    except Exception as e:
+        raise CustomException(str(e), sys)
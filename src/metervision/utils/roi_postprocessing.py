@@ -1,30 +1,162 @@
 import sys
 
 import cv2
+import numpy as np
 
 from metervision.exception.custom_exception import CustomException
 from metervision.logger.logs import logging
+from metervision.monitoring.metrics import stage_timer
 
 
-def extract_roi(img_arr, coords, resized_shape, task):
+def order_quad(coords):
+    """
+    Return the 4 corners of a box as float32 (top-left, top-right, bottom-right,
+    bottom-left).
+
+    Accepts an oriented box (4 points, e.g. YOLO OBB xyxyxyxy) or an axis-aligned box
+    given as 2 points (x1, y1), (x2, y2), both shaped (N, 1, 2) like the detectors'
+    polygons.
+    """
+    pts = np.asarray(coords, dtype=np.float32).reshape(-1, 2)
+    if len(pts) == 2:
+        (x1, y1), (x2, y2) = pts.min(axis=0), pts.max(axis=0)
+        return np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float32)
+
+    # clockwise (image coordinates) by angle around the centroid, so every corner is
+    # used once even for a box rotated by 45 degrees; start at the top-left-most one
+    center = pts.mean(axis=0)
+    pts = pts[np.argsort(np.arctan2(pts[:, 1] - center[1], pts[:, 0] - center[0]))]
+    return np.roll(pts, -int(np.argmin(pts.sum(axis=1))), axis=0)
+
+
+def _warp_into(img_arr, coords, resized_shape, out, interpolation):
+    """Warp one box straight to `resized_shape` (w, h), writing into `out` if given."""
+    width, height = resized_shape
+    src = order_quad(coords)
+    dst = np.array(
+        [[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]],
+        dtype=np.float32,
+    )
+
+    if len(np.asarray(coords).reshape(-1, 2)) == 2:
+        # axis-aligned box: scale + translate is enough (cheaper than a homography)
+        matrix = cv2.getAffineTransform(src[:3], dst[:3])
+        return cv2.warpAffine(
+            img_arr,
+            matrix,
+            (width, height),
+            dst=out,
+            flags=interpolation,
+            borderMode=cv2.BORDER_REPLICATE,
+        )
+
+    matrix = cv2.getPerspectiveTransform(src, dst)
+    return cv2.warpPerspective(
+        img_arr,
+        matrix,
+        (width, height),
+        dst=out,
+        flags=interpolation,
+        borderMode=cv2.BORDER_REPLICATE,
+    )
+
+
+def extract_roi(
+    img_arr, coords, resized_shape, task, out=None, interpolation=cv2.INTER_CUBIC
+):
+    """
+    Crop a (possibly rotated) box and resize it to `resized_shape` in one resampling.
+
+    The box corners are mapped directly onto the (w, h) output rectangle with a single
+    `warpPerspective` (or `warpAffine` for axis-aligned boxes), so the OBB orientation
+    is corrected and no intermediate crop is allocated. Pass `out` (h, w[, C]) to
+    write into a reusable buffer.
+    """
     try:
         logging.info(f"Trying to Extract {task} ROI")
-        if not coords.any():
+        if coords is None or not coords.any():
             logging.warning("No Bounding Box Founded")
             return None
-        x_coords = coords[:, 0, 0]
-        y_coords = coords[:, 0, 1]
-        x1, x2 = x_coords.min(), x_coords.max()
-        y1, y2 = y_coords.min(), y_coords.max()
 
-        display_only_img = img_arr[y1:y2, x1:x2]
+        with stage_timer("crop"):
+            roi_img = _warp_into(img_arr, coords, resized_shape, out, interpolation)
         logging.info(f"{task} ROI Extraction Completed Successfully")
 
-        resized_display_img = cv2.resize(
-            display_only_img, resized_shape, interpolation=cv2.INTER_CUBIC
-        )
-        logging.info(f"{task} Extracted ROI Resized Completed")
+        return roi_img
+    except Exception as e:
+        raise CustomException(str(e), sys)
+
+
+def extract_roi_batch(
+    images, coords_list, resized_shape, task, out=None, interpolation=cv2.INTER_CUBIC
+):
+    """
+    Batched `extract_roi`: warp one box per image into a single (N, h, w[, C]) array.
+
+    `images` may be one image (many boxes on the same photo) or a list aligned with
+    `coords_list`. `out` can be a preallocated array reused across calls; the result
+    is returned as that array (or a new one).
+    """
+    try:
+        logging.info(f"Trying to Extract {len(coords_list)} {task} ROIs")
+        if isinstance(images, np.ndarray):
+            images = [images] * len(coords_list)
 
-        return resized_display_img
+        width, height = resized_shape
+        first = images[0]
+        shape = (len(coords_list), height, width) + first.shape[2:]
+        if out is None or out.shape != shape or out.dtype != first.dtype:
+            out = np.empty(shape, dtype=first.dtype)
+
+        with stage_timer("crop"):
+            for i, (img_arr, coords) in enumerate(zip(images, coords_list)):
+                _warp_into(img_arr, coords, resized_shape, out[i], interpolation)
+
+        logging.info(f"{task} ROI Extraction Completed Successfully")
+        return out
+    except Exception as e:
+        raise CustomException(str(e), sys)
+
+
+def best_box_index(confidences):
+    """
+    Return the index of the highest-confidence box, or None when there are no boxes.
+
+    Works directly on the detector's confidence tensor/array (argmax), so no Python
+    list round-trip is needed per detection.
+    """
+    try:
+        if confidences is None or len(confidences) == 0:
+            return None
+        return int(confidences.argmax())
+    except Exception as e:
+        raise CustomException(str(e), sys)
+
+
+def polygon_nms(polygons, confidences, iou_threshold, max_boxes=0):
+    """
+    Greedy non-maximum suppression over convex polygons (oriented boxes).
+
+    Overlap is the exact polygon IoU (`cv2.intersectConvexConvex`), so rotated boxes
+    side by side on a meter bank are not suppressed the way their axis-aligned
+    bounding rects would be. Returns the kept indices, highest confidence first.
+    """
+    try:
+        quads = [np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in polygons]
+        areas = [cv2.contourArea(q) for q in quads]
+        keep = []
+        for i in np.argsort(-np.asarray(confidences, dtype=np.float32)):
+            suppressed = False
+            for j in keep:
+                inter, _ = cv2.intersectConvexConvex(quads[i], quads[j])
+                union = areas[i] + areas[j] - inter
+                if union > 0 and inter / union > iou_threshold:
+                    suppressed = True
+                    break
+            if not suppressed:
+                keep.append(int(i))
+                if max_boxes and len(keep) >= max_boxes:
+                    break
+        return keep
     except Exception as e:
         raise CustomException(str(e), sys)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the offline model stubs live next to the benchmarks that use them
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
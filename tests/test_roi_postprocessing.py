@@ -0,0 +1,28 @@
+import numpy as np
+
+from metervision.utils.roi_postprocessing import order_quad
+
+
+def test_order_quad_axis_aligned_box():
+    quad = order_quad(np.array([[[30, 40]], [[10, 20]]], dtype=np.int32))
+
+    assert quad.tolist() == [[10, 20], [30, 20], [30, 40], [10, 40]]
+
+
+def test_order_quad_shuffled_rectangle():
+    corners = [[10, 20], [30, 20], [30, 40], [10, 40]]
+    quad = order_quad(np.array([corners[2], corners[0], corners[3], corners[1]]))
+
+    assert quad.tolist() == corners
+
+
+def test_order_quad_rotated_45_degrees_uses_every_corner():
+    # square rotated by 45 degrees: top, right, bottom and left corners
+    diamond = np.array([[[50, 10]], [[90, 50]], [[50, 90]], [[10, 50]]], dtype=np.int32)
+
+    quad = order_quad(diamond[::-1])
+
+    assert len({tuple(point) for point in quad.tolist()}) == 4
+    # clockwise in image coordinates (y down): positive shoelace area
+    x, y = quad[:, 0], quad[:, 1]
+    assert np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)) > 0
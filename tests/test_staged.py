@@ -0,0 +1,20 @@
+import numpy as np
+
+from metervision.pipeline.staged import StagedPipeline
+from stub_models import build_stub_pipeline, synthetic_meter_image
+
+
+def test_staged_results_match_predict():
+    pipeline = build_stub_pipeline()
+    images = [synthetic_meter_image(640, 480, reading=f"{i:07d}", seed=i) for i in range(4)]
+
+    staged = StagedPipeline(
+        pipeline, display_threads=1, reading_threads=1, ocr_threads=2, queue_size=2
+    ).predict_many(images)
+
+    assert len(staged) == len(images)
+    for image, (display_image, reading_image, reading) in zip(images, staged):
+        expected = pipeline.predict(image)
+        assert np.array_equal(display_image, expected[0])
+        assert np.array_equal(reading_image, expected[1])
+        assert reading == expected[2]
@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+import torch
+
+from metervision.pipeline.stream import StreamReader
+from stub_models import build_stub_pipeline, synthetic_meter_image
+
+
+class NoBoxYOLO:
+    """Detector stand-in that finds nothing in any image."""
+
+    def __call__(self, images, **kwargs):
+        images = images if isinstance(images, list) else [images]
+        empty = SimpleNamespace(conf=torch.empty(0), xyxy=torch.empty((0, 4)))
+        return [SimpleNamespace(boxes=empty) for _ in images]
+
+
+def test_detect_frame_without_reading_box():
+    pipeline = build_stub_pipeline()
+    pipeline.reading_detector.model = NoBoxYOLO()
+    reader = StreamReader(pipeline)
+
+    display_polygon, reading_polygon = reader._detect(synthetic_meter_image(640, 480))
+
+    assert display_polygon is not None
+    assert reading_polygon is None